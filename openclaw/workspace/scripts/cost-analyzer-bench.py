@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Cost Analyzer benchmark
+Generates synthetic session transcripts and times cost-analyzer.py phases on them.
+
+Usage:
+  python3 cost-analyzer-bench.py generate --size 100M --data /tmp/cost-bench
+  python3 cost-analyzer-bench.py run --data /tmp/cost-bench --jobs 4 --output bench.json
+  python3 cost-analyzer-bench.py run --size 1G --compare bench.json   # generate if missing, diff results
+
+The dataset is laid out as a home directory (<data>/gladys/openclaw/agents/...),
+and every phase runs in a fresh interpreter with HOME=<data>, so the analyzer
+reads the synthetic agents and writes its state/index/columns/PNG next to them.
+Each phase reports wall time, throughput and the peak RSS of its process.
+"""
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ANALYZER_PATH = SCRIPT_DIR / "cost-analyzer.py"
+
+# (provider, model, $ per million input / output / cache-read tokens)
+MODELS = [
+    ("anthropic", "claude-opus-4-6", 5.0, 25.0, 0.5),
+    ("anthropic", "claude-sonnet-4-5-20250929", 3.0, 15.0, 0.3),
+    ("openrouter", "google/gemini-3-flash-preview", 0.5, 3.0, 0.05),
+    ("openrouter", "deepseek/deepseek-v3.2", 0.28, 0.42, 0.028),
+    ("openai", "gpt-4o-mini", 0.15, 0.6, 0.075),
+]
+AGENTS = ["main", "transcriber", "research", "ops", "news", "calendar"]
+WORDS = ("the meeting calendar invoice lunch tomorrow please check email draft send reply "
+         "summary transcript voice note budget report travel train Lausanne Geneva doc sheet").split()
+SESSION_BYTES = 4 * 1024 * 1024
+
+
+def parse_size(text):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def words(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def usage_block(rng, model):
+    _, _, p_in, p_out, p_cache = model
+    inp = rng.randint(3, 4000)
+    out = rng.randint(20, 2500)
+    cache_read = rng.choice((0, rng.randint(5000, 90000), rng.randint(5000, 90000)))
+    cache_write = rng.choice((0, 0, rng.randint(500, 8000)))
+    cost = {
+        "input": inp * p_in / 1e6,
+        "output": out * p_out / 1e6,
+        "cacheRead": cache_read * p_cache / 1e6,
+        "cacheWrite": cache_write * p_in * 1.25 / 1e6,
+    }
+    cost["total"] = sum(cost.values())
+    return {"input": inp, "output": out, "cacheRead": cache_read, "cacheWrite": cache_write,
+            "totalTokens": inp + out + cache_read + cache_write, "cost": cost}
+
+
+def session_lines(rng, start, target_bytes):
+    """Yield the lines of one session transcript of roughly target_bytes."""
+    session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    t = start
+    parent = None
+    model = rng.choice(MODELS)
+    written = 0
+
+    def entry(kind, **fields):
+        nonlocal parent, written
+        entry_id = f"{rng.getrandbits(32):08x}"
+        line = json.dumps({"type": kind, "id": entry_id, "parentId": parent, "timestamp": iso(t), **fields},
+                          separators=(",", ":"))
+        parent = entry_id
+        written += len(line) + 1
+        return line
+
+    line = json.dumps({"type": "session", "version": 3, "id": session_id, "timestamp": iso(t),
+                       "cwd": "/home/simon/gladys/openclaw/workspace"}, separators=(",", ":"))
+    written += len(line) + 1
+    yield line
+    yield entry("model_change", provider=model[0], modelId=model[1])
+
+    while written < target_bytes:
+        t += timedelta(seconds=rng.expovariate(1 / 900))
+        if rng.random() < 0.03:
+            model = rng.choice(MODELS)
+            yield entry("model_change", provider=model[0], modelId=model[1])
+        if rng.random() < 0.05:
+            yield entry("custom", customType="openclaw.cache-ttl", data={"ttl": 3600})
+
+        yield entry("message", message={"role": "user", "content": [
+            {"type": "text", "text": words(rng, rng.randint(5, 300))}], "timestamp": int(t.timestamp() * 1000)})
+
+        for _ in range(rng.choice((1, 1, 2, 3))):
+            t += timedelta(seconds=rng.uniform(1, 40))
+            content = [{"type": "text", "text": words(rng, rng.randint(5, 400))}]
+            if rng.random() < 0.4:
+                content.append({"type": "toolCall", "id": f"call_{rng.getrandbits(40):x}", "name": "exec",
+                                "arguments": {"command": "python3 list_emails.py --unread-only"}})
+            yield entry("message", message={
+                "role": "assistant", "content": content, "api": "messages", "provider": model[0],
+                "model": model[1], "usage": usage_block(rng, model), "stopReason": "stop",
+                "timestamp": int(t.timestamp() * 1000)})
+            if len(content) > 1:
+                yield entry("message", message={
+                    "role": "toolResult", "toolCallId": content[1]["id"], "toolName": "exec",
+                    "content": [{"type": "text", "text": words(rng, rng.randint(20, 1500))}],
+                    "timestamp": int(t.timestamp() * 1000)})
+
+        if rng.random() < 0.1:
+            zero = {"input": 0, "output": 0, "cacheRead": 0, "cacheWrite": 0, "totalTokens": 0,
+                    "cost": {"input": 0, "output": 0, "cacheRead": 0, "cacheWrite": 0, "total": 0}}
+            yield entry("message", message={
+                "role": "assistant", "content": [{"type": "text", "text": words(rng, 30)}],
+                "api": "openai-responses", "provider": "openclaw", "model": "delivery-mirror",
+                "usage": zero, "stopReason": "stop", "timestamp": int(t.timestamp() * 1000)})
+        if rng.random() < 0.002:
+            line = entry("message", message={"role": "assistant", "content": []})
+            yield line[:rng.randint(1, len(line) - 1)]
+
+
+def generate(data_dir, size, agents=4, days=120, seed=1):
+    """Write about `size` bytes of session transcripts under data_dir; returns the manifest."""
+    rng = random.Random(seed)
+    agents_dir = data_dir / "gladys" / "openclaw" / "agents"
+    shutil.rmtree(agents_dir, ignore_errors=True)
+    names = (AGENTS + [f"agent-{i}" for i in range(len(AGENTS), agents)])[:agents]
+    now = datetime.now(timezone.utc)
+
+    files = lines = written = 0
+    while written < size:
+        agent = names[files % len(names)]
+        sessions_dir = agents_dir / agent / "sessions"
+        sessions_dir.mkdir(parents=True, exist_ok=True)
+        target = min(size - written, int(SESSION_BYTES * rng.uniform(0.25, 1.75)))
+        start = now - timedelta(days=rng.uniform(0, days))
+        path = sessions_dir / f"{uuid.UUID(int=rng.getrandbits(128))}.jsonl"
+        with open(path, "w") as f:
+            for line in session_lines(rng, start, target):
+                f.write(line + "\n")
+                lines += 1
+        written += path.stat().st_size
+        files += 1
+
+    manifest = {"bytes": written, "files": files, "lines": lines, "agents": len(names), "days": days, "seed": seed}
+    with open(data_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# --- Phases (each runs in a fresh process with HOME pointing at the dataset) ---------
+
+def load_analyzer():
+    spec = importlib.util.spec_from_file_location("cost_analyzer", ANALYZER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["cost_analyzer"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def reset_outputs(ca):
+    shutil.rmtree(ca.OUTPUT_DIR, ignore_errors=True)
+
+
+def phase_parse(ca, days, jobs, _):
+    reset_outputs(ca)
+    return ca.parse_sessions(days, 1, None)
+
+
+def phase_parse_parallel(ca, days, jobs, _):
+    reset_outputs(ca)
+    return ca.parse_sessions(days, jobs, None)
+
+
+def phase_index_cold(ca, days, jobs, _):
+    reset_outputs(ca)
+    return ca.parse_sessions(days, jobs, ca.INDEX_PATH)
+
+
+def phase_index_warm(ca, days, jobs, _):
+    return ca.parse_sessions(days, jobs, ca.INDEX_PATH)
+
+
+def phase_incremental_cold(ca, days, jobs, _):
+    return ca.parse_sessions_incremental(days, ca.STATE_PATH, jobs)
+
+
+def phase_incremental_warm(ca, days, jobs, _):
+    return ca.parse_sessions_incremental(days, ca.STATE_PATH, jobs)
+
+
+def phase_print_summary(ca, days, jobs, parsed):
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        ca.print_summary(*parsed, days)
+
+
+def phase_generate_png(ca, days, jobs, parsed):
+    daily, by_model, _ = parsed
+    return ca.generate_png(daily, by_model, days)
+
+
+def phase_generate_svg(ca, days, jobs, parsed):
+    daily, by_model, _ = parsed
+    return ca.generate_svg(daily, by_model, days)
+
+
+def phase_sparkline(ca, days, jobs, parsed):
+    return ca.sparkline(parsed[0])
+
+
+# name -> (function, reads the whole dataset)
+PHASES = {
+    "parse": (phase_parse, True),
+    "parse_parallel": (phase_parse_parallel, True),
+    "index_cold": (phase_index_cold, True),
+    "index_warm": (phase_index_warm, False),
+    "incremental_cold": (phase_incremental_cold, True),
+    "incremental_warm": (phase_incremental_warm, False),
+    "print_summary": (phase_print_summary, False),
+    "generate_png": (phase_generate_png, False),
+    "generate_svg": (phase_generate_svg, False),
+    "sparkline": (phase_sparkline, False),
+}
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def run_phase(name, days, jobs, parsed):
+    # The analyzer is loaded under a module name its own pool workers could
+    # not re-import, so they have to be forked rather than spawned.
+    multiprocessing.set_start_method("fork", force=True)
+    ca = load_analyzer()
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    result = PHASES[name][0](ca, days, jobs, parsed)
+    wall = time.perf_counter() - t0
+    if isinstance(result, tuple):
+        result = tuple(dict(part) for part in result)
+    else:
+        result = None
+    stats = {"wall_s": wall, "peak_rss_mb": peak_rss_mb(), "baseline_rss_mb": base,
+             "worker_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)}
+    return stats, result
+
+
+def run(data_dir, days, jobs, phases):
+    manifest = json.loads((data_dir / "manifest.json").read_text())
+    os.environ["HOME"] = str(data_dir)
+    ctx = multiprocessing.get_context("spawn")
+
+    results = {}
+    parsed = None
+    for name in phases:
+        if name == "parse_parallel" and jobs <= 1:
+            continue
+        # A fresh single-worker executor per phase keeps peak RSS per phase
+        # (its workers, unlike multiprocessing.Pool's, may start their own pools).
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            try:
+                stats, result = pool.submit(run_phase, name, days, jobs, parsed).result()
+            except Exception as e:  # e.g. matplotlib missing for generate_png
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"  {name:18s} failed: {e}")
+                continue
+        if result is not None and parsed is None:
+            parsed = result
+        if PHASES[name][1]:
+            stats["mb_per_s"] = manifest["bytes"] / 1e6 / stats["wall_s"]
+            stats["lines_per_s"] = manifest["lines"] / stats["wall_s"]
+        results[name] = stats
+        rate = f"{stats['mb_per_s']:8.1f} MB/s {stats['lines_per_s']:11,.0f} lines/s" if "mb_per_s" in stats else ""
+        print(f"  {name:18s} {stats['wall_s']:8.3f}s  peak RSS {stats['peak_rss_mb']:7.1f} MB  {rate}")
+    return manifest, results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "-C", str(SCRIPT_DIR), "describe", "--always", "--dirty"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print per-phase changes; throughput where the phase has it, so dataset size cancels out."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nCompared to {baseline_path} ({baseline.get('revision') or 'unknown revision'}):")
+    same_input = baseline.get("dataset") == results["dataset"] and baseline.get("days") == results["days"]
+    if not same_input:
+        print("  (different dataset or --days: only throughput figures are comparable)")
+    for name, stats in results["phases"].items():
+        old = baseline.get("phases", {}).get(name)
+        if not old or "wall_s" not in old or "wall_s" not in stats:
+            continue
+        if "mb_per_s" in stats and "mb_per_s" in old:
+            speed = stats["mb_per_s"] / old["mb_per_s"] - 1
+            change = f"throughput {speed:+7.1%}"
+        elif same_input:
+            speed = old["wall_s"] / stats["wall_s"] - 1 if stats["wall_s"] else 0
+            change = f"speed      {speed:+7.1%}"
+        else:
+            continue
+        rss = stats["peak_rss_mb"] / old["peak_rss_mb"] - 1 if old["peak_rss_mb"] else 0
+        flag = "  REGRESSION" if speed < -0.10 or rss > 0.25 else ""
+        print(f"  {name:18s} {change}  peak RSS {rss:+7.1%}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OpenClaw cost analyzer on synthetic transcripts")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Write a synthetic dataset")
+    bench = sub.add_parser("run", help="Time analyzer phases (generates the dataset first if missing)")
+    for p in (gen, bench):
+        p.add_argument("--data", type=Path, default=Path("/tmp/cost-bench"), help="Dataset directory")
+        p.add_argument("--size", help="Dataset size, e.g. 1M, 500M, 2G (default: 100M, or keep the existing dataset)")
+        p.add_argument("--agents", type=int, default=4, help="Number of agents (default: 4)")
+        p.add_argument("--span-days", type=int, default=120, help="History spread in days (default: 120)")
+        p.add_argument("--seed", type=int, default=1)
+    bench.add_argument("--days", type=int, default=30, help="Report window passed to the analyzer (default: 30)")
+    bench.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Workers for parallel phases")
+    bench.add_argument("--phases", default=",".join(PHASES), help="Comma-separated phases to run")
+    bench.add_argument("--output", type=Path, help="Write results as JSON")
+    bench.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    manifest_path = args.data / "manifest.json"
+    existing = json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+    size = parse_size(args.size or "100M")
+    stale = existing is None or (args.size and not size <= existing["bytes"] < size + SESSION_BYTES * 2)
+    if args.command == "generate" or stale:
+        t0 = time.perf_counter()
+        existing = generate(args.data, size, args.agents, args.span_days, args.seed)
+        print(f"Generated {existing['bytes'] / 1e6:.1f} MB in {existing['files']} files "
+              f"({existing['lines']:,} lines) in {time.perf_counter() - t0:.1f}s")
+    if args.command == "generate":
+        return
+
+    phases = [p for p in args.phases.split(",") if p]
+    unknown = [p for p in phases if p not in PHASES]
+    if unknown:
+        parser.error(f"unknown phase(s): {', '.join(unknown)}")
+
+    print(f"Benchmark: {existing['bytes'] / 1e6:.1f} MB, {existing['files']} files, "
+          f"--days {args.days}, --jobs {args.jobs}")
+    manifest, phase_results = run(args.data, args.days, args.jobs, phases)
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "days": args.days,
+        "jobs": args.jobs,
+        "dataset": manifest,
+        "phases": phase_results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults saved to: {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
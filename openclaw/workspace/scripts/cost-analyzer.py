@@ -1,78 +1,1064 @@
 #!/usr/bin/env python3
 """
 OpenClaw Cost Analyzer
-Parses session JSONL files, prints a text summary, and generates a PNG chart.
+Parses session JSONL files (live, rotated or gzip/zstd archived), prints a text
+summary, and generates a PNG chart.
 
 Usage:
   python3 cost-analyzer.py              # last 30 days
   python3 cost-analyzer.py --days 7     # last 7 days
-  python3 cost-analyzer.py --png        # also generate PNG chart
+  python3 cost-analyzer.py --png        # also generate PNG chart (imports matplotlib)
+  python3 cost-analyzer.py --svg --sparkline  # lightweight SVG chart + Unicode sparkline
+  python3 cost-analyzer.py --incremental  # only parse what was appended since last run
+  python3 cost-analyzer.py --jobs 0     # parse files in parallel on all cores
+  python3 cost-analyzer.py --bench      # compare parser throughput (lines/sec)
+  python3 cost-analyzer.py --follow --hook "notify.sh"  # live status + budget alerts
+  python3 cost-analyzer.py --group-by hour,model  # ad-hoc breakdown from the columnar store
+  python3 cost-analyzer.py --cache-report  # prompt-cache hit rates and misses per session/model
 """
 
+import gzip
+import hashlib
+import html
+import io
 import json
+import math
+import os
+import re
 import sys
+import warnings
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 import argparse
+import bisect
+import ctypes
+import ctypes.util
+import select
+import shlex
+import struct
+import subprocess
+import time
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_DECODER = "orjson"
+except ImportError:
+    json_loads = json.loads
+    JSON_DECODER = "json"
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 AGENTS_DIR = Path.home() / "gladys" / "openclaw" / "agents"
 OUTPUT_DIR = Path.home() / "gladys" / "openclaw" / "workspace" / "output"
+STATE_PATH = OUTPUT_DIR / "cost-state.json"
+STATE_VERSION = 1
+INDEX_PATH = OUTPUT_DIR / "cost-index.json"
+INDEX_VERSION = 1
+HEAD_BYTES = 1024
+CHUNK_BYTES = 64 * 1024 * 1024
+ARCHIVE_BLOCK_BYTES = 1024 * 1024
+SESSION_FILE = re.compile(r"\.jsonl(\.\d+)?(\.gz|\.zst)?$")
+STATUS_PATH = OUTPUT_DIR / "cost-status.json"
+COLUMNS_DIR = OUTPUT_DIR / "cost-columns"
+COLUMNS_VERSION = 1
+FOLLOW_SWEEP_SECONDS = 300
 
 
-def parse_sessions(days):
-    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+def empty_day():
+    return {"cost": 0.0, "input": 0, "output": 0, "cache_read": 0, "models": {}}
 
-    daily = defaultdict(lambda: {"cost": 0.0, "input": 0, "output": 0, "cache_read": 0})
-    by_model = defaultdict(float)
-    by_agent = defaultdict(float)
 
+def usage_entry(line, fast=True):
+    """Decode a JSONL line into (timestamp, model, usage) if it is a usage-bearing message.
+
+    The fast path skips lines that cannot be usage-bearing messages before
+    decoding them. fast=False is the original decode-everything path, kept
+    for --bench.
+    """
+    if fast and (b'"usage"' not in line or b'"message"' not in line):
+        return None
+
+    try:
+        entry = json_loads(line) if fast else json.loads(line)
+    except ValueError:
+        return None
+
+    if entry.get("type") != "message":
+        return None
+
+    ts = entry.get("timestamp")
+    msg = entry.get("message", {})
+    usage = msg.get("usage")
+    model = msg.get("model")
+
+    if not ts or not usage or not model or model == "delivery-mirror":
+        return None
+    return ts, model, usage
+
+
+def entry_cost(usage):
+    if isinstance(usage.get("cost"), dict):
+        return usage["cost"].get("total", 0.0) or 0.0
+    return 0.0
+
+
+def record_line(days, line, cutoff=None, cutoff_day=None, fast=True):
+    """Add one JSONL line's usage to a {date: day bucket} dict, if it has any.
+
+    The fast path takes the day straight from the timestamp prefix instead
+    of building a datetime (only UTC timestamps on the cutoff day are fully
+    parsed).
+
+    Returns the entry's UTC day if it is a usage-bearing message (whether or
+    not it falls inside the window), else None.
+    """
+    parsed = usage_entry(line, fast)
+    if parsed is None:
+        return None
+    ts, model, usage = parsed
+
+    if fast and ts.endswith("Z"):
+        date_str = utc_day = ts[:10]
+        if cutoff and date_str <= cutoff_day:
+            if date_str < cutoff_day or datetime.fromisoformat(ts.replace("Z", "+00:00")) < cutoff:
+                return utc_day
+    else:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        date_str = dt.strftime("%Y-%m-%d")
+        utc_day = dt.astimezone(timezone.utc).strftime("%Y-%m-%d") if dt.utcoffset() else date_str
+        if cutoff and dt < cutoff:
+            return utc_day
+
+    cost = entry_cost(usage)
+    day = days.get(date_str)
+    if day is None:
+        day = days[date_str] = empty_day()
+    day["cost"] += cost
+    day["input"] += usage.get("input", 0) or 0
+    day["output"] += usage.get("output", 0) or 0
+    day["cache_read"] += usage.get("cacheRead", 0) or 0
+    day["models"][model] = day["models"].get(model, 0.0) + cost
+    return utc_day
+
+
+def scan_file(path, start=0, end=None, cutoff=None, hold_partial=False, fast=True):
+    """Parse the lines of a session file that start in the byte range [start, end).
+
+    Returns (days, pos, span) where `pos` is the offset just past the last
+    line consumed and `span` describes the usage-bearing lines seen, for the
+    time-range index: min/max UTC day, "marks" ([day, offset] at each line
+    that raised the running max day) and "end", the offset past the last
+    complete line. With hold_partial, a trailing line without a newline
+    (still being written) is left for the next run.
+    """
+    days = {}
+    span = {"min": None, "max": None, "marks": [], "end": start}
+    cutoff_day = cutoff.astimezone(timezone.utc).strftime("%Y-%m-%d") if cutoff else None
+    with open_session(path, max(start - 1, 0)) as f:
+        pos = start
+        if start:
+            # A line belongs to the range it starts in: skip the rest of a
+            # line that began before `start`.
+            pos += len(f.readline()) - 1
+            span["end"] = pos
+        for line in f:
+            if end is not None and pos >= end:
+                break
+            if hold_partial and not line.endswith(b"\n"):
+                break
+            utc_day = record_line(days, line, cutoff, cutoff_day, fast)
+            if utc_day is not None:
+                if span["max"] is None or utc_day > span["max"]:
+                    span["max"] = utc_day
+                    span["marks"].append([utc_day, pos])
+                if span["min"] is None or utc_day < span["min"]:
+                    span["min"] = utc_day
+            pos += len(line)
+            if line.endswith(b"\n"):
+                span["end"] = pos
+    return days, pos, span
+
+
+def scan_task(task):
+    """Process-pool entry point: task is a tuple of scan_file() arguments."""
+    return scan_file(*task)
+
+
+def run_scans(tasks, jobs=1):
+    """Run scan_file() over `tasks`, in a process pool when jobs > 1.
+
+    Results come back in task order.
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        return [scan_task(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        return list(pool.map(scan_task, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+
+def split_ranges(size, jobs, offset=0):
+    """Split bytes [offset, size) of a file into CHUNK_BYTES-sized ranges for the pool."""
+    if jobs <= 1 or size - offset <= CHUNK_BYTES:
+        return [(offset, None)]
+    starts = range(offset, size, CHUNK_BYTES)
+    return [(start, start + CHUNK_BYTES) for start in starts[:-1]] + [(starts[-1], None)]
+
+
+def merge_days(dst, src):
+    for date, b in src.items():
+        d = dst.get(date)
+        if d is None:
+            d = dst[date] = empty_day()
+        d["cost"] += b["cost"]
+        d["input"] += b["input"]
+        d["output"] += b["output"]
+        d["cache_read"] += b["cache_read"]
+        for model, cost in b["models"].items():
+            d["models"][model] = d["models"].get(model, 0.0) + cost
+    return dst
+
+
+def iter_session_files():
+    """Yield (agent_name, path) for every session transcript, archived ones included."""
     for agent_dir in AGENTS_DIR.iterdir():
         if not agent_dir.is_dir():
             continue
-        agent_name = agent_dir.name
         sessions_dir = agent_dir / "sessions"
         if not sessions_dir.exists():
             continue
+        for jsonl_file in sessions_dir.glob("*.jsonl*"):
+            if not SESSION_FILE.search(jsonl_file.name):
+                continue
+            if jsonl_file.suffix == ".zst" and zstandard is None:
+                warnings.warn("skipping .jsonl.zst session archives: the zstandard package is not installed")
+                continue
+            yield agent_dir.name, jsonl_file
+
+
+# --- Archived sessions -------------------------------------------------------------
+#
+# Besides live "<session>.jsonl" transcripts, sessions may be rotated
+# ("<session>.jsonl.1") and/or compressed (".jsonl.gz", ".jsonl.zst").
+# Rotated plain files are handled exactly like live ones. Compressed
+# archives are streamed through the decompressor in ARCHIVE_BLOCK_BYTES
+# blocks; their offsets count decompressed bytes, so resuming from an
+# offset still decompresses (but no longer parses) what comes before it.
+# Archives are treated as written once: any change to the compressed file
+# (size/mtime) rebuilds its record, and "length" records the decompressed
+# size once it has been read to the end.
+
+def session_name(path):
+    """Session id of a transcript, without the .jsonl/rotation/compression suffixes."""
+    return path.name[:path.name.index(".jsonl")]
+
 
-        for jsonl_file in sessions_dir.glob("*.jsonl"):
-            with open(jsonl_file) as f:
-                for line in f:
-                    try:
-                        entry = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-
-                    if entry.get("type") != "message":
-                        continue
-
-                    ts = entry.get("timestamp")
-                    msg = entry.get("message", {})
-                    usage = msg.get("usage")
-                    model = msg.get("model")
-
-                    if not ts or not usage or not model or model == "delivery-mirror":
-                        continue
-
-                    dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                    if dt < cutoff:
-                        continue
-
-                    cost = 0.0
-                    if isinstance(usage.get("cost"), dict):
-                        cost = usage["cost"].get("total", 0.0) or 0.0
-
-                    date_str = dt.strftime("%Y-%m-%d")
-                    daily[date_str]["cost"] += cost
-                    daily[date_str]["input"] += usage.get("input", 0) or 0
-                    daily[date_str]["output"] += usage.get("output", 0) or 0
-                    daily[date_str]["cache_read"] += usage.get("cacheRead", 0) or 0
-                    by_model[model] += cost
-                    by_agent[agent_name] += cost
+def is_archive(path):
+    return path.suffix in (".gz", ".zst")
+
+
+def open_session(path, offset=0):
+    """Open a session file for binary line reading, positioned at decompressed `offset`."""
+    if not is_archive(path):
+        f = open(path, "rb")
+        f.seek(offset)
+        return f
+    if path.suffix == ".gz":
+        raw = gzip.GzipFile(path, "rb")
+    else:
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_size=ARCHIVE_BLOCK_BYTES)
+    f = io.BufferedReader(raw, ARCHIVE_BLOCK_BYTES)
+    while offset > 0:
+        skipped = len(f.read(min(offset, ARCHIVE_BLOCK_BYTES)))
+        if not skipped:
+            break
+        offset -= skipped
+    return f
+
+
+def content_size(rec, st):
+    """Bytes of (decompressed) content in the file a record describes; inf if not yet known."""
+    if "archive" not in rec:
+        return st.st_size
+    return rec.get("length", math.inf)
+
+
+def summarize(partials, cutoff):
+    """Reduce (agent_name, days) partials into daily, by_model and by_agent."""
+    cutoff_day = cutoff.strftime("%Y-%m-%d")
+
+    daily = defaultdict(lambda: {"cost": 0.0, "input": 0, "output": 0, "cache_read": 0})
+    by_model = defaultdict(float)
+    by_agent = defaultdict(float)
+
+    for agent_name, days in partials:
+        for date_str, b in days.items():
+            if date_str < cutoff_day:
+                continue
+            d = daily[date_str]
+            d["cost"] += b["cost"]
+            d["input"] += b["input"]
+            d["output"] += b["output"]
+            d["cache_read"] += b["cache_read"]
+            for model, cost in b["models"].items():
+                by_model[model] += cost
+            by_agent[agent_name] += b["cost"]
 
     return daily, by_model, by_agent
 
 
+def parse_sessions(days, jobs=1, index_path=INDEX_PATH):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    cutoff_day = cutoff.strftime("%Y-%m-%d")
+    index = load_state(index_path, INDEX_VERSION) if index_path else None
+
+    files = {}
+    owners = []
+    tasks = []
+    for agent_name, path in iter_session_files():
+        st = path.stat()
+        offset = 0
+        if index is not None:
+            rec = files[str(path)] = index_record(index["files"].get(str(path)), path, st)
+            offset = entry_offset(rec, cutoff_day)
+            if offset >= content_size(rec, st):
+                continue
+        ranges = [(offset, None)] if is_archive(path) else split_ranges(st.st_size, jobs, offset)
+        for start, end in ranges:
+            owners.append((agent_name, path))
+            tasks.append((path, start, end, cutoff))
+
+    results = run_scans(tasks, jobs)
+
+    if index is not None:
+        for (_, path), (_, pos, span) in zip(owners, results):
+            rec = files[str(path)]
+            merge_span(rec, span)
+            if "archive" in rec:
+                rec["offset"] = rec["length"] = pos
+        for path_key, rec in files.items():
+            refresh_head(rec, Path(path_key))
+        index["files"] = files
+        save_state(index, index_path)
+
+    return summarize(((agent_name, days) for (agent_name, _), (days, _, _) in zip(owners, results)), cutoff)
+
+
+# --- Time-range index -----------------------------------------------------------
+#
+# The sidecar index records, per session file, the min/max UTC day of its
+# usage-bearing messages over the bytes indexed so far ("offset"), plus
+# "marks": [day, offset] pairs meaning every usage line before `offset` is
+# from an earlier day. A file whose indexed max day is before the cutoff
+# day is never opened unless it changed (size/mtime); a file straddling
+# the cutoff is entered at the last mark not after the cutoff day.
+
+def index_record(rec, path, st):
+    """Return the index record for `path`, reset if the file was replaced or truncated."""
+    if rec is not None and (rec["dev"], rec["ino"], rec["size"], rec["mtime"]) == (
+            st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns):
+        return rec
+    if rec is None or not same_file(rec, path, st):
+        rec = new_record(path, st, min=None, max=None, marks=[])
+    rec["size"] = st.st_size
+    rec["mtime"] = st.st_mtime_ns
+    return rec
+
+
+def entry_offset(rec, cutoff_day):
+    """Byte offset from which a file must be scanned to see every line on or after cutoff_day."""
+    if rec["max"] is None or rec["max"] < cutoff_day:
+        return rec["offset"]
+    offset = 0
+    for day, mark in rec["marks"]:
+        if day > cutoff_day:
+            break
+        offset = mark
+    return offset
+
+
+def merge_span(rec, span):
+    """Fold a scan_file() span into an index record (spans must be merged in file order)."""
+    for day, mark in span["marks"]:
+        if rec["max"] is None or day > rec["max"]:
+            rec["marks"].append([day, mark])
+            rec["max"] = day
+    if span["min"] is not None and (rec["min"] is None or span["min"] < rec["min"]):
+        rec["min"] = span["min"]
+    rec["offset"] = max(rec["offset"], span["end"])
+
+
+# --- Incremental mode -----------------------------------------------------------
+#
+# The state file keeps, per session file, its identity (device, inode and a
+# hash of its first bytes), the byte offset parsed so far and the per-day
+# aggregates of everything before that offset. A run only parses bytes
+# appended since the last one. A file that shrank or was replaced is rebuilt
+# from scratch; files that disappeared are dropped.
+#
+# Aggregates are kept per UTC day, so --days windows start at the beginning
+# of the cutoff day rather than at the exact cutoff time.
+
+def file_head(path, length):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def load_state(state_path, version=STATE_VERSION):
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": version, "files": {}}
+    if state.get("version") != version:
+        return {"version": version, "files": {}}
+    return state
+
+
+def save_state(state, state_path):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_name(state_path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp, state_path)
+
+
+def same_file(rec, path, st):
+    """True if `rec` still describes the file at `path` (no truncation/rotation)."""
+    if rec["dev"] != st.st_dev or rec["ino"] != st.st_ino:
+        return False
+    if "archive" in rec:
+        return rec["archive"] == [st.st_size, st.st_mtime_ns]
+    if st.st_size < rec["offset"]:
+        return False
+    return file_head(path, rec["head_len"]) == rec["head"]
+
+
+def new_record(path, st, **fields):
+    if is_archive(path):
+        fields["archive"] = [st.st_size, st.st_mtime_ns]
+    return {"dev": st.st_dev, "ino": st.st_ino, "head_len": 0,
+            "head": file_head(path, 0), "offset": 0, **fields}
+
+
+def refresh_head(rec, path):
+    """Extend the identity hash to HEAD_BYTES once the file is long enough."""
+    if rec["head_len"] < HEAD_BYTES and rec["offset"] > rec["head_len"]:
+        rec["head_len"] = min(rec["offset"], HEAD_BYTES)
+        rec["head"] = file_head(path, rec["head_len"])
+
+
+def file_record(rec, agent_name, path, st):
+    """Return `rec` if it still matches the file, else a fresh record to rebuild it."""
+    if rec is None or not same_file(rec, path, st):
+        rec = new_record(path, st, days={})
+    rec["agent"] = agent_name
+    return rec
+
+
+def update_state(state_path=STATE_PATH, jobs=1):
+    """Catch the incremental state up with the session files; returns its file records."""
+    state = load_state(state_path)
+    old_files = state["files"]
+    files = {}
+    pending = []
+
+    for agent_name, path in iter_session_files():
+        key = str(path)
+        st = path.stat()
+        rec = files[key] = file_record(old_files.get(key), agent_name, path, st)
+        if content_size(rec, st) > rec["offset"]:
+            pending.append((rec, path))
+
+    tasks = [(path, rec["offset"], None, None, "archive" not in rec) for rec, path in pending]
+    for (rec, path), (new_days, offset, _) in zip(pending, run_scans(tasks, jobs)):
+        merge_days(rec["days"], new_days)
+        rec["offset"] = offset
+        if "archive" in rec:
+            rec["length"] = offset
+        refresh_head(rec, path)
+
+    state["files"] = files
+    save_state(state, state_path)
+    return files
+
+
+def parse_sessions_incremental(days, state_path=STATE_PATH, jobs=1):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    files = update_state(state_path, jobs)
+    return summarize(((r["agent"], r["days"]) for r in files.values()), cutoff)
+
+
+# --- Follow mode -------------------------------------------------------------------
+#
+# Starts from the incremental state (so history is parsed at most once), then
+# only tails bytes appended to session files. Memory holds the current
+# month's day buckets, an hour of per-minute costs for the burn rate, and one
+# offset per session file.
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal ctypes inotify wrapper; raises OSError where inotify is unavailable."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+
+    def watch(self, directory, mask):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd >= 0:
+            self.dirs[wd] = Path(directory)
+
+    def wait(self, timeout):
+        """Return the paths touched within `timeout` seconds, or None if events were lost."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        paths = set()
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, name_len = INOTIFY_EVENT.unpack_from(data, pos)
+            pos += INOTIFY_EVENT.size
+            name = data[pos:pos + name_len].rstrip(b"\0")
+            pos += name_len
+            if mask & IN_Q_OVERFLOW or wd not in self.dirs:
+                return None
+            paths.add(self.dirs[wd] / os.fsdecode(name))
+        return paths
+
+
+def add_cost(totals, new_days, now):
+    """Fold freshly appended usage into the rolling aggregates."""
+    month = totals["month"]
+    added = 0.0
+    for date_str, b in new_days.items():
+        added += b["cost"]
+        if date_str.startswith(month):
+            merge_days(totals["days"], {date_str: b})
+    if added:
+        minute = int(now.timestamp()) // 60
+        burn = totals["burn"]
+        if burn and burn[-1][0] == minute:
+            burn[-1][1] += added
+        else:
+            burn.append([minute, added])
+
+
+def tail_file(tracked, totals, path, month_start, now):
+    """Parse whatever was appended to `path` since it was last seen."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        tracked.pop(str(path), None)
+        return
+    rec = tracked.get(str(path))
+    if rec is None or rec["ino"] != st.st_ino or st.st_size < rec["offset"]:
+        rec = tracked[str(path)] = {"ino": st.st_ino, "offset": 0}
+    if st.st_size > rec["offset"]:
+        new_days, rec["offset"], _ = scan_file(path, rec["offset"], cutoff=month_start, hold_partial=True)
+        add_cost(totals, new_days, now)
+
+
+def follow_status(totals, budget, now):
+    month_days = totals["days"]
+    today = month_days.get(now.strftime("%Y-%m-%d"), empty_day())
+    mtd = sum(d["cost"] for d in month_days.values())
+    by_model = defaultdict(float)
+    for d in month_days.values():
+        for model, cost in d["models"].items():
+            by_model[model] += cost
+
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    elapsed = (now - month_start) / (next_month - month_start)
+    hour_ago = int(now.timestamp()) // 60 - 60
+    burn_rate = sum(cost for minute, cost in totals["burn"] if minute > hour_ago)
+
+    return {
+        "updated": now.isoformat(timespec="seconds"),
+        "today": {"date": now.strftime("%Y-%m-%d"), "cost": round(today["cost"], 4),
+                  "tokens": today["input"] + today["output"] + today["cache_read"]},
+        "month": {"month": totals["month"], "cost": round(mtd, 4), "budget": budget,
+                  "budget_used": round(mtd / budget, 4) if budget else None,
+                  "projected": round(mtd / elapsed, 2) if elapsed else None},
+        "by_model": {m: round(c, 4) for m, c in sorted(by_model.items(), key=lambda x: -x[1])},
+        "burn_rate_per_hour": round(burn_rate, 4),
+        "alerts_fired": sorted(totals["fired"]),
+    }
+
+
+def fire_alert(hook, kind, message, status_path):
+    print(f"[{datetime.now(timezone.utc).isoformat(timespec='seconds')}] ALERT {kind}: {message}", flush=True)
+    if hook:
+        env = dict(os.environ, COST_ALERT=kind, COST_ALERT_MESSAGE=message, COST_STATUS=str(status_path))
+        subprocess.Popen(shlex.split(hook), env=env)
+
+
+def check_alerts(totals, status, args):
+    month = status["month"]
+    if args.budget:
+        for level in args.alert_levels:
+            key = f"budget:{level:g}"
+            if month["cost"] >= args.budget * level and key not in totals["fired"]:
+                totals["fired"].add(key)
+                fire_alert(args.hook, "budget",
+                           f"${month['cost']:.2f} spent in {month['month']}, "
+                           f"{month['cost'] / args.budget:.0%} of the ${args.budget:g} budget", args.status)
+
+    rate = status["burn_rate_per_hour"]
+    if args.burn_limit and rate >= args.burn_limit:
+        if not totals["burning"]:
+            totals["burning"] = True
+            fire_alert(args.hook, "burn-rate",
+                       f"${rate:.2f} spent in the last hour (limit ${args.burn_limit:g}/h)", args.status)
+    else:
+        totals["burning"] = False
+
+
+def follow(args, jobs=1):
+    """Tail session files forever, keeping today/month-to-date totals in a status file."""
+    now = datetime.now(timezone.utc)
+    totals = {"month": now.strftime("%Y-%m"), "days": {}, "burn": deque(maxlen=60),
+              "fired": set(), "burning": False}
+
+    tracked = {}
+    for key, rec in update_state(args.state, jobs).items():
+        tracked[key] = {"ino": rec["ino"], "offset": rec["offset"]}
+        add_cost(totals, {d: b for d, b in rec["days"].items() if d.startswith(totals["month"])}, now)
+    totals["burn"].clear()
+
+    try:
+        with open(args.status) as f:
+            previous = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        previous = {}
+    if previous.get("month", {}).get("month") == totals["month"]:
+        totals["fired"].update(previous.get("alerts_fired", []))
+
+    try:
+        watcher = None if args.poll else Inotify()
+    except OSError:
+        watcher = None
+    print(f"Following {len(tracked)} session files ({'inotify' if watcher else 'polling'}), "
+          f"status: {args.status}", flush=True)
+
+    # time.monotonic() can be small (it counts from boot), so "never swept" is -inf, not 0
+    last_sweep = -math.inf
+    while True:
+        changed = None
+        if watcher:
+            changed = watcher.wait(args.interval)
+        else:
+            time.sleep(args.interval)
+
+        now = datetime.now(timezone.utc)
+        if now.strftime("%Y-%m") != totals["month"]:
+            totals.update(month=now.strftime("%Y-%m"), days={}, fired=set())
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        if changed is None or time.monotonic() - last_sweep > FOLLOW_SWEEP_SECONDS:
+            # Full stat sweep: picks up new agents/files and anything inotify missed.
+            last_sweep = time.monotonic()
+            # Archives are complete when they appear; only live transcripts are tailed.
+            paths = [path for _, path in iter_session_files() if path.suffix == ".jsonl"]
+            for key in set(tracked) - {str(p) for p in paths}:
+                del tracked[key]
+            if watcher:
+                watcher.watch(AGENTS_DIR, IN_CREATE | IN_MOVED_TO)
+                for agent_dir in AGENTS_DIR.iterdir():
+                    if (agent_dir / "sessions").is_dir():
+                        watcher.watch(agent_dir / "sessions", IN_MODIFY | IN_CLOSE_WRITE | IN_CREATE | IN_MOVED_TO)
+        else:
+            paths = [p for p in changed if p.suffix == ".jsonl"]
+            if any(p.parent == AGENTS_DIR for p in changed):
+                last_sweep = -math.inf
+
+        for path in paths:
+            tail_file(tracked, totals, path, month_start, now)
+
+        status = follow_status(totals, args.budget, now)
+        check_alerts(totals, status, args)
+        status["alerts_fired"] = sorted(totals["fired"])
+        save_state(status, args.status)
+
+
+# --- Columnar store ------------------------------------------------------------------
+#
+# One row per usage-bearing message, stored as one raw little-endian array
+# file per column (memory-mapped for queries). agent/model/session are
+# dictionary-encoded; the dictionaries, row count and per-file parse offsets
+# live in meta.json. Rows of deleted session files are kept, so cost history
+# survives transcript cleanup; a truncated or replaced file has its rows
+# dropped and is re-read. Rows are keyed by session, not file: when a session
+# gains a file (rotated or compressed) or loses one while others remain, all
+# of its rows are dropped and rebuilt from its current files so nothing is
+# counted twice.
+
+COLUMNS = {
+    "ts": "<i8", "agent": "<u2", "model": "<u2", "session": "<u4",
+    "input": "<i8", "output": "<i8", "cache_read": "<i8", "cost": "<f8",
+}
+GROUP_KEYS = ("hour", "day", "month", "agent", "model", "session")
+
+
+def scan_rows(path, start=0, hold_partial=True):
+    """Return (rows, pos): usage rows from the lines after `start`.
+
+    With hold_partial, a trailing line without a newline is left for the next update.
+    """
+    rows = []
+    pos = start
+    with open_session(path, start) as f:
+        for line in f:
+            if hold_partial and not line.endswith(b"\n"):
+                break
+            pos += len(line)
+            parsed = usage_entry(line)
+            if parsed is None:
+                continue
+            ts, model, usage = parsed
+            rows.append((int(datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()), model,
+                         usage.get("input", 0) or 0, usage.get("output", 0) or 0,
+                         usage.get("cacheRead", 0) or 0, entry_cost(usage)))
+    return rows, pos
+
+
+def open_columns(store_dir, rows):
+    import numpy as np
+
+    if not rows:
+        return {name: np.zeros(0, dtype) for name, dtype in COLUMNS.items()}
+    return {name: np.memmap(store_dir / f"{name}.bin", dtype, mode="r", shape=(rows,))
+            for name, dtype in COLUMNS.items()}
+
+
+def drop_sessions(store_dir, meta, codes):
+    """Rewrite the columns without the rows of the given session codes."""
+    import numpy as np
+
+    cols = open_columns(store_dir, meta["rows"])
+    keep = ~np.isin(cols["session"], list(codes))
+    for name in COLUMNS:
+        kept = np.asarray(cols[name][keep])
+        kept.tofile(store_dir / f"{name}.tmp")
+        os.replace(store_dir / f"{name}.tmp", store_dir / f"{name}.bin")
+    meta["rows"] = int(keep.sum())
+
+
+def update_columns(store_dir):
+    """Append rows for everything written to the session files since the last update."""
+    import numpy as np
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    meta = load_state(store_dir / "meta.json", COLUMNS_VERSION)
+    meta.setdefault("rows", 0)
+    for name in ("agent", "model", "session"):
+        meta.setdefault(name, [])
+    codes = {name: {v: i for i, v in enumerate(meta[name])} for name in ("agent", "model", "session")}
+
+    def code(name, value):
+        if value not in codes[name]:
+            codes[name][value] = len(meta[name])
+            meta[name].append(value)
+        return codes[name][value]
+
+    old_files = meta["files"]
+    known_sessions = len(meta["session"])
+    files = {}
+    found = []
+    stale = set()
+    for agent_name, path in iter_session_files():
+        key = str(path)
+        st = path.stat()
+        rec = old_files.get(key)
+        if rec is not None and not same_file(rec, path, st):
+            stale.add(rec["session"])
+            rec = None
+        if rec is None:
+            rec = new_record(path, st, session=code("session", f"{agent_name}/{session_name(path)}"))
+            if rec["session"] < known_sessions:
+                stale.add(rec["session"])
+        files[key] = rec
+        found.append((agent_name, path, st))
+
+    present = {rec["session"] for rec in files.values()}
+    stale.update(rec["session"] for key, rec in old_files.items() if key not in files and rec["session"] in present)
+    pending = []
+    for agent_name, path, st in found:
+        rec = files[str(path)]
+        if rec["session"] in stale and rec["offset"]:
+            rec = files[str(path)] = new_record(path, st, session=rec["session"])
+        if content_size(rec, st) > rec["offset"]:
+            pending.append((agent_name, path, rec))
+
+    # Drop anything past the committed row count (an interrupted update).
+    for name, dtype in COLUMNS.items():
+        column = store_dir / f"{name}.bin"
+        if column.exists():
+            os.truncate(column, meta["rows"] * np.dtype(dtype).itemsize)
+    if stale:
+        drop_sessions(store_dir, meta, stale)
+
+    new = {name: [] for name in COLUMNS}
+    for agent_name, path, rec in pending:
+        rows, rec["offset"] = scan_rows(path, rec["offset"], "archive" not in rec)
+        if "archive" in rec:
+            rec["length"] = rec["offset"]
+        refresh_head(rec, path)
+        agent = code("agent", agent_name)
+        for ts, model, inp, out, cache_read, cost in rows:
+            new["ts"].append(ts)
+            new["agent"].append(agent)
+            new["model"].append(code("model", model))
+            new["session"].append(rec["session"])
+            new["input"].append(inp)
+            new["output"].append(out)
+            new["cache_read"].append(cache_read)
+            new["cost"].append(cost)
+
+    for name, dtype in COLUMNS.items():
+        with open(store_dir / f"{name}.bin", "ab") as f:
+            np.array(new[name], dtype=dtype).tofile(f)
+    meta["rows"] += len(new["ts"])
+    meta["files"] = files
+    save_state(meta, store_dir / "meta.json")
+    return meta
+
+
+def group_usage(cols, meta, keys, since):
+    """Sum usage per combination of `keys` over rows with ts >= since (epoch seconds)."""
+    import numpy as np
+
+    mask = cols["ts"] >= since
+    ts = cols["ts"][mask]
+    factors = []
+    for key in keys:
+        if key == "hour":
+            raw = ts // 3600
+        elif key == "day":
+            raw = ts // 86400
+        elif key == "month":
+            raw = ts.astype("datetime64[s]").astype("datetime64[M]").astype("i8")
+        else:
+            raw = cols[key][mask]
+        factors.append(np.unique(raw, return_inverse=True))
+
+    shape = tuple(len(uniq) for uniq, _ in factors)
+    flat = np.ravel_multi_index([inv for _, inv in factors], shape) if factors else np.zeros(len(ts), "i8")
+    groups, ginv = np.unique(flat, return_inverse=True)
+    sums = {name: np.bincount(ginv, weights=cols[name][mask], minlength=len(groups))
+            for name in ("cost", "input", "output", "cache_read")}
+    calls = np.bincount(ginv, minlength=len(groups))
+
+    labels = []
+    for key, (uniq, _), idx in zip(keys, factors, np.unravel_index(groups, shape) if factors else []):
+        values = uniq[idx]
+        if key == "hour":
+            labels.append([datetime.fromtimestamp(int(v) * 3600, timezone.utc).strftime("%Y-%m-%d %H:00") for v in values])
+        elif key == "day":
+            labels.append([datetime.fromtimestamp(int(v) * 86400, timezone.utc).strftime("%Y-%m-%d") for v in values])
+        elif key == "month":
+            labels.append([str(np.datetime64(int(v), "M")) for v in values])
+        else:
+            labels.append([meta[key][v] for v in values])
+
+    return sorted((
+        {"key": tuple(label[i] for label in labels), "calls": int(calls[i]), "cost": float(sums["cost"][i]),
+         "input": int(sums["input"][i]), "output": int(sums["output"][i]), "cache_read": int(sums["cache_read"][i])}
+        for i in range(len(groups))
+    ), key=lambda g: g["key"])
+
+
+def print_groups(groups, keys, days):
+    if not groups:
+        print("No usage data found.")
+        return
+
+    widths = [max(len(key), *(len(g["key"][i]) for g in groups)) for i, key in enumerate(keys)]
+    print(f"Usage by {', '.join(keys)} (last {days} days)")
+    header = "  ".join(key.ljust(w) for key, w in zip(keys, widths))
+    print(f"{header}  {'cost':>9s}  {'calls':>7s}  {'input':>11s}  {'output':>11s}  {'cache read':>12s}  cache%")
+    for g in groups:
+        label = "  ".join(v.ljust(w) for v, w in zip(g["key"], widths))
+        prompt = g["input"] + g["cache_read"]
+        ratio = g["cache_read"] / prompt if prompt else 0.0
+        print(f"{label}  ${g['cost']:8.2f}  {g['calls']:7,d}  {g['input']:11,d}  {g['output']:11,d}  "
+              f"{g['cache_read']:12,d}  {ratio:5.1%}")
+
+
+# --- Cache analytics -------------------------------------------------------------------
+#
+# One streaming pass per session file, keeping a fixed-size accumulator per
+# session and per model. A turn "misses" the cache when its cacheRead drops
+# below half of the previous turn's in the same session. The miss is put
+# down to a model switch, to the cache TTL (the gap since the previous turn
+# exceeds it) or, failing both, to context pruning/compaction rewriting the
+# cached prefix.
+
+GAP_BUCKETS = (60, 300, 900, 3600)
+GAP_LABELS = ("<1m", "1-5m", "5-15m", "15-60m", ">60m")
+
+
+def empty_cache_stats():
+    return {"turns": 0, "input": 0, "output": 0, "cache_read": 0, "cache_write": 0, "cost": 0.0,
+            "miss_ttl": 0, "miss_prune": 0, "miss_model": 0,
+            "gaps": [0] * len(GAP_LABELS), "gap_sum": 0.0, "gap_max": 0.0}
+
+
+def merge_cache_stats(dst, src):
+    """Add the stats of another file of the same session (e.g. a rotated archive)."""
+    for key, value in src.items():
+        if key == "gaps":
+            dst[key] = [a + b for a, b in zip(dst[key], value)]
+        elif key == "gap_max":
+            dst[key] = max(dst[key], value)
+        else:
+            dst[key] += value
+
+
+def cache_ratio(stats):
+    prompt = stats["input"] + stats["cache_read"] + stats["cache_write"]
+    return stats["cache_read"] / prompt if prompt else 0.0
+
+
+def scan_cache(path, cutoff_ts, ttl, by_model):
+    """Return the cache stats of one session file, adding its turns to by_model."""
+    stats = empty_cache_stats()
+    last_t = last_model = None
+    last_cache = 0
+    with open_session(path) as f:
+        for line in f:
+            parsed = usage_entry(line)
+            if parsed is None:
+                continue
+            ts, model, usage = parsed
+            t = datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+            cache_read = usage.get("cacheRead", 0) or 0
+
+            if t >= cutoff_ts:
+                model_stats = by_model.get(model)
+                if model_stats is None:
+                    model_stats = by_model[model] = empty_cache_stats()
+                cost = entry_cost(usage)
+                for s in (stats, model_stats):
+                    s["turns"] += 1
+                    s["input"] += usage.get("input", 0) or 0
+                    s["output"] += usage.get("output", 0) or 0
+                    s["cache_read"] += cache_read
+                    s["cache_write"] += usage.get("cacheWrite", 0) or 0
+                    s["cost"] += cost
+
+                if last_t is not None:
+                    gap = max(t - last_t, 0.0)
+                    stats["gaps"][bisect.bisect(GAP_BUCKETS, gap)] += 1
+                    stats["gap_sum"] += gap
+                    stats["gap_max"] = max(stats["gap_max"], gap)
+                    if last_cache and cache_read < last_cache / 2:
+                        kind = "miss_model" if model != last_model else "miss_ttl" if gap > ttl else "miss_prune"
+                        stats[kind] += 1
+                        model_stats[kind] += 1
+
+            last_t, last_model, last_cache = t, model, cache_read
+    return stats
+
+
+def cache_report(days, ttl_minutes):
+    cutoff_ts = (datetime.now(timezone.utc) - timedelta(days=days)).timestamp()
+    ttl = ttl_minutes * 60
+    sessions = {}
+    by_model = {}
+    for agent_name, path in iter_session_files():
+        stats = scan_cache(path, cutoff_ts, ttl, by_model)
+        if not stats["turns"]:
+            continue
+        name = f"{agent_name}/{session_name(path)}"
+        if name in sessions:
+            merge_cache_stats(sessions[name], stats)
+        else:
+            sessions[name] = stats
+    return sessions, by_model
+
+
+def print_cache_report(sessions, by_model, days, ttl_minutes, limit=20):
+    if not by_model:
+        print("No usage data found.")
+        return
+
+    print(f"Prompt cache report (last {days} days, cache TTL {ttl_minutes}m)")
+    print(f"{'=' * 40}")
+    print("By model:")
+    print(f"  {'model':34s} {'turns':>7s}  {'cache%':>6s}  {'in/turn':>8s}  {'out/turn':>8s}  {'misses':>6s}  {'cost':>9s}")
+    for model, s in sorted(by_model.items(), key=lambda x: -x[1]["cost"]):
+        misses = s["miss_ttl"] + s["miss_prune"] + s["miss_model"]
+        print(f"  {model:34s} {s['turns']:7,d}  {cache_ratio(s):6.1%}  {s['input'] / s['turns']:8,.0f}  "
+              f"{s['output'] / s['turns']:8,.0f}  {misses:6,d}  ${s['cost']:8.2f}")
+    print()
+
+    flagged = [(name, s) for name, s in sessions.items() if s["miss_ttl"] + s["miss_prune"] >= 2]
+    flagged.sort(key=lambda x: -(x[1]["miss_ttl"] + x[1]["miss_prune"]))
+    print(f"Sessions losing cache to TTL expiry or pruning ({len(flagged)} of {len(sessions)}):")
+    if not flagged:
+        print("  none")
+    for name, s in flagged[:limit]:
+        gaps = s["turns"] - 1
+        avg_gap = s["gap_sum"] / gaps / 60 if gaps > 0 else 0.0
+        cause = "TTL" if s["miss_ttl"] >= s["miss_prune"] else "pruning"
+        histogram = " ".join(f"{label}:{n}" for label, n in zip(GAP_LABELS, s["gaps"]) if n)
+        print(f"  {name}")
+        print(f"    {s['turns']} turns, cache {cache_ratio(s):.1%}, misses ttl={s['miss_ttl']} "
+              f"pruning={s['miss_prune']} model-switch={s['miss_model']} -> mostly {cause}")
+        print(f"    gaps avg {avg_gap:.1f}m max {s['gap_max'] / 60:.1f}m ({histogram})")
+    if len(flagged) > limit:
+        print(f"  ... and {len(flagged) - limit} more")
+
+
+def bench(days):
+    """Time the original and fast-path line parsers over the same session files."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    paths = [path for _, path in iter_session_files()]
+
+    lines = 0
+    size = 0
+    for path in paths:
+        with open_session(path) as f:
+            lines += sum(1 for _ in f)
+        size += path.stat().st_size
+
+    print(f"Parser benchmark ({len(paths)} files, {lines:,} lines, {size / 1e6:.1f} MB, decoder: {JSON_DECODER})")
+    print(f"{'=' * 40}")
+    results = {}
+    for label, fast in (("before", False), ("after", True)):
+        t0 = time.perf_counter()
+        partials = [("", scan_file(path, cutoff=cutoff, fast=fast)[0]) for path in paths]
+        elapsed = time.perf_counter() - t0
+        results[label] = summarize(partials, cutoff)[0]
+        rate = lines / elapsed if elapsed else 0
+        print(f"  {label:8s} {rate:12,.0f} lines/s  {elapsed:7.2f}s")
+
+    before = sum(d["cost"] for d in results["before"].values())
+    after = sum(d["cost"] for d in results["after"].values())
+    if abs(before - after) > 1e-6:
+        print(f"  WARNING: totals differ (${before:.4f} vs ${after:.4f})")
+
+
 def print_summary(daily, by_model, by_agent, days):
     if not daily:
         print("No usage data found.")
@@ -107,6 +1093,14 @@ def print_summary(daily, by_model, by_agent, days):
         print(f"  {date}  ${d['cost']:7.2f}  ({tokens:,} tokens)")
 
 
+CHART_COLORS = ["#4a90d9", "#e74c3c", "#2ecc71", "#f39c12", "#9b59b6", "#1abc9c"]
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+
+
+def model_label(model):
+    return model.replace("claude-", "").replace("-20250929", "")
+
+
 def generate_png(daily, by_model, days):
     import matplotlib
     matplotlib.use("Agg")
@@ -132,12 +1126,11 @@ def generate_png(daily, by_model, days):
 
     # Model breakdown donut
     models = sorted(by_model.items(), key=lambda x: -x[1])
-    labels = [m.replace("claude-", "").replace("-20250929", "") for m, _ in models]
+    labels = [model_label(m) for m, _ in models]
     values = [c for _, c in models]
-    colors = ["#4a90d9", "#e74c3c", "#2ecc71", "#f39c12", "#9b59b6", "#1abc9c"]
     wedges, texts, autotexts = ax2.pie(
         values, labels=labels, autopct=lambda p: f"${p * sum(values) / 100:.2f}",
-        colors=colors[: len(values)], startangle=90, textprops={"fontsize": 9},
+        colors=CHART_COLORS[: len(values)], startangle=90, textprops={"fontsize": 9},
     )
     for t in autotexts:
         t.set_fontsize(8)
@@ -151,15 +1144,191 @@ def generate_png(daily, by_model, days):
     return out_path
 
 
+def nice_step(top, ticks=5):
+    """Round axis step (1, 2 or 5 x 10^n) giving about `ticks` gridlines up to `top`."""
+    raw = top / ticks if top > 0 else 1.0
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+def generate_svg(daily, by_model, days):
+    """Write the same daily bars and model donut as generate_png(), as hand-built SVG."""
+    dates = sorted(daily.keys())
+    if not dates:
+        return None
+
+    costs = [daily[d]["cost"] for d in dates]
+    width, height = 1400, 500
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+           f'viewBox="0 0 {width} {height}" font-family="DejaVu Sans, Arial, sans-serif">',
+           f'<rect width="{width}" height="{height}" fill="white"/>',
+           f'<text x="{width / 2}" y="30" text-anchor="middle" font-size="18" font-weight="bold">'
+           f'OpenClaw costs — last {days} days (total: ${sum(costs):.2f})</text>']
+
+    # Daily cost bars
+    left, right, top, bottom = 70, 900, 60, 420
+    step = nice_step(max(costs))
+    y_max = step * max(1, math.ceil(max(costs) / step))
+    scale = (bottom - top) / y_max
+    slot = (right - left) / len(dates)
+    tick = 0.0
+    while tick <= y_max + 1e-9:
+        y = bottom - tick * scale
+        out.append(f'<line x1="{left}" y1="{y:.1f}" x2="{right}" y2="{y:.1f}" stroke="#ddd"/>'
+                   f'<text x="{left - 8}" y="{y + 4:.1f}" text-anchor="end" font-size="11">{tick:g}</text>')
+        tick += step
+    out.append(f'<text x="20" y="{(top + bottom) / 2}" font-size="12" text-anchor="middle" '
+               f'transform="rotate(-90 20 {(top + bottom) / 2})">USD</text>')
+    label_every = max(1, math.ceil(len(dates) / 30))
+    for i, (date_str, cost) in enumerate(zip(dates, costs)):
+        x = left + i * slot + slot * 0.1
+        h = cost * scale
+        out.append(f'<rect x="{x:.1f}" y="{bottom - h:.1f}" width="{slot * 0.8:.1f}" height="{h:.1f}" '
+                   f'fill="{CHART_COLORS[0]}" fill-opacity="0.85"><title>{date_str}: ${cost:.2f}</title></rect>')
+        if i % label_every == 0:
+            cx = x + slot * 0.4
+            label = datetime.strptime(date_str, "%Y-%m-%d").strftime("%b %d")
+            out.append(f'<text x="{cx:.1f}" y="{bottom + 14}" font-size="11" text-anchor="end" '
+                       f'transform="rotate(-45 {cx:.1f} {bottom + 14})">{label}</text>')
+    out.append(f'<line x1="{left}" y1="{bottom}" x2="{right}" y2="{bottom}" stroke="#333"/>')
+
+    # Model breakdown donut
+    models = [(m, c) for m, c in sorted(by_model.items(), key=lambda x: -x[1]) if c > 0]
+    total = sum(c for _, c in models)
+    cx, cy, r_out, r_in = 1130, 260, 150, 80
+    out.append(f'<text x="{cx}" y="{top + 5}" text-anchor="middle" font-size="14">By model</text>')
+    angle = -math.pi / 2
+    for i, (model, cost) in enumerate(models):
+        color = CHART_COLORS[i % len(CHART_COLORS)]
+        sweep = 2 * math.pi * cost / total
+        if sweep >= 2 * math.pi - 1e-9:
+            out.append(f'<circle cx="{cx}" cy="{cy}" r="{(r_out + r_in) / 2}" fill="none" '
+                       f'stroke="{color}" stroke-width="{r_out - r_in}"/>')
+        else:
+            end = angle + sweep
+            large = 1 if sweep > math.pi else 0
+            p = [(cx + r * math.cos(a), cy + r * math.sin(a)) for r, a in
+                 ((r_out, angle), (r_out, end), (r_in, end), (r_in, angle))]
+            out.append(f'<path d="M{p[0][0]:.1f},{p[0][1]:.1f} A{r_out},{r_out} 0 {large} 1 {p[1][0]:.1f},{p[1][1]:.1f} '
+                       f'L{p[2][0]:.1f},{p[2][1]:.1f} A{r_in},{r_in} 0 {large} 0 {p[3][0]:.1f},{p[3][1]:.1f} Z" '
+                       f'fill="{color}" stroke="white"><title>{html.escape(model)}: ${cost:.2f}</title></path>')
+        mid = angle + sweep / 2
+        lx, ly = cx + (r_out + 18) * math.cos(mid), cy + (r_out + 18) * math.sin(mid)
+        anchor = "start" if math.cos(mid) >= 0 else "end"
+        out.append(f'<text x="{lx:.1f}" y="{ly:.1f}" font-size="11" text-anchor="{anchor}">'
+                   f'{html.escape(model_label(model))} ${cost:.2f}</text>')
+        angle += sweep
+    out.append("</svg>")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = OUTPUT_DIR / "cost-report.svg"
+    out_path.write_text("\n".join(out) + "\n")
+    return out_path
+
+
+def sparkline(daily):
+    """One-line Unicode chart of daily cost, with empty days shown as the lowest block."""
+    dates = sorted(daily.keys())
+    if not dates:
+        return ""
+    first = datetime.strptime(dates[0], "%Y-%m-%d")
+    span = (datetime.strptime(dates[-1], "%Y-%m-%d") - first).days + 1
+    costs = [daily.get((first + timedelta(days=i)).strftime("%Y-%m-%d"), {"cost": 0.0})["cost"]
+             for i in range(span)]
+    peak = max(costs)
+    blocks = "".join(SPARK_BLOCKS[min(int(c / peak * len(SPARK_BLOCKS)), len(SPARK_BLOCKS) - 1)] if peak else
+                     SPARK_BLOCKS[0] for c in costs)
+    return f"{blocks}  ${sum(costs):.2f} ({dates[0]} to {dates[-1]}, max ${peak:.2f}/day)"
+
+
 def main():
     parser = argparse.ArgumentParser(description="OpenClaw cost analyzer")
     parser.add_argument("--days", type=int, default=30, help="Number of days to analyze (default: 30)")
-    parser.add_argument("--png", action="store_true", help="Generate a PNG chart")
+    parser.add_argument("--png", action="store_true", help="Generate a PNG chart (slow: imports matplotlib)")
+    parser.add_argument("--svg", action="store_true", help="Generate an SVG chart without matplotlib")
+    parser.add_argument("--sparkline", action="store_true", help="Print a one-line Unicode chart of daily cost")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only parse what was appended since the last run, reusing per-file "
+                             "aggregates from the state file (--days then counts whole UTC days)")
+    parser.add_argument("--state", type=Path, default=STATE_PATH,
+                        help=f"State file for --incremental (default: {STATE_PATH})")
+    parser.add_argument("--index", type=Path, default=INDEX_PATH,
+                        help=f"Time-range index used to skip out-of-window files (default: {INDEX_PATH})")
+    parser.add_argument("--no-index", action="store_true", help="Scan every session file in full")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for parsing (0 = one per core, default: 1)")
+    parser.add_argument("--bench", action="store_true",
+                        help="Report parser throughput before/after the fast path, then exit")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep running: tail session files and maintain a live status file")
+    parser.add_argument("--status", type=Path, default=STATUS_PATH,
+                        help=f"Status JSON written by --follow (default: {STATUS_PATH})")
+    parser.add_argument("--budget", type=float, default=50.0, help="Monthly budget in USD (default: 50)")
+    parser.add_argument("--alert-levels", type=lambda v: [float(x) for x in v.split(",")],
+                        default=[0.5, 0.8, 1.0],
+                        help="Budget fractions that trigger an alert (default: 0.5,0.8,1.0)")
+    parser.add_argument("--burn-limit", type=float, default=2.0,
+                        help="Alert when spend over the last hour exceeds this many USD (default: 2, 0 = off)")
+    parser.add_argument("--hook", help="Command run on each alert (gets COST_ALERT, COST_ALERT_MESSAGE, COST_STATUS)")
+    parser.add_argument("--interval", type=float, default=5.0,
+                        help="Seconds between polls / inotify wakeups in --follow (default: 5)")
+    parser.add_argument("--poll", action="store_true", help="Use stat polling instead of inotify in --follow")
+    parser.add_argument("--group-by", type=lambda v: v.split(","),
+                        help=f"Aggregate the columnar usage store by any of: {','.join(GROUP_KEYS)}")
+    parser.add_argument("--columns", type=Path, default=COLUMNS_DIR,
+                        help=f"Columnar usage store for --group-by (default: {COLUMNS_DIR})")
+    parser.add_argument("--cache-report", action="store_true",
+                        help="Report prompt-cache hit rates, tokens per turn and cache misses")
+    parser.add_argument("--cache-ttl", type=int, default=60,
+                        help="Prompt cache TTL in minutes used to classify misses (default: 60)")
     args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+
+    if args.cache_report:
+        sessions, by_model = cache_report(args.days, args.cache_ttl)
+        print_cache_report(sessions, by_model, args.days, args.cache_ttl)
+        return
+
+    if args.group_by:
+        unknown = [k for k in args.group_by if k not in GROUP_KEYS]
+        if unknown:
+            parser.error(f"unknown --group-by key(s): {', '.join(unknown)}")
+        meta = update_columns(args.columns)
+        t0 = time.perf_counter()
+        since = int((datetime.now(timezone.utc) - timedelta(days=args.days)).timestamp())
+        groups = group_usage(open_columns(args.columns, meta["rows"]), meta, args.group_by, since)
+        print_groups(groups, args.group_by, args.days)
+        print(f"\n({meta['rows']:,} rows, query {(time.perf_counter() - t0) * 1000:.1f} ms)")
+        return
+
+    if args.follow:
+        try:
+            follow(args, jobs)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.bench:
+        bench(args.days)
+        return
 
-    daily, by_model, by_agent = parse_sessions(args.days)
+    if args.incremental:
+        daily, by_model, by_agent = parse_sessions_incremental(args.days, args.state, jobs)
+    else:
+        daily, by_model, by_agent = parse_sessions(args.days, jobs, None if args.no_index else args.index)
     print_summary(daily, by_model, by_agent, args.days)
 
+    if args.sparkline and daily:
+        print(f"\n{sparkline(daily)}")
+
+    if args.svg:
+        path = generate_svg(daily, by_model, args.days)
+        if path:
+            print(f"\nChart saved to: {path}")
+
     if args.png:
         path = generate_png(daily, by_model, args.days)
         if path:
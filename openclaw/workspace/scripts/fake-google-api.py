@@ -0,0 +1,1264 @@
+#!/usr/bin/env python3
+"""
+Fake Google API server
+A local stand-in for the Gmail, People, Calendar, Drive, Sheets, Docs and
+Places endpoints the skill scripts call, for load tests and benchmarks that
+must not touch real quotas.
+
+Run it and point the scripts at it with GOOGLE_API_BASE_URL; they then send
+every call here with a placeholder token and never read google_token.json:
+
+  python3 fake-google-api.py --port 8089 --latency-ms 40 --error-rate 0.02
+  GOOGLE_API_BASE_URL=http://127.0.0.1:8089 python3 ../skills/gmail-assistant/scripts/list_emails.py
+
+Data is synthetic and generated on demand from the item index, so datasets
+of any size (--messages 1000000) cost no memory; only writes (sent mail,
+label changes, new events/files/rows/contacts) are kept. List endpoints
+page like the real APIs (pageToken/nextPageToken, capped page sizes).
+
+Control endpoints:
+  GET  /_fixtures    sample IDs of every resource, for driving the scripts
+  GET  /_stats       requests (batch parts counted separately), injected errors and bytes per endpoint
+  POST /_stats/reset
+  POST /_deliver     new unread mail in the inbox (?count=N, default 1), recorded in the Gmail history
+"""
+
+import argparse
+import base64
+import email
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from email.header import decode_header, make_header
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+WORDS = ("the meeting calendar invoice lunch tomorrow please check email draft send reply summary "
+         "transcript voice note budget report travel train Lausanne Geneva doc sheet project review "
+         "schedule update quarterly team offsite dinner booking confirmation receipt").split()
+FIRST_NAMES = ("Anna Luca Sofia Marc Elena Noah Mia David Laura Jonas Chiara Paul Nina Tom Sara "
+               "Felix Lea Simon Julia Max").split()
+LAST_NAMES = ("Müller Meier Schmid Keller Weber Huber Schneider Meyer Steiner Fischer Gerber Brunner "
+              "Baumann Frei Zimmermann Moser").split()
+FOLDER_MIME = "application/vnd.google-apps.folder"
+DOC_MIME = "application/vnd.google-apps.document"
+SHEET_MIME = "application/vnd.google-apps.spreadsheet"
+PLACE_TYPES = ["restaurant", "cafe", "bar", "bakery", "gym", "museum"]
+FILE_MIMES = {"application/pdf": ".pdf", "text/plain": ".txt", "image/jpeg": ".jpg", "text/csv": ".csv",
+              "application/vnd.google-apps.document": "", "application/vnd.google-apps.spreadsheet": ""}
+
+
+def rng(*key):
+    """A Random seeded from the item key, so the same item always looks the same."""
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "big"))
+
+
+def words(r, n):
+    return " ".join(r.choice(WORDS) for _ in range(n))
+
+
+def b64(data):
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def rfc3339(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def parse_time(text):
+    return datetime.fromisoformat(text.replace("Z", "+00:00"))
+
+
+class ApiError(Exception):
+    def __init__(self, code, message, reason=None, status=None, headers=None):
+        super().__init__(message)
+        self.code, self.reason, self.status, self.headers = code, reason, status, headers or {}
+
+    def body(self):
+        error = {"code": self.code, "message": str(self), "status": self.status or "UNKNOWN"}
+        if self.reason:
+            error["errors"] = [{"reason": self.reason, "message": str(self), "domain": "global"}]
+        return {"error": error}
+
+
+def not_found(what):
+    return ApiError(404, f"Requested entity was not found: {what}", "notFound", "NOT_FOUND")
+
+
+class Dataset:
+    """Synthetic account data. Item i of every collection is derived from (seed, kind, i)."""
+
+    def __init__(self, args):
+        self.seed = args.seed
+        self.messages = args.messages
+        self.contacts = args.contacts
+        self.events = args.events
+        self.files = args.files
+        self.rows = args.rows
+        self.body_kb = args.body_kb
+        self.file_kb = args.file_kb
+        self.doc_paragraphs = args.doc_paragraphs
+        self.now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        self.lock = threading.Lock()
+        # Writes, layered over the generated data
+        self.labels = {}            # message id -> label list
+        self.added = {}             # message id -> message, for sent and delivered mail
+        self.history = []           # Gmail history records, oldest first
+        self.created_contacts = []
+        self.deleted_contacts = set()   # resource names
+        self.contact_changes = []       # created and deleted people, for syncToken requests
+        self.sync_prefix = uuid.uuid4().hex[:8]  # tokens from an earlier server run are expired
+        self.created_events = {}    # event id -> event
+        self.deleted_events = set()
+        self.created_files = {}     # file id -> (metadata, content)
+        self.file_parents = {}      # file id -> parents
+        self.uploads = {}           # upload id -> (metadata, bytearray, total)
+        self.appended_rows = defaultdict(int)
+        self.docs = {}              # document id -> {"title": ..., "text": ...}
+
+    # --- People ---------------------------------------------------------------
+
+    def person(self, i):
+        r = rng(self.seed, "person", i)
+        first, last = r.choice(FIRST_NAMES), r.choice(LAST_NAMES)
+        return {"name": f"{first} {last}", "email": f"{first.lower()}.{last.lower().replace('ü', 'ue')}{i}@example.com"}
+
+    def connection(self, i):
+        p = self.person(i)
+        return {
+            "resourceName": f"people/c{i:010d}",
+            "etag": f"%E{i:06d}",
+            "names": [{"displayName": p["name"], "givenName": p["name"].split()[0],
+                       "familyName": p["name"].split()[1]}],
+            "emailAddresses": [{"value": p["email"], "type": "home"}],
+        }
+
+    # --- Gmail ----------------------------------------------------------------
+
+    def message_id(self, i):
+        return f"{0x18d0000000000000 + i:016x}"
+
+    def message_index(self, message_id):
+        try:
+            i = int(message_id, 16) - 0x18d0000000000000
+        except ValueError:
+            raise not_found(message_id)
+        if not 0 <= i < self.messages:
+            raise not_found(message_id)
+        return i
+
+    def message_date(self, i):
+        return self.now - timedelta(minutes=37 * i)
+
+    def message_labels(self, i):
+        labels = self.labels.get(self.message_id(i))
+        if labels is None:
+            labels = ["INBOX", "CATEGORY_PERSONAL"] + (["UNREAD"] if i % 3 == 0 else [])
+        return labels
+
+    def message(self, i, fmt="full", metadata_headers=None):
+        mid = self.message_id(i)
+        r = rng(self.seed, "message", i)
+        sender = self.person(r.randrange(max(1, self.contacts)))
+        date = self.message_date(i)
+        subject = words(r, r.randint(3, 8)).capitalize()
+        text = "\n\n".join(words(r, 60) for _ in range(max(1, self.body_kb * 1024 // 400)))
+        headers = [
+            {"name": "From", "value": f"{sender['name']} <{sender['email']}>"},
+            {"name": "To", "value": "me@example.com"},
+            {"name": "Subject", "value": subject},
+            {"name": "Date", "value": date.strftime("%a, %d %b %Y %H:%M:%S +0000")},
+            {"name": "Message-ID", "value": f"<{mid}@mail.example.com>"},
+        ]
+        msg = {
+            "id": mid,
+            "threadId": self.message_id(i - i % 3),
+            "labelIds": self.message_labels(i),
+            "snippet": text[:120],
+            "historyId": str(100000 + i),
+            "internalDate": str(int(date.timestamp() * 1000)),
+            "sizeEstimate": len(text) * 2 + 800,
+        }
+        if fmt == "minimal":
+            return msg
+        if fmt == "raw":
+            raw = "".join(f"{h['name']}: {h['value']}\r\n" for h in headers) + "\r\n" + text
+            msg["raw"] = b64(raw.encode())
+            return msg
+        if fmt == "metadata":
+            wanted = {h.lower() for h in metadata_headers or []}
+            msg["payload"] = {"mimeType": "text/plain",
+                              "headers": [h for h in headers if not wanted or h["name"].lower() in wanted]}
+            return msg
+
+        plain = {"partId": "0", "mimeType": "text/plain", "filename": "",
+                 "headers": [{"name": "Content-Type", "value": "text/plain; charset=UTF-8"}],
+                 "body": {"size": len(text.encode()), "data": b64(text.encode())}}
+        if i % 4:
+            msg["payload"] = dict(plain, partId="", headers=headers + plain["headers"])
+            return msg
+        html = "<html><body>" + "".join(f"<p>{p}</p>" for p in text.split("\n\n")) + "</body></html>"
+        if i % 8 == 4:
+            # Newsletter-style: no plain-text part, layout tables and styles around the text
+            html = ('<html><head><style>td { padding: 8px; font-family: sans-serif }</style></head><body>'
+                    '<table width="100%">' + "".join(f'<tr><td style="color: #333"><p>{p}</p></td></tr>'
+                                                     for p in text.split("\n\n")) + "</table></body></html>")
+        html_part = {"partId": "0.1", "mimeType": "text/html", "filename": "",
+                     "headers": [{"name": "Content-Type", "value": "text/html; charset=UTF-8"}],
+                     "body": {"size": len(html.encode()), "data": b64(html.encode())}}
+        alternative = {"partId": "0", "mimeType": "multipart/alternative", "filename": "", "headers": [],
+                       "body": {"size": 0},
+                       "parts": [html_part] if i % 8 == 4 else [dict(plain, partId="0.0"), html_part]}
+        attachment = {"partId": "1", "mimeType": "application/pdf", "filename": f"{subject[:20]}.pdf",
+                      "headers": [{"name": "Content-Disposition", "value": "attachment"}],
+                      "body": {"attachmentId": f"att-{mid}-1", "size": self.file_kb * 1024}}
+        msg["payload"] = {"partId": "", "mimeType": "multipart/mixed", "filename": "",
+                          "headers": headers, "body": {"size": 0}, "parts": [alternative, attachment]}
+        return msg
+
+    def history_id(self):
+        """The mailbox's current historyId; history records number on from the generated data's."""
+        return 100000 + self.messages + len(self.history)
+
+    def record_history(self, change, msg, label_ids=None):
+        """Append a history record (messagesAdded, labelsAdded or labelsRemoved); call with the lock held."""
+        ref = {"id": msg["id"], "threadId": msg["threadId"], "labelIds": msg["labelIds"]}
+        item = {"message": ref}
+        if label_ids is not None:
+            item["labelIds"] = label_ids
+        hid = self.history_id() + 1
+        self.history.append({"id": str(hid), "messages": [{"id": msg["id"], "threadId": msg["threadId"]}],
+                             change: [item]})
+        return str(hid)
+
+    def add_message(self, headers, labels, snippet, raw=None):
+        """Store a sent or delivered message and record it in the history; call with the lock held."""
+        mid = uuid.uuid4().hex[:16]
+        now = datetime.now(timezone.utc)
+        msg = {"id": mid, "threadId": mid, "labelIds": labels, "snippet": snippet,
+               "internalDate": str(int(now.timestamp() * 1000)), "sizeEstimate": len(raw or snippet) + 800,
+               "payload": {"mimeType": "text/plain", "headers": headers}}
+        if raw is not None:
+            msg["raw"] = raw
+        msg["historyId"] = self.record_history("messagesAdded", msg)
+        self.added[mid] = msg
+        return msg
+
+    def deliver(self, count):
+        """Drop `count` new unread messages into the inbox."""
+        delivered = []
+        with self.lock:
+            for _ in range(count):
+                r = rng(self.seed, "delivered", len(self.history))
+                sender = self.person(r.randrange(max(1, self.contacts)))
+                subject = words(r, r.randint(3, 8)).capitalize()
+                headers = [{"name": "From", "value": f"{sender['name']} <{sender['email']}>"},
+                           {"name": "To", "value": "me@example.com"},
+                           {"name": "Subject", "value": subject},
+                           {"name": "Date", "value": datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")}]
+                delivered.append(self.add_message(headers, ["INBOX", "UNREAD"], words(r, 20))["id"])
+        return delivered
+
+    def matching_added(self, query, label_ids):
+        """IDs of sent and delivered messages matching the query, newest first."""
+        unread = "is:unread" in (query or "") or "UNREAD" in (label_ids or [])
+        return [mid for mid in reversed(self.added)
+                if not unread or "UNREAD" in self.labels.get(mid, self.added[mid]["labelIds"])]
+
+    def matching_messages(self, query, label_ids):
+        """Indices of messages matching the (small) subset of Gmail search this server understands."""
+        unread = "is:unread" in (query or "") or "UNREAD" in (label_ids or [])
+        if not unread:
+            return range(self.messages)
+        if not self.labels:
+            return range(0, self.messages, 3)
+        return [i for i in range(self.messages) if "UNREAD" in self.message_labels(i)]
+
+    # --- Calendar -------------------------------------------------------------
+
+    def event_start(self, i):
+        return self.now + timedelta(hours=3 * i - 24)
+
+    def event(self, i):
+        r = rng(self.seed, "event", i)
+        start = self.event_start(i)
+        end = start + timedelta(minutes=r.choice([30, 45, 60, 90]))
+        event = {
+            "kind": "calendar#event",
+            "id": f"ev{i:08d}",
+            "status": "confirmed",
+            "htmlLink": f"https://calendar.example.com/event?eid=ev{i:08d}",
+            "summary": words(r, r.randint(2, 5)).capitalize(),
+            "start": {"dateTime": rfc3339(start), "timeZone": "Europe/Zurich"},
+            "end": {"dateTime": rfc3339(end), "timeZone": "Europe/Zurich"},
+            "created": rfc3339(start - timedelta(days=7)),
+            "updated": rfc3339(start - timedelta(days=1)),
+        }
+        if i % 2:
+            event["location"] = r.choice(["Lausanne", "Geneva", "Zürich", "Bern", "Online"])
+        if i % 3 == 0:
+            event["description"] = words(r, 40)
+        return event
+
+    # --- Drive ----------------------------------------------------------------
+
+    def file_id(self, i):
+        return f"file{i:08d}"
+
+    def file(self, file_id):
+        if file_id in self.created_files:
+            meta = dict(self.created_files[file_id][0])
+        else:
+            m = re.fullmatch(r"file(\d{8})", file_id)
+            if m is None and file_id.startswith(("doc", "sheet")):
+                return self.workspace_file(file_id)
+            if not m or int(m.group(1)) >= self.files:
+                raise not_found(file_id)
+            i = int(m.group(1))
+            r = rng(self.seed, "file", i)
+            mime = FOLDER_MIME if i % 20 == 0 else r.choice(list(FILE_MIMES))
+            modified = self.now - timedelta(hours=5 * i)
+            meta = {
+                "kind": "drive#file",
+                "id": file_id,
+                "name": words(r, 3).replace(" ", "-") + FILE_MIMES.get(mime, ""),
+                "mimeType": mime,
+                "parents": [self.file_id(i - i % 20) if i % 20 else "root"],
+                "createdTime": rfc3339(modified - timedelta(days=30)),
+                "modifiedTime": rfc3339(modified),
+                "webViewLink": f"https://drive.example.com/file/d/{file_id}/view",
+                "owners": [{"displayName": "Me", "emailAddress": "me@example.com", "me": True}],
+            }
+            if not mime.startswith("application/vnd.google-apps"):
+                meta["size"] = str(r.randint(1, max(1, self.file_kb)) * 1024)
+        if file_id in self.file_parents:
+            meta["parents"] = self.file_parents[file_id]
+        return meta
+
+    def workspace_file(self, file_id):
+        """Drive metadata for a generated document or spreadsheet (their IDs are Drive file IDs)."""
+        mime = DOC_MIME if file_id.startswith("doc") else SHEET_MIME
+        kind = "document" if mime == DOC_MIME else "spreadsheets"
+        return {"kind": "drive#file", "id": file_id, "name": file_id, "mimeType": mime, "parents": ["root"],
+                "createdTime": rfc3339(self.now - timedelta(days=30)), "modifiedTime": rfc3339(self.now),
+                "webViewLink": f"https://docs.example.com/{kind}/d/{file_id}/edit",
+                "owners": [{"displayName": "Me", "emailAddress": "me@example.com", "me": True}]}
+
+    def file_content(self, file_id):
+        if file_id in self.created_files:
+            return bytes(self.created_files[file_id][1])
+        meta = self.file(file_id)
+        size = int(meta.get("size", self.file_kb * 1024))
+        block = hashlib.sha256(file_id.encode()).hexdigest().encode() * 32
+        return (block * (size // len(block) + 1))[:size]
+
+    # --- Docs -----------------------------------------------------------------
+
+    def document(self, doc_id):
+        doc = self.docs.get(doc_id)
+        if doc is None:
+            if not doc_id.startswith("doc"):
+                raise not_found(doc_id)
+            r = rng(self.seed, "doc", doc_id)
+            doc = {"title": words(r, 4).capitalize(),
+                   "text": "".join(words(r, 50) + "\n" for _ in range(self.doc_paragraphs))}
+        content = [{"endIndex": 1, "sectionBreak": {"sectionStyle": {}}}]
+        index = 1
+        for paragraph in doc["text"].splitlines(keepends=True) or ["\n"]:
+            end = index + len(paragraph)
+            content.append({"startIndex": index, "endIndex": end, "paragraph": {
+                "elements": [{"startIndex": index, "endIndex": end, "textRun": {"content": paragraph}}]}})
+            index = end
+        return {"documentId": doc_id, "title": doc["title"], "body": {"content": content},
+                "revisionId": hashlib.sha1(doc["text"].encode()).hexdigest()[:16]}
+
+    # --- Places ---------------------------------------------------------------
+
+    def place(self, i):
+        r = rng(self.seed, "place", i)
+        lat, lng = 46.52 + r.uniform(-0.05, 0.05), 6.63 + r.uniform(-0.05, 0.05)
+        kind = PLACE_TYPES[i % len(PLACE_TYPES)]
+        return {
+            "id": f"ChIJfake{i:010d}",
+            "displayName": {"text": f"{r.choice(LAST_NAMES)} {kind.capitalize()}", "languageCode": "fr"},
+            "formattedAddress": f"Rue {r.choice(LAST_NAMES)} {r.randint(1, 120)}, 1003 Lausanne, Switzerland",
+            "location": {"latitude": round(lat, 6), "longitude": round(lng, 6)},
+            "rating": round(r.uniform(3.2, 4.9), 1),
+            "userRatingCount": r.randint(3, 2500),
+            "priceLevel": r.choice(["PRICE_LEVEL_INEXPENSIVE", "PRICE_LEVEL_MODERATE", "PRICE_LEVEL_EXPENSIVE"]),
+            "types": [kind, "food" if kind in ("restaurant", "cafe", "bakery") else "point_of_interest", "establishment"],
+            "currentOpeningHours": {"openNow": r.random() < 0.7,
+                                    "weekdayDescriptions": [f"{d}: 08:00–22:00" for d in
+                                                            ("Monday", "Tuesday", "Wednesday", "Thursday",
+                                                             "Friday", "Saturday", "Sunday")]},
+            "nationalPhoneNumber": f"021 {r.randint(100, 999)} {r.randint(10, 99)} {r.randint(10, 99)}",
+            "websiteUri": f"https://place{i}.example.com",
+        }
+
+    def fixtures(self):
+        return {
+            "messages": [self.message_id(i) for i in range(min(5, self.messages))],
+            "contacts": [self.person(i)["email"] for i in range(min(5, self.contacts))],
+            "events": [f"ev{i:08d}" for i in range(min(5, self.events))],
+            "files": [self.file_id(i) for i in range(1, min(6, self.files)) if i % 20],
+            "folders": [self.file_id(i) for i in range(0, min(self.files, 100), 20)],
+            "spreadsheets": ["sheet00000001"],
+            "documents": ["doc00000001"],
+            "places": [f"ChIJfake{i:010d}" for i in range(5)],
+        }
+
+
+# --- Request handling ----------------------------------------------------------------
+
+def page(items, token, size):
+    """Slice items for a pageToken (an offset); returns (page, nextPageToken or None)."""
+    start = int(token) if token else 0
+    end = start + size
+    return items[start:end], (str(end) if end < len(items) else None)
+
+
+# (HTTP method, path regex, endpoint name, handler). A handler gets the
+# dataset, the path parameters, the query, the parsed JSON body and the
+# request handler, and returns a JSON-able object, bytes, or a Response.
+ROUTES = []
+
+
+def route(method, pattern, name):
+    def register(fn):
+        ROUTES.append((method, re.compile(pattern), name, fn))
+        return fn
+    return register
+
+
+def q1(query, key, default=None):
+    return query.get(key, [default])[0]
+
+
+# Gmail
+
+@route("GET", r"gmail/v1/users/me/profile", "gmail.users.getProfile")
+def gmail_profile(ds, m, query, body, handler):
+    return {"emailAddress": "me@example.com", "messagesTotal": ds.messages + len(ds.added),
+            "threadsTotal": ds.messages // 3 + len(ds.added), "historyId": str(ds.history_id())}
+
+
+@route("GET", r"gmail/v1/users/me/messages", "gmail.users.messages.list")
+def gmail_list(ds, m, query, body, handler):
+    # Sent and delivered mail is newer than the generated messages, so it comes first
+    added = ds.matching_added(q1(query, "q"), query.get("labelIds"))
+    indices = ds.matching_messages(q1(query, "q"), query.get("labelIds"))
+    size = min(int(q1(query, "maxResults", 100)), 500)
+    start = int(q1(query, "pageToken") or 0)
+    end = start + size
+    chunk = [(mid, ds.added[mid]["threadId"]) for mid in added[start:end]]
+    chunk += [(ds.message_id(i), ds.message_id(i - i % 3))
+              for i in indices[max(0, start - len(added)):max(0, end - len(added))]]
+    total = len(added) + len(indices)
+    result = {"messages": [{"id": mid, "threadId": tid} for mid, tid in chunk], "resultSizeEstimate": total}
+    if end < total:
+        result["nextPageToken"] = str(end)
+    return result if chunk else {"resultSizeEstimate": 0}
+
+
+@route("GET", r"gmail/v1/users/me/messages/(?P<id>[^/]+)", "gmail.users.messages.get")
+def gmail_get(ds, m, query, body, handler):
+    if m["id"] in ds.added:
+        msg = dict(ds.added[m["id"]], labelIds=ds.labels.get(m["id"], ds.added[m["id"]]["labelIds"]))
+        if q1(query, "format", "full") != "raw":
+            msg.pop("raw", None)
+        return msg
+    return ds.message(ds.message_index(m["id"]), q1(query, "format", "full"), query.get("metadataHeaders"))
+
+
+@route("GET", r"gmail/v1/users/me/messages/(?P<id>[^/]+)/attachments/(?P<aid>[^/]+)",
+       "gmail.users.messages.attachments.get")
+def gmail_attachment(ds, m, query, body, handler):
+    ds.message_index(m["id"])
+    data = hashlib.sha256(m["aid"].encode()).digest() * (ds.file_kb * 1024 // 32)
+    return {"attachmentId": m["aid"], "size": len(data), "data": b64(data)}
+
+
+@route("POST", r"gmail/v1/users/me/messages/(?P<id>[^/]+)/modify", "gmail.users.messages.modify")
+def gmail_modify(ds, m, query, body, handler):
+    added = ds.added.get(m["id"])
+    i = None if added else ds.message_index(m["id"])
+    with ds.lock:
+        old = ds.labels.get(m["id"], added["labelIds"]) if added else ds.message_labels(i)
+        labels = [l for l in old if l not in body.get("removeLabelIds", [])]
+        labels += [l for l in body.get("addLabelIds", []) if l not in labels]
+        ds.labels[m["id"]] = labels
+        msg = {"id": m["id"], "threadId": added["threadId"] if added else ds.message_id(i - i % 3),
+               "labelIds": labels}
+        if set(labels) - set(old):
+            ds.record_history("labelsAdded", msg, [l for l in labels if l not in old])
+        if set(old) - set(labels):
+            ds.record_history("labelsRemoved", msg, [l for l in old if l not in labels])
+    return msg
+
+
+@route("POST", r"(upload/)?gmail/v1/users/me/messages/send", "gmail.users.messages.send")
+def gmail_send(ds, m, query, body, handler):
+    upload_type = q1(query, "uploadType")
+    if upload_type == "resumable":
+        return start_upload(ds, body, handler, "upload/gmail/v1/users/me/messages/send")
+    if upload_type == "multipart":
+        body, content = parse_related(handler.headers.get("Content-Type", ""), handler.raw_body)
+        return send_message(ds, body, content)
+    if upload_type == "media":
+        return send_message(ds, {}, handler.raw_body)
+    if not isinstance(body, dict) or not body.get("raw"):
+        raise ApiError(400, "Invalid value for ByteString: raw", "invalidArgument", "INVALID_ARGUMENT")
+    return send_message(ds, body, base64.urlsafe_b64decode(body["raw"] + "=" * (-len(body["raw"]) % 4)))
+
+
+@route("PUT", r"upload/gmail/v1/users/me/messages/send", "gmail.users.messages.send")
+def gmail_send_chunk(ds, m, query, body, handler):
+    result = upload_chunk(ds, query, handler)
+    return result if isinstance(result, Response) else send_message(ds, *result)
+
+
+def send_message(ds, metadata, content):
+    """Store an RFC 822 message as sent and answer like messages.send."""
+    if not content:
+        raise ApiError(400, "Recipient address required", "invalidArgument", "INVALID_ARGUMENT")
+    parsed = email.message_from_bytes(content)
+    # Like Gmail, fill in From and Date and spell header names the usual way
+    headers = {"From": "me@example.com", "Date": datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")}
+    headers.update(("-".join(w.capitalize() for w in k.split("-")), str(make_header(decode_header(v))))
+                   for k, v in parsed.items())
+    headers = [{"name": k, "value": v} for k, v in headers.items()]
+    raw = base64.urlsafe_b64encode(content).decode()
+    with ds.lock:
+        msg = ds.add_message(headers, ["SENT"], "", raw=raw)
+    return {"id": msg["id"], "threadId": (metadata or {}).get("threadId", msg["threadId"]), "labelIds": msg["labelIds"]}
+
+
+@route("GET", r"gmail/v1/users/me/history", "gmail.users.history.list")
+def gmail_history(ds, m, query, body, handler):
+    start = int(q1(query, "startHistoryId", 0))
+    if start < 100000 + ds.messages:
+        raise ApiError(404, "Requested entity was not found.", "notFound", "NOT_FOUND")
+    records = [h for h in ds.history if int(h["id"]) > start]
+    size = min(int(q1(query, "maxResults", 100)), 500)
+    chunk, token = page(records, q1(query, "pageToken"), size)
+    result = {"historyId": str(ds.history_id())}
+    if chunk:
+        result["history"] = chunk
+    if token:
+        result["nextPageToken"] = token
+    return result
+
+
+# People
+
+@route("GET", r"v1/people/me/connections", "people.people.connections.list")
+def people_connections(ds, m, query, body, handler):
+    size = min(int(q1(query, "pageSize", 100)), 1000)
+    sync_token = q1(query, "syncToken")
+    if sync_token:
+        # Changes since the token: created people, and deleted ones flagged in their metadata
+        prefix, _, seen = sync_token.partition("-")
+        if prefix != ds.sync_prefix or not seen.isdigit() or int(seen) > len(ds.contact_changes):
+            raise ApiError(400, "Sync token is expired. Clear local cache and retry call without the sync token.",
+                           "EXPIRED_SYNC_TOKEN", "FAILED_PRECONDITION")
+        chunk, token = page(ds.contact_changes[int(seen):], q1(query, "pageToken"), size)
+        result = {"connections": chunk} if chunk else {}
+    else:
+        items = [i for i in range(ds.contacts) if f"people/c{i:010d}" not in ds.deleted_contacts]
+        chunk, token = page(items, q1(query, "pageToken"), size)
+        result = {"connections": [ds.connection(i) for i in chunk] + (ds.created_contacts if token is None else []),
+                  "totalPeople": len(items) + len(ds.created_contacts), "totalItems": len(items)}
+    if token:
+        result["nextPageToken"] = token
+    elif q1(query, "requestSyncToken") == "true":
+        result["nextSyncToken"] = f"{ds.sync_prefix}-{len(ds.contact_changes)}"
+    return result
+
+
+@route("POST", r"v1/people:createContact", "people.people.createContact")
+def people_create(ds, m, query, body, handler):
+    person = dict(body, resourceName=f"people/c9{uuid.uuid4().int % 10 ** 9:09d}", etag="%Enew")
+    names = person.get("names") or [{}]
+    names[0].setdefault("displayName", " ".join(filter(None, [names[0].get("givenName"),
+                                                              names[0].get("familyName")])))
+    with ds.lock:
+        ds.created_contacts.append(person)
+        ds.contact_changes.append(person)
+    return person
+
+
+@route("DELETE", r"v1/(?P<name>people/[^/:]+):deleteContact", "people.people.deleteContact")
+def people_delete(ds, m, query, body, handler):
+    with ds.lock:
+        generated = re.fullmatch(r"people/c(\d{10})", m["name"])
+        exists = (any(p["resourceName"] == m["name"] for p in ds.created_contacts) or
+                  generated and int(generated.group(1)) < ds.contacts and m["name"] not in ds.deleted_contacts)
+        if not exists:
+            raise not_found(m["name"])
+        ds.created_contacts = [p for p in ds.created_contacts if p["resourceName"] != m["name"]]
+        ds.deleted_contacts.add(m["name"])
+        ds.contact_changes.append({"resourceName": m["name"], "etag": "%Edeleted", "metadata": {"deleted": True}})
+    return b""
+
+
+# Calendar
+
+def event_lookup(ds, event_id):
+    if event_id in ds.deleted_events:
+        raise ApiError(410, "Resource has been deleted", "deleted", "GONE")
+    if event_id in ds.created_events:
+        return ds.created_events[event_id]
+    mm = re.fullmatch(r"ev(\d{8})", event_id)
+    if not mm or int(mm.group(1)) >= ds.events:
+        raise not_found(event_id)
+    return ds.event(int(mm.group(1)))
+
+
+@route("GET", r"calendar/v3/calendars/(?P<cal>[^/]+)/events", "calendar.events.list")
+def calendar_list(ds, m, query, body, handler):
+    time_min, time_max, text = q1(query, "timeMin"), q1(query, "timeMax"), q1(query, "q")
+    # Generated event i starts 3h * i - 24h from now, so the window maps to an index range
+    lo, hi = 0, ds.events
+    if time_min:
+        lo = max(lo, math.ceil((parse_time(time_min) - ds.event_start(0)) / timedelta(hours=3)))
+    if time_max:
+        hi = min(hi, math.ceil((parse_time(time_max) - ds.event_start(0)) / timedelta(hours=3)))
+    events = [ds.event(i) for i in range(lo, hi)] + list(ds.created_events.values())
+    events = [e for e in events if e["id"] not in ds.deleted_events]
+
+    def start(e):
+        return e["start"].get("dateTime") or e["start"].get("date")
+
+    if time_min:
+        events = [e for e in events if start(e)[:19] >= time_min[:19]]
+    if time_max:
+        events = [e for e in events if start(e)[:19] < time_max[:19]]
+    if text:
+        events = [e for e in events if text.lower() in json.dumps(e).lower()]
+    events.sort(key=start)
+    size = min(int(q1(query, "maxResults", 250)), 2500)
+    chunk, token = page(events, q1(query, "pageToken"), size)
+    result = {"kind": "calendar#events", "summary": "me@example.com", "timeZone": "Europe/Zurich", "items": chunk}
+    if token:
+        result["nextPageToken"] = token
+    return result
+
+
+@route("POST", r"calendar/v3/calendars/(?P<cal>[^/]+)/events", "calendar.events.insert")
+def calendar_insert(ds, m, query, body, handler):
+    eid = uuid.uuid4().hex[:26]
+    event = dict(body, kind="calendar#event", id=eid, status="confirmed",
+                 htmlLink=f"https://calendar.example.com/event?eid={eid}")
+    with ds.lock:
+        ds.created_events[eid] = event
+    return event
+
+
+@route("GET", r"calendar/v3/calendars/(?P<cal>[^/]+)/events/(?P<id>[^/]+)", "calendar.events.get")
+def calendar_get(ds, m, query, body, handler):
+    return event_lookup(ds, m["id"])
+
+
+@route("PUT", r"calendar/v3/calendars/(?P<cal>[^/]+)/events/(?P<id>[^/]+)", "calendar.events.update")
+def calendar_update(ds, m, query, body, handler):
+    event_lookup(ds, m["id"])
+    event = dict(body, id=m["id"], kind="calendar#event")
+    with ds.lock:
+        ds.created_events[m["id"]] = event
+    return event
+
+
+@route("DELETE", r"calendar/v3/calendars/(?P<cal>[^/]+)/events/(?P<id>[^/]+)", "calendar.events.delete")
+def calendar_delete(ds, m, query, body, handler):
+    event_lookup(ds, m["id"])
+    with ds.lock:
+        ds.deleted_events.add(m["id"])
+    return b""
+
+
+# Drive
+
+class FileList:
+    """Every file, generated ones first, sliced without building the whole list."""
+
+    def __init__(self, ds):
+        self.ds = ds
+        self.created = list(ds.created_files)
+
+    def ids(self):
+        return [self.ds.file_id(i) for i in range(self.ds.files)] + self.created
+
+    def __len__(self):
+        return self.ds.files + len(self.created)
+
+    def __getitem__(self, window):
+        ids = [self.ds.file_id(i) for i in range(self.ds.files)[window]]
+        ids += self.created[slice(max(0, window.start - self.ds.files), max(0, window.stop - self.ds.files))]
+        return [self.ds.file(f) for f in ids]
+
+
+@route("GET", r"drive/v3/files", "drive.files.list")
+def drive_list(ds, m, query, body, handler):
+    q = q1(query, "q", "")
+    parent = re.search(r"'([^']+)' in parents", q)
+    name = re.search(r"name contains '([^']+)'", q)
+    folders_only = re.search(r"mimeType\s*=\s*'" + re.escape(FOLDER_MIME), q)
+    files = FileList(ds)
+    if parent or name or folders_only:
+        files = [ds.file(f) for f in files.ids()]
+        if parent:
+            files = [f for f in files if parent.group(1) in f["parents"]]
+        if name:
+            files = [f for f in files if name.group(1).lower() in f["name"].lower()]
+        if folders_only:
+            files = [f for f in files if f["mimeType"] == FOLDER_MIME]
+    size = min(int(q1(query, "pageSize", 100)), 1000)
+    chunk, token = page(files, q1(query, "pageToken"), size)
+    result = {"kind": "drive#fileList", "files": list(chunk)}
+    if token:
+        result["nextPageToken"] = token
+    return result
+
+
+@route("GET", r"drive/v3/files/(?P<id>[^/]+)", "drive.files.get")
+def drive_get(ds, m, query, body, handler):
+    if q1(query, "alt") == "media":
+        return ds.file_content(m["id"])
+    return ds.file(m["id"])
+
+
+@route("GET", r"drive/v3/files/(?P<id>[^/]+)/export", "drive.files.export")
+def drive_export(ds, m, query, body, handler):
+    meta = ds.file(m["id"])
+    return f"%PDF-1.4 export of {meta['name']}\n".encode() + ds.file_content(m["id"])
+
+
+def new_file(ds, metadata, content=b"", fid=None):
+    fid = fid or "new" + uuid.uuid4().hex[:20]
+    now = rfc3339(datetime.now(timezone.utc))
+    meta = {"kind": "drive#file", "id": fid, "name": metadata.get("name", "Untitled"),
+            "mimeType": metadata.get("mimeType", "application/octet-stream"),
+            "parents": metadata.get("parents", ["root"]), "createdTime": now, "modifiedTime": now,
+            "webViewLink": f"https://drive.example.com/file/d/{fid}/view",
+            "owners": [{"displayName": "Me", "emailAddress": "me@example.com", "me": True}]}
+    if meta["mimeType"] != FOLDER_MIME:
+        meta["size"] = str(len(content))
+    with ds.lock:
+        ds.created_files[fid] = (meta, content)
+    return meta
+
+
+@route("POST", r"drive/v3/files", "drive.files.create")
+def drive_create(ds, m, query, body, handler):
+    return new_file(ds, body or {})
+
+
+@route("POST", r"upload/drive/v3/files", "drive.files.create")
+def drive_upload(ds, m, query, body, handler):
+    upload_type = q1(query, "uploadType", "media")
+    if upload_type == "resumable":
+        return start_upload(ds, body, handler, "upload/drive/v3/files")
+    if upload_type == "multipart":
+        metadata, content = parse_related(handler.headers.get("Content-Type", ""), handler.raw_body)
+        return new_file(ds, metadata, content)
+    return new_file(ds, {}, handler.raw_body)
+
+
+@route("PUT", r"upload/drive/v3/files", "drive.files.create")
+def drive_upload_chunk(ds, m, query, body, handler):
+    result = upload_chunk(ds, query, handler)
+    return result if isinstance(result, Response) else new_file(ds, *result)
+
+
+@route("PATCH", r"drive/v3/files/(?P<id>[^/]+)", "drive.files.update")
+def drive_update(ds, m, query, body, handler):
+    meta = ds.file(m["id"])
+    parents = list(meta["parents"])
+    remove = set(filter(None, q1(query, "removeParents", "").split(",")))
+    parents = [p for p in parents if p not in remove]
+    parents += [p for p in q1(query, "addParents", "").split(",") if p and p not in parents]
+    with ds.lock:
+        ds.file_parents[m["id"]] = parents
+        if m["id"] in ds.created_files and body:
+            ds.created_files[m["id"]][0].update(body)
+    return ds.file(m["id"])
+
+
+# Sheets
+
+def sheet_range(text):
+    """(sheet, first column, first row, last row or None, width) from an A1 range such as Sheet1!A2:C10."""
+    sheet, _, cells = text.partition("!")
+    mm = re.fullmatch(r"([A-Z]+)?(\d+)?(?::([A-Z]+)?(\d+)?)?", cells)
+    if not cells or not mm:
+        return sheet, 1, 1, None, 6
+    first_col, first_row, last_col, last_row = mm.groups()
+
+    def col(letters, default):
+        if not letters:
+            return default
+        n = 0
+        for ch in letters:
+            n = n * 26 + ord(ch) - 64
+        return n
+
+    width = col(last_col, col(first_col, 1) + 5) - col(first_col, 1) + 1
+    return sheet, col(first_col, 1), int(first_row or 1), int(last_row) if last_row else None, max(1, width)
+
+
+@route("GET", r"v4/spreadsheets/(?P<id>[^/]+)/values/(?P<range>[^/:]+)", "sheets.spreadsheets.values.get")
+def sheets_get(ds, m, query, body, handler):
+    _, _, first, last, width = sheet_range(m["range"])
+    total = ds.rows + ds.appended_rows[m["id"]]
+    last = min(last or total, total)
+    values = []
+    for row in range(first, last + 1):
+        if row == 1:
+            values.append([f"Column {c + 1}" for c in range(width)])
+            continue
+        r = rng(ds.seed, "row", m["id"], row)
+        values.append([r.choice(WORDS) if c % 2 else str(r.randint(1, 10000)) for c in range(width)])
+    return {"range": m["range"], "majorDimension": "ROWS", "values": values}
+
+
+def update_response(sheet_id, range_text, values, first_row, first_col=1):
+    sheet = range_text.partition("!")[0] or "Sheet1"
+    width = max((len(row) for row in values), default=0)
+    first_letter = chr(64 + min(first_col, 26))
+    last_letter = chr(64 + min(first_col + max(width, 1) - 1, 26))
+    return {"spreadsheetId": sheet_id,
+            "updatedRange": f"{sheet}!{first_letter}{first_row}:{last_letter}{first_row + len(values) - 1}",
+            "updatedRows": len(values), "updatedColumns": width,
+            "updatedCells": sum(len(row) for row in values)}
+
+
+@route("POST", r"v4/spreadsheets/(?P<id>[^/]+)/values/(?P<range>[^/:]+):append", "sheets.spreadsheets.values.append")
+def sheets_append(ds, m, query, body, handler):
+    values = (body or {}).get("values", [])
+    with ds.lock:
+        first_row = ds.rows + ds.appended_rows[m["id"]] + 1
+        ds.appended_rows[m["id"]] += len(values)
+    return {"spreadsheetId": m["id"], "tableRange": f"Sheet1!A1:F{first_row - 1}",
+            "updates": update_response(m["id"], m["range"], values, first_row)}
+
+
+@route("PUT", r"v4/spreadsheets/(?P<id>[^/]+)/values/(?P<range>[^/:]+)", "sheets.spreadsheets.values.update")
+def sheets_update(ds, m, query, body, handler):
+    _, first_col, first, _, _ = sheet_range(m["range"])
+    return update_response(m["id"], m["range"], (body or {}).get("values", []), first, first_col)
+
+
+@route("POST", r"v4/spreadsheets", "sheets.spreadsheets.create")
+def sheets_create(ds, m, query, body, handler):
+    sid = "sheet" + uuid.uuid4().hex[:20]
+    title = (body or {}).get("properties", {}).get("title", "Untitled spreadsheet")
+    new_file(ds, {"name": title, "mimeType": SHEET_MIME}, fid=sid)
+    return {"spreadsheetId": sid, "properties": {"title": title},
+            "sheets": [{"properties": {"sheetId": 0, "title": "Sheet1", "index": 0}}],
+            "spreadsheetUrl": f"https://sheets.example.com/spreadsheets/d/{sid}/edit"}
+
+
+# Docs
+
+@route("GET", r"v1/documents/(?P<id>[^/:]+)", "docs.documents.get")
+def docs_get(ds, m, query, body, handler):
+    return ds.document(m["id"])
+
+
+@route("POST", r"v1/documents", "docs.documents.create")
+def docs_create(ds, m, query, body, handler):
+    doc_id = "doc" + uuid.uuid4().hex[:20]
+    title = (body or {}).get("title", "Untitled document")
+    with ds.lock:
+        ds.docs[doc_id] = {"title": title, "text": "\n"}
+    new_file(ds, {"name": title, "mimeType": DOC_MIME}, fid=doc_id)
+    return ds.document(doc_id)
+
+
+@route("POST", r"v1/documents/(?P<id>[^/:]+):batchUpdate", "docs.documents.batchUpdate")
+def docs_batch_update(ds, m, query, body, handler):
+    current = ds.document(m["id"])
+    with ds.lock:
+        doc = ds.docs.setdefault(m["id"], {"title": current["title"],
+                                           "text": "".join(e["paragraph"]["elements"][0]["textRun"]["content"]
+                                                           for e in current["body"]["content"] if "paragraph" in e)})
+        for request in (body or {}).get("requests", []):
+            insert = request.get("insertText")
+            if insert:
+                index = max(0, insert.get("location", {}).get("index", 1) - 1)
+                doc["text"] = doc["text"][:index] + insert["text"] + doc["text"][index:]
+    return {"documentId": m["id"], "replies": [{} for _ in (body or {}).get("requests", [])]}
+
+
+# Places
+
+def field_mask(handler, place):
+    mask = handler.headers.get("X-Goog-FieldMask", "*")
+    if mask == "*":
+        return place
+    fields = {f.split(".", 1)[-1] for f in mask.split(",")}
+    return {k: v for k, v in place.items() if k in fields}
+
+
+@route("POST", r"v1/places:searchText", "places.searchText")
+@route("POST", r"v1/places:searchNearby", "places.searchNearby")
+def places_search(ds, m, query, body, handler):
+    body = body or {}
+    count = max(1, min(int(body.get("maxResultCount", 20)), 20))
+    text = (body.get("textQuery") or " ".join(body.get("includedTypes", []))).lower()
+    # Place i is of type PLACE_TYPES[i % 6]: step through the requested type's places
+    kind = next((k for k, t in enumerate(PLACE_TYPES) if t in text), None)
+    start = rng(ds.seed, "search", text).randrange(100000) * len(PLACE_TYPES)
+    if kind is None:
+        indices = range(start, start + count)
+    else:
+        indices = range(start + kind, start + kind + count * len(PLACE_TYPES), len(PLACE_TYPES))
+    places = [field_mask(handler, ds.place(i)) for i in indices]
+    return {"places": places}
+
+
+@route("GET", r"v1/places/(?P<id>[^/:]+)", "places.get")
+def places_get(ds, m, query, body, handler):
+    mm = re.fullmatch(r"ChIJfake(\d{10})", m["id"])
+    if not mm:
+        raise ApiError(404, f"Place not found: {m['id']}", status="NOT_FOUND")
+    return field_mask(handler, ds.place(int(mm.group(1))))
+
+
+def start_upload(ds, metadata, handler, path):
+    """Open a resumable upload session; the client PUTs the data to the returned Location."""
+    upload_id = uuid.uuid4().hex
+    total = handler.headers.get("X-Upload-Content-Length")
+    with ds.lock:
+        ds.uploads[upload_id] = (metadata or {}, bytearray(), int(total) if total else None)
+    location = f"http://{handler.headers['Host']}/{path}?uploadType=resumable&upload_id={upload_id}"
+    return Response(b"", headers={"Location": location})
+
+
+def upload_chunk(ds, query, handler):
+    """Add a PUT chunk to its upload session: (metadata, data) once complete, else a 308 Response.
+
+    A PUT of "bytes */total" with no body is a status query, as clients send
+    after a failed chunk to learn where to resume.
+    """
+    upload_id = q1(query, "upload_id")
+    if upload_id not in ds.uploads:
+        raise not_found(f"upload {upload_id}")
+    metadata, data, total = ds.uploads[upload_id]
+    content_range = handler.headers.get("Content-Range", "")
+    rm = re.fullmatch(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)", content_range.strip())
+    if rm and rm.group(3) != "*":
+        total = int(rm.group(3))
+    if rm and rm.group(1) is not None and int(rm.group(1)) != len(data):
+        raise ApiError(400, "Chunk does not start at the current upload offset", "badRequest", "INVALID_ARGUMENT")
+    data.extend(handler.raw_body)
+    if total is None or len(data) < total:
+        ds.uploads[upload_id] = (metadata, data, total)
+        headers = {"Range": f"bytes=0-{len(data) - 1}"} if data else {}
+        return Response(b"", status=308, headers=headers)
+    with ds.lock:
+        del ds.uploads[upload_id]
+    return metadata, bytes(data)
+
+
+def parse_related(content_type, data):
+    """Split a multipart/related upload body into (metadata, media bytes)."""
+    boundary = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not boundary:
+        return {}, data
+    parts = data.split(b"--" + boundary.group(1).encode())[1:-1]
+    metadata, content = {}, b""
+    for k, part in enumerate(parts):
+        _, _, payload = part.partition(b"\r\n\r\n")
+        payload = payload[:-2] if payload.endswith(b"\r\n") else payload
+        if k == 0:
+            metadata = json.loads(payload or b"{}")
+        else:
+            content = payload
+    return metadata, content
+
+
+class Response:
+    def __init__(self, body, status=200, headers=None):
+        self.body, self.status, self.headers = body, status, headers or {}
+
+
+def encode(body):
+    """(bytes, content type) for a handler result."""
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body), "application/octet-stream"
+    return json.dumps(body).encode(), "application/json; charset=UTF-8"
+
+
+# --- Batch requests ------------------------------------------------------------------
+#
+# POST /batch/<api>/<version> (or the global /batch that the bundled discovery
+# documents point at) with a multipart/mixed body of application/http parts,
+# as googleapiclient's BatchHttpRequest sends it. Each part is routed
+# like a request of its own (with its own injected errors) and answered in a
+# multipart/mixed response; the batch as a whole costs one round trip of
+# latency. Like Gmail, more than BATCH_LIMIT parts is a 400.
+
+BATCH_LIMIT = 100
+
+
+class InnerRequest:
+    """One part of a batch, with the headers and raw_body a route handler may read."""
+
+    def __init__(self, method, target, headers, raw_body):
+        self.method, self.target, self.headers, self.raw_body = method, target, headers, raw_body
+
+
+def parse_batch(content_type, data):
+    """[(Content-ID, InnerRequest)] from a multipart/mixed batch body."""
+    container = email.message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + data)
+    if not container.is_multipart():
+        raise ApiError(400, "Batch request must be multipart/mixed", "badRequest", "INVALID_ARGUMENT")
+    parts = []
+    for part in container.get_payload():
+        content_id = (part["Content-ID"] or "").strip("<>")
+        raw = (part.get_payload(decode=True) or b"").replace(b"\r\n", b"\n")
+        head, _, body = raw.partition(b"\n\n")
+        lines = head.decode().splitlines()
+        method, target = lines[0].split()[:2]
+        headers = email.message_from_string("\n".join(lines[1:]) + "\n\n")
+        parts.append((content_id, InnerRequest(method, target, headers, body)))
+    return parts
+
+
+def batch_response(answers):
+    """multipart/mixed body and content type for [(Content-ID, status, body, headers)]."""
+    boundary = f"batch_{uuid.uuid4().hex}"
+    out = []
+    for content_id, status, body, headers in answers:
+        data, content_type = encode(body)
+        head = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: {content_type}\r\n"
+        head += f"Content-Length: {len(data)}\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        out.append(f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                   .encode() + head.encode() + b"\r\n" + data + b"\r\n")
+    out.append(f"--{boundary}--\r\n".encode())
+    return b"".join(out), f"multipart/mixed; boundary={boundary}"
+
+
+# --- Server --------------------------------------------------------------------------
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeGoogleAPI/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.options.verbose:
+            super().log_message(fmt, *args)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def send(self, status, body, headers=None, name=None, content_type=None):
+        data, default_type = encode(body)
+        content_type = content_type or default_type
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+        if name:
+            self.server.record(name, status, len(self.raw_body), len(data))
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        path, query = url.path.lstrip("/"), parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.raw_body = self.rfile.read(length) if length else b""
+        server = self.server
+
+        if path.startswith("_"):
+            return self.control(method, path)
+        batch = re.fullmatch(r"batch(?:/([^/]+)/[^/]+)?", path)
+        if method == "POST" and batch:
+            return self.batch(batch.group(1))
+
+        name, status, body, headers = self.route(method, path, query, self)
+        self.send(status, body, headers, name)
+
+    def route(self, method, path, query, request, batched=False):
+        """Run the endpoint for a request; returns (endpoint name, status, body, headers)."""
+        server = self.server
+        for route_method, pattern, name, fn in ROUTES:
+            if route_method != method:
+                continue
+            m = pattern.fullmatch(path)
+            if m is None:
+                continue
+            match = {k: unquote(v) for k, v in m.groupdict().items() if v is not None}
+            if not batched:
+                server.delay(name)
+            injected = server.injected_error()
+            if injected:
+                return name, injected.code, injected.body(), injected.headers
+            body = None
+            if request.raw_body and "json" in (request.headers.get("Content-Type") or ""):
+                body = json.loads(request.raw_body)
+            try:
+                result = fn(server.dataset, match, query, body, request)
+            except ApiError as e:
+                return name, e.code, e.body(), e.headers
+            if isinstance(result, Response):
+                return name, result.status, result.body, result.headers
+            return name, 204 if result == b"" else 200, result, {}
+
+        error = ApiError(404, f"No fake endpoint for {method} /{path}", "notFound", "NOT_FOUND")
+        return f"unknown {method}", 404, error.body(), {}
+
+    def batch(self, api):
+        server = self.server
+        name = f"{api or 'global'}.batch"
+        server.delay(name)
+        try:
+            parts = parse_batch(self.headers.get("Content-Type", ""), self.raw_body)
+            if len(parts) > BATCH_LIMIT:
+                raise ApiError(400, f"Too many requests in batch ({len(parts)} > {BATCH_LIMIT})",
+                               "batchSizeTooLarge", "INVALID_ARGUMENT")
+        except ApiError as e:
+            return self.send(e.code, e.body(), e.headers, name)
+        answers = []
+        for content_id, request in parts:
+            url = urlsplit(request.target)
+            inner_name, status, body, headers = self.route(request.method, url.path.lstrip("/"),
+                                                           parse_qs(url.query), request, batched=True)
+            server.record(inner_name, status, len(request.raw_body or b""), len(encode(body)[0]), batched=True)
+            answers.append((content_id, status, body, headers))
+        data, content_type = batch_response(answers)
+        self.send(200, data, name=name, content_type=content_type)
+
+    def control(self, method, path):
+        server = self.server
+        if path == "_fixtures":
+            return self.send(200, server.dataset.fixtures())
+        if path == "_stats" and method == "GET":
+            return self.send(200, server.snapshot())
+        if path == "_stats/reset" and method == "POST":
+            server.reset()
+            return self.send(200, {"reset": True})
+        if path == "_deliver" and method == "POST":
+            count = int(q1(parse_qs(urlsplit(self.path).query), "count", 1))
+            return self.send(200, {"delivered": server.dataset.deliver(count)})
+        self.send(404, {"error": {"code": 404, "message": f"unknown control endpoint /{path}"}})
+
+
+class FakeGoogleServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, options):
+        super().__init__(address, Handler)
+        self.options = options
+        self.dataset = Dataset(options)
+        self.random = random.Random(options.seed)
+        self.stats_lock = threading.Lock()
+        self.api_latency = {}
+        for item in filter(None, (options.api_latency or "").split(",")):
+            api, _, ms = item.partition("=")
+            self.api_latency[api.strip()] = float(ms)
+        self.reset()
+
+    def reset(self):
+        with self.stats_lock:
+            self.started = time.monotonic()
+            self.stats = defaultdict(lambda: {"requests": 0, "batched": 0, "errors": 0, "bytes_in": 0, "bytes_out": 0})
+
+    def delay(self, name):
+        base = self.api_latency.get(name.split(".")[0], self.options.latency_ms)
+        jitter = self.options.jitter_ms
+        seconds = max(0.0, base + self.random.uniform(-jitter, jitter)) / 1000
+        if seconds:
+            time.sleep(seconds)
+
+    def injected_error(self):
+        if self.options.error_rate <= 0 or self.random.random() >= self.options.error_rate:
+            return None
+        code = self.random.choice(self.options.error_codes)
+        if code == 429:
+            headers = {"Retry-After": str(self.options.retry_after)} if self.options.retry_after else {}
+            return ApiError(429, "Rate Limit Exceeded", "rateLimitExceeded", "RESOURCE_EXHAUSTED", headers)
+        return ApiError(code, "Backend Error (injected)", "backendError", "UNAVAILABLE" if code == 503 else "INTERNAL")
+
+    def record(self, name, status, bytes_in, bytes_out, batched=False):
+        """Count a request; parts of a batch count as `batched`, the batch itself as one request."""
+        with self.stats_lock:
+            s = self.stats[name]
+            s["batched" if batched else "requests"] += 1
+            s["errors"] += status >= 400
+            s["bytes_in"] += bytes_in
+            s["bytes_out"] += bytes_out
+
+    def snapshot(self):
+        with self.stats_lock:
+            endpoints = {k: dict(v) for k, v in self.stats.items()}
+        return {"uptime_s": round(time.monotonic() - self.started, 3),
+                "requests": sum(s["requests"] for s in endpoints.values()),
+                "batched": sum(s["batched"] for s in endpoints.values()),
+                "errors": sum(s["errors"] for s in endpoints.values()),
+                "endpoints": endpoints}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Google APIs the skills use")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089, help="Port (default: 8089; 0 picks a free one)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request (default: 0)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform jitter around the latency")
+    parser.add_argument("--api-latency", help="Per-API latency overrides, e.g. gmail=120,places=30")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failed on purpose")
+    parser.add_argument("--error-codes", default="429,500", help="Status codes to inject (default: 429,500)")
+    parser.add_argument("--retry-after", type=float, default=0, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--messages", type=int, default=5000, help="Gmail messages (default: 5000)")
+    parser.add_argument("--contacts", type=int, default=1500, help="Contacts (default: 1500)")
+    parser.add_argument("--events", type=int, default=1000, help="Calendar events (default: 1000)")
+    parser.add_argument("--files", type=int, default=2000, help="Drive files (default: 2000)")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per spreadsheet (default: 1000)")
+    parser.add_argument("--body-kb", type=int, default=4, help="Approximate email body size (default: 4)")
+    parser.add_argument("--file-kb", type=int, default=256, help="Maximum Drive file/attachment size (default: 256)")
+    parser.add_argument("--doc-paragraphs", type=int, default=50, help="Paragraphs per document (default: 50)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+    args.error_codes = [int(c) for c in args.error_codes.split(",") if c]
+
+    server = FakeGoogleServer((args.host, args.port), args)
+    host, port = server.server_address[:2]
+    print(f"Fake Google API listening on http://{host}:{port} "
+          f"(latency {args.latency_ms:g}±{args.jitter_ms:g} ms, error rate {args.error_rate:g})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Google API trace report
+Summarizes the spans the skill scripts write with GOOGLE_API_TRACE=1
+(output/google-api-spans.jsonl and its rotated .1, .2, ... files): calls,
+errors, retries, bytes and p50/p95/p99 latency per API method.
+
+Usage:
+  python3 google-api-trace.py                       # everything in the trace files
+  python3 google-api-trace.py --hours 2             # only the last two hours
+  python3 google-api-trace.py --by script           # per calling script instead of per method
+  python3 google-api-trace.py --api drive --slowest 10
+  python3 google-api-trace.py --json
+
+Latency is the time the script waited on the call, including retries,
+backoff and quota throttling; the throttled column shows how much of that
+was throttling.
+"""
+
+import argparse
+import json
+import math
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+WORKSPACE_DIR = Path(__file__).resolve().parent.parent
+TRACE_PATH = WORKSPACE_DIR / "output" / "google-api-spans.jsonl"
+
+
+def trace_files(path):
+    """The trace file and its rotated copies, oldest first."""
+    rotated = [p for p in path.parent.glob(f"{path.name}.*") if p.suffix[1:].isdigit()]
+    files = sorted(rotated, key=lambda p: -int(p.suffix[1:]))
+    return files + [path] if path.exists() else files
+
+
+def read_spans(files, since=None):
+    spans = []
+    for path in files:
+        with open(path) as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+                if since and span.get("ts", "") < since:
+                    continue
+                spans.append(span)
+    return spans
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(spans, key):
+    groups = defaultdict(list)
+    for span in spans:
+        groups[key(span)].append(span)
+    rows = []
+    for name, group in groups.items():
+        latencies = [s["latency_ms"] for s in group]
+        rows.append({
+            "name": name,
+            "calls": len(group),
+            "errors": sum(1 for s in group if s.get("error")),
+            "retries": sum(s.get("retries", 0) for s in group),
+            "p50_ms": percentile(latencies, 0.5),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "max_ms": max(latencies),
+            "throttled_ms": round(sum(s.get("throttled_ms", 0) for s in group), 1),
+            "bytes_out": sum(s.get("bytes_out", 0) for s in group),
+            "bytes_in": sum(s.get("bytes_in", 0) for s in group),
+        })
+    return sorted(rows, key=lambda r: -r["p95_ms"] * r["calls"])
+
+
+def fmt_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize Google API tracing spans")
+    parser.add_argument("--trace", type=Path, default=TRACE_PATH, help=f"Trace file (default: {TRACE_PATH})")
+    parser.add_argument("--hours", type=float, help="Only spans from the last N hours")
+    parser.add_argument("--api", help="Only this API (drive, gmail, sheets, ...)")
+    parser.add_argument("--script", help="Only spans from scripts whose name contains this")
+    parser.add_argument("--by", choices=["method", "script", "api"], default="method", help="Grouping (default: method)")
+    parser.add_argument("--slowest", type=int, default=0, help="Also list the N slowest calls")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args()
+
+    files = trace_files(args.trace)
+    if not files:
+        print(f"No trace files at {args.trace}; run the skills with GOOGLE_API_TRACE=1 first", file=sys.stderr)
+        sys.exit(1)
+
+    since = None
+    if args.hours:
+        since = (datetime.now(timezone.utc) - timedelta(hours=args.hours)).strftime("%Y-%m-%dT%H:%M:%S")
+    spans = read_spans(files, since)
+    if args.api:
+        spans = [s for s in spans if s.get("api") == args.api]
+    if args.script:
+        spans = [s for s in spans if args.script in (s.get("script") or "")]
+    spans = [s for s in spans if "latency_ms" in s]
+
+    key = {"method": lambda s: s.get("method") or "?",
+           "script": lambda s: s.get("script") or "?",
+           "api": lambda s: s.get("api") or "?"}[args.by]
+    rows = summarize(spans, key)
+    slowest = sorted(spans, key=lambda s: -s["latency_ms"])[:args.slowest]
+
+    if args.json:
+        print(json.dumps({"spans": len(spans), "groups": rows, "slowest": slowest}, indent=2))
+        return
+
+    if not spans:
+        print("No matching spans")
+        return
+    print(f"{len(spans)} calls from {spans[0]['ts']} to {spans[-1]['ts']}")
+    print(f"  {args.by:40s} {'calls':>6s} {'err':>4s} {'retry':>5s} {'p50':>9s} {'p95':>9s} {'p99':>9s} "
+          f"{'throttled':>10s} {'out':>8s} {'in':>8s}")
+    for r in rows:
+        print(f"  {r['name']:40s} {r['calls']:6d} {r['errors']:4d} {r['retries']:5d} {r['p50_ms']:7.1f}ms "
+              f"{r['p95_ms']:7.1f}ms {r['p99_ms']:7.1f}ms {r['throttled_ms'] / 1000:9.1f}s "
+              f"{fmt_bytes(r['bytes_out']):>8s} {fmt_bytes(r['bytes_in']):>8s}")
+    if slowest:
+        print(f"\nSlowest {len(slowest)} calls:")
+        for s in slowest:
+            status = s.get("error") or s.get("status")
+            print(f"  {s['ts']}  {s['latency_ms']:8.1f}ms  {s.get('method')}  {status}  "
+                  f"retries={s.get('retries', 0)}  {s.get('script') or ''}")
+
+
+if __name__ == "__main__":
+    main()
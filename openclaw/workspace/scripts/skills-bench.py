@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Skills benchmark
+Runs the Google skill scripts against the fake Google API server
+(fake-google-api.py) and reports end-to-end latency and API calls/sec per
+script and per skill, without touching real accounts or quotas.
+
+Usage:
+  python3 skills-bench.py                                   # every scenario, 5 runs each
+  python3 skills-bench.py --skills gmail-assistant,google-drive --repeat 10
+  python3 skills-bench.py --latency-ms 60 --jitter-ms 20 --error-rate 0.05 --concurrency 4
+  python3 skills-bench.py --output bench.json --compare old.json
+  python3 skills-bench.py --server http://127.0.0.1:8089    # use a fake server that is already running
+
+Each run is a fresh `python3 <script> ...` process with GOOGLE_API_BASE_URL
+pointing at the fake server, so latency includes interpreter startup and
+imports, as a cold call from Gladys would. Daemon forwarding is turned off:
+a running skills daemon holds real credentials and would call Google.
+API calls are counted by the server; calls/sec is the number of calls a
+scenario made divided by its wall time.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SKILLS_DIR = SCRIPT_DIR.parent / "skills"
+SERVER_SCRIPT = SCRIPT_DIR / "fake-google-api.py"
+
+# (skill, script, arguments); {placeholders} are filled from the server's /_fixtures
+SCENARIOS = [
+    ("gmail-assistant", "list_emails.py", ["--max-results", "20"]),
+    ("gmail-assistant", "read_email.py", ["{message}"]),
+    ("gmail-assistant", "get_contacts.py", ["--format", "json"]),
+    ("gmail-assistant", "send_email.py", ["--to", "{contact}", "--subject", "Benchmark", "--body", "Hello"]),
+    ("google-calendar", "list_events.py", ["--max", "50"]),
+    ("google-calendar", "create_event.py", ["--summary", "Benchmark", "--start", "2030-01-07T10:00:00",
+                                            "--duration", "30"]),
+    ("google-calendar", "update_event.py", ["{event}", "--summary", "Benchmark"]),
+    ("google-drive", "list_files.py", ["--max", "100"]),
+    ("google-drive", "upload_file.py", ["{upload}"]),
+    ("google-drive", "download_file.py", ["{file}", "--output", "{tmp}/download-{run}"]),
+    ("google-sheets", "read_sheet.py", ["{spreadsheet}"]),
+    ("google-sheets", "append_row.py", ["{spreadsheet}", "--row", '["Benchmark", "1", "2"]']),
+    ("google-docs", "read_doc.py", ["{document}"]),
+    ("google-docs", "append_text.py", ["{document}", "Benchmark"]),
+    ("google-places", "search_places.py", ["cafe in Lausanne"]),
+    ("google-places", "place_details.py", ["{place}"]),
+]
+
+
+def start_server(args):
+    """Start fake-google-api.py on a free port; returns (process, base URL)."""
+    cmd = [sys.executable, str(SERVER_SCRIPT), "--port", "0", "--latency-ms", str(args.latency_ms),
+           "--jitter-ms", str(args.jitter_ms), "--error-rate", str(args.error_rate),
+           "--messages", str(args.messages), "--files", str(args.files), "--seed", str(args.seed)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if "listening on" not in line:
+        proc.kill()
+        raise SystemExit(f"fake-google-api.py did not start: {line.strip()}")
+    return proc, line.split("listening on ")[1].split()[0]
+
+
+def server_call(base, path, method="GET"):
+    request = urllib.request.Request(f"{base}/{path}", method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def run_script(path, argv, env):
+    """Run a script once; returns (wall ms, ok, first error line)."""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, str(path)] + argv, env=env, capture_output=True, text=True)
+    wall = (time.perf_counter() - t0) * 1000
+    output = proc.stdout + proc.stderr
+    error = next((l for l in output.splitlines() if l.startswith(("Error", "Traceback"))), None)
+    if proc.returncode != 0 and error is None:
+        error = f"exit {proc.returncode}: {output.strip().splitlines()[-1] if output.strip() else ''}"
+    return wall, proc.returncode == 0 and error is None, error
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def run_scenario(base, skill, script, template, fixtures, args, env):
+    path = SKILLS_DIR / skill / "scripts" / script
+    runs = [[a.format(run=n, **fixtures) for a in template] for n in range(args.repeat)]
+    server_call(base, "_stats/reset", "POST")
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda argv: run_script(path, argv, env), runs))
+    elapsed = time.perf_counter() - t0
+    stats = server_call(base, "_stats")
+
+    latencies = [wall for wall, _, _ in results]
+    errors = [error for _, ok, error in results if not ok]
+    return {
+        "runs": len(results),
+        "failed": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(percentile(latencies, 0.5), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "max_ms": round(max(latencies), 1),
+        "api_calls": stats["requests"],
+        "api_errors": stats["errors"],
+        "calls_per_run": round(stats["requests"] / len(results), 1),
+        "calls_per_s": round(stats["requests"] / elapsed, 1) if elapsed else 0.0,
+        "runs_per_s": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "wall_s": round(elapsed, 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "-C", str(SCRIPT_DIR), "describe", "--always", "--dirty"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print per-script latency changes against an earlier run."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nCompared to {baseline_path} ({baseline.get('revision') or 'unknown revision'}):")
+    comparable = baseline.get("server") == results["server"]
+    if not comparable:
+        print("  (different server settings: latencies are not directly comparable)")
+    for name, stats in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        change = stats["p50_ms"] / old["p50_ms"] - 1 if old["p50_ms"] else 0
+        calls = stats["calls_per_run"] - old["calls_per_run"]
+        flag = "  REGRESSION" if comparable and (change > 0.10 or calls > 0) else ""
+        print(f"  {name:40s} p50 {change:+7.1%}  calls/run {calls:+5.1f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Google skill scripts against the fake API server")
+    parser.add_argument("--skills", help="Comma-separated skills to run (default: all)")
+    parser.add_argument("--scripts", help="Comma-separated script names to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Runs in flight at once (default: 1)")
+    parser.add_argument("--server", help="Base URL of a running fake server (default: start one)")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Server latency per request (default: 30)")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Server latency jitter (default: 10)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failed with 429/500")
+    parser.add_argument("--messages", type=int, default=5000, help="Synthetic Gmail messages (default: 5000)")
+    parser.add_argument("--files", type=int, default=2000, help="Synthetic Drive files (default: 2000)")
+    parser.add_argument("--upload-kb", type=int, default=512, help="Size of the uploaded test file (default: 512)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    skills = set(filter(None, (args.skills or "").split(",")))
+    scripts = set(filter(None, (args.scripts or "").split(",")))
+    scenarios = [s for s in SCENARIOS if (not skills or s[0] in skills) and (not scripts or s[1] in scripts)]
+    if not scenarios:
+        parser.error("no scenario matches --skills/--scripts")
+
+    server = None
+    base = args.server.rstrip("/") if args.server else None
+    if base is None:
+        server, base = start_server(args)
+    try:
+        with tempfile.TemporaryDirectory(prefix="skills-bench-") as tmp:
+            upload = Path(tmp) / "upload.bin"
+            upload.write_bytes(os.urandom(args.upload_kb * 1024))
+            # "messages": [...] -> {message}: the first ID of each kind
+            fixtures = {kind[:-1]: ids[0] for kind, ids in server_call(base, "_fixtures").items() if ids}
+            fixtures.update(upload=str(upload), tmp=tmp)
+            # A fresh Gmail store and contact index: the first run of a script syncs
+            # them, later runs fetch only changes
+            env = dict(os.environ, GOOGLE_API_BASE_URL=base, SKILLS_DAEMON="off",
+                       GMAIL_STORE_PATH=str(Path(tmp) / "gmail-store.sqlite3"),
+                       CONTACT_INDEX_PATH=str(Path(tmp) / "contacts.sqlite3"))
+            env.pop("GOOGLE_API_TRACE", None)
+
+            print(f"Skills benchmark against {base}: latency {args.latency_ms:g}±{args.jitter_ms:g} ms, "
+                  f"error rate {args.error_rate:g}, {args.repeat} runs x {args.concurrency} concurrent")
+            print(f"  {'script':40s} {'runs':>5s} {'fail':>5s} {'p50':>9s} {'p95':>9s} {'max':>9s} "
+                  f"{'calls/run':>9s} {'calls/s':>8s}")
+            results = {}
+            for skill, script, template in scenarios:
+                name = f"{skill}/{script}"
+                r = results[name] = run_scenario(base, skill, script, template, fixtures, args, env)
+                print(f"  {name:40s} {r['runs']:5d} {r['failed']:5d} {r['p50_ms']:7.1f}ms {r['p95_ms']:7.1f}ms "
+                      f"{r['max_ms']:7.1f}ms {r['calls_per_run']:9.1f} {r['calls_per_s']:8.1f}")
+                if r["first_error"]:
+                    print(f"    first failure: {r['first_error'][:150]}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    per_skill = {}
+    for name, r in results.items():
+        s = per_skill.setdefault(name.split("/")[0], {"runs": 0, "failed": 0, "api_calls": 0, "wall_s": 0.0})
+        for key in s:
+            s[key] += r[key]
+    print(f"\n  {'skill':40s} {'runs':>5s} {'fail':>5s} {'calls':>7s} {'calls/s':>8s}")
+    for skill, s in per_skill.items():
+        s["calls_per_s"] = round(s["api_calls"] / s["wall_s"], 1) if s["wall_s"] else 0.0
+        print(f"  {skill:40s} {s['runs']:5d} {s['failed']:5d} {s['api_calls']:7d} {s['calls_per_s']:8.1f}")
+
+    output = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "server": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "error_rate": args.error_rate,
+                   "messages": args.messages, "files": args.files, "external": bool(args.server)},
+        "repeat": args.repeat,
+        "concurrency": args.concurrency,
+        "scenarios": results,
+        "skills": per_skill,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(output, indent=2))
+        print(f"\nResults saved to: {args.output}")
+    if args.compare:
+        compare(output, args.compare)
+    if any(r["failed"] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Skills daemon
+Keeps the Google skill scripts imported, with their credentials and API
+services warm, and runs them on behalf of thin clients over a Unix socket.
+
+Every skill script calls skills_client.forward_to_daemon() before its own
+imports: when the daemon is up, the script's main() runs here with the
+caller's arguments and working directory, and the client prints the
+captured output and exits with the same status. When it is not, the client
+starts it in the background and runs the script itself this one time.
+
+A call runs here only if the caller's ROUTING_ENV settings (API base URL,
+tracing, store paths) match the daemon's own; otherwise the daemon declines
+it and the client runs the script itself. Clients start the daemon without
+those settings, so it always serves the real API and the default stores.
+
+Calls run one at a time: scripts share sys.argv/sys.stdout and the HTTP
+connections behind the services are not thread-safe. A call runs on its own
+thread so the daemon keeps answering; one that arrives while another is
+running is declined, and its client runs the script itself instead of
+waiting. A stop request lets the running call finish.
+
+Usage:
+  python3 skills-daemon.py serve     # run in the foreground (clients start it on demand)
+  python3 skills-daemon.py status    # uptime and per-script call latency
+  python3 skills-daemon.py stop
+
+Environment:
+  SKILLS_DAEMON=off|auto|on  off: never forward; auto (default): start the daemon on demand;
+                             on: forward only, never start it
+  SKILLS_DAEMON_TIMING=1     clients print daemon and round-trip latency to stderr
+  SKILLS_DAEMON_IDLE=SECS    exit after this long without calls (default 1800)
+"""
+
+import argparse
+import fcntl
+import importlib.util
+import io
+import json
+import math
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+WORKSPACE_DIR = Path(__file__).resolve().parent.parent
+SKILLS_DIR = WORKSPACE_DIR / "skills"
+SOCKET_PATH = WORKSPACE_DIR / "cache" / "skills-daemon.sock"
+LOCK_PATH = WORKSPACE_DIR / "cache" / "skills-daemon.lock"
+LOG_PATH = WORKSPACE_DIR / "output" / "skills-daemon.log"
+IDLE_SECONDS = int(os.environ.get("SKILLS_DAEMON_IDLE", 1800))
+# Kept in step with skills_client.ROUTING_ENV
+ROUTING_ENV = ("GOOGLE_API_BASE_URL", "GOOGLE_API_TRACE", "GMAIL_STORE_PATH", "CONTACT_INDEX_PATH")
+
+
+def log(message):
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOG_PATH, "a") as f:
+        f.write(f"{datetime.now(timezone.utc).isoformat(timespec='seconds')} {message}\n")
+
+
+# --- Script loading ----------------------------------------------------------------
+#
+# Each skill keeps its own copy of google_auth.py (or gmail_auth.py), so the
+# same module name means different files in different skills. A skill's
+# scripts and helper modules are imported once and kept per skill
+# directory; before a call, that skill's modules are put back into
+# sys.modules (and everyone else's taken out) so imports inside functions
+# resolve to the right copy. A skill is re-imported when any of its .py
+# files changes on disk.
+
+class Skill:
+    def __init__(self, scripts_dir):
+        self.dir = scripts_dir
+        self.modules = {}
+        self.mtimes = self.snapshot()
+
+    def snapshot(self):
+        return {p.name: p.stat().st_mtime_ns for p in self.dir.glob("*.py")}
+
+    def activate(self):
+        for name in [n for n, m in sys.modules.items() if skill_dir(m) is not None]:
+            del sys.modules[name]
+        sys.modules.update(self.modules)
+
+    def collect(self):
+        """Keep the skill's helper modules imported so far (including ones imported lazily)."""
+        for name, module in list(sys.modules.items()):
+            if skill_dir(module) == self.dir:
+                self.modules.setdefault(name, module)
+
+    def script(self, path):
+        """Return the imported module for a script of this skill."""
+        name = f"__skill__{path.stem}"
+        module = self.modules.get(name)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self.modules[name] = module
+            self.collect()
+        return module
+
+
+skills = {}
+# Held while a call runs
+running = threading.Lock()
+
+
+def skill_dir(module):
+    """The skill scripts directory a module was loaded from, or None."""
+    path = getattr(module, "__file__", None)
+    if path is None:
+        return None
+    parent = Path(path).parent
+    return parent if parent.parent.parent == SKILLS_DIR else None
+
+
+def load_skill(scripts_dir):
+    skill = skills.get(scripts_dir)
+    if skill is not None and skill.snapshot() != skill.mtimes:
+        log(f"reloading {scripts_dir.parent.name}")
+        skill = None
+    if skill is None:
+        skill = skills[scripts_dir] = Skill(scripts_dir)
+    skill.activate()
+    return skill
+
+
+# --- Calls -------------------------------------------------------------------------
+
+def run_script(request):
+    """Run a script's main() with the caller's argv and cwd; returns the response dict."""
+    path = Path(request["script"]).resolve()
+    if path.parent.parent.parent != SKILLS_DIR or path.suffix != ".py":
+        return {"stdout": "", "stderr": f"skills-daemon: not a skill script: {path}\n", "exit": 2}
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_argv, saved_stdin, saved_cwd = sys.argv, sys.stdin, os.getcwd()
+    code = 0
+    try:
+        os.chdir(request["cwd"])
+        sys.argv = [str(path)] + request["argv"]
+        sys.stdin = io.StringIO()
+        sys.path.insert(0, str(path.parent))
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            skill = load_skill(path.parent)
+            try:
+                skill.script(path).main()
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                if e.code is not None and not isinstance(e.code, int):
+                    print(e.code, file=sys.stderr)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            skill.collect()
+    finally:
+        if sys.path and sys.path[0] == str(path.parent):
+            del sys.path[0]
+        sys.argv, sys.stdin = saved_argv, saved_stdin
+        os.chdir(saved_cwd)
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit": code}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def status(started, latencies):
+    scripts = {}
+    for name, ms in sorted(latencies.items()):
+        scripts[name] = {"calls": len(ms), "p50_ms": round(percentile(ms, 0.5), 1),
+                         "p95_ms": round(percentile(ms, 0.95), 1), "max_ms": round(max(ms), 1)}
+    api = defaultdict(float)
+    # A call may be importing modules on its own thread
+    for skill in list(skills.values()):
+        for module in list(skill.modules.values()):
+            if callable(getattr(module, "executor_stats", None)):
+                for key, value in module.executor_stats().items():
+                    api[key] += value
+    return {"pid": os.getpid(), "uptime_s": round(time.monotonic() - started),
+            "skills": sorted(p.parent.name for p in skills), "scripts": scripts, "api": api}
+
+
+def reply(conn, response):
+    try:
+        conn.sendall(json.dumps(response).encode() + b"\n")
+    except OSError:
+        pass  # client went away; a call already ran
+
+
+def run_call(conn, request, latencies):
+    """Run a call on its own thread, answer it and release `running`."""
+    try:
+        with conn:
+            t0 = time.perf_counter()
+            response = run_script(request)
+            elapsed = (time.perf_counter() - t0) * 1000
+            response["elapsed_ms"] = round(elapsed, 1)
+            name = f"{Path(request['script']).parent.parent.name}/{Path(request['script']).name}"
+            latencies[name].append(elapsed)
+            log(f"{name} exit={response['exit']} {elapsed:.1f}ms")
+            reply(conn, response)
+    except Exception:
+        log(f"request failed: {traceback.format_exc()}")
+    finally:
+        running.release()
+
+
+def handle(conn, started, latencies):
+    """Serve one request, handing a call to its own thread; returns False when the daemon should stop."""
+    handed_off = False
+    try:
+        with conn.makefile("rb") as reader:
+            line = reader.readline()
+        if not line:
+            return True
+        request = json.loads(line)
+        cmd = request.get("cmd", "run")
+        if cmd == "status":
+            response = status(started, latencies)
+        elif cmd == "stop":
+            response = {"stopping": True}
+        elif request.get("env") != {name: os.environ.get(name, "") for name in ROUTING_ENV}:
+            response = {"declined": True}
+            log(f"declined {request['script']}: caller's API/store settings differ")
+        elif not running.acquire(blocking=False):
+            response = {"declined": True}
+            log(f"declined {request['script']}: busy with another call")
+        else:
+            threading.Thread(target=run_call, args=(conn, request, latencies)).start()
+            handed_off = True
+            return True
+        reply(conn, response)
+        return cmd != "stop"
+    finally:
+        if not handed_off:
+            conn.close()
+
+
+def serve():
+    SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    lock = open(LOCK_PATH, "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print("skills-daemon is already running")
+        return
+
+    try:
+        SOCKET_PATH.unlink()
+    except FileNotFoundError:
+        pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(str(SOCKET_PATH))
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    server.settimeout(IDLE_SECONDS)
+    log(f"started pid={os.getpid()} socket={SOCKET_PATH}")
+
+    started = time.monotonic()
+    latencies = defaultdict(list)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                if running.locked():
+                    continue
+                log(f"idle for {IDLE_SECONDS}s, exiting")
+                break
+            conn.settimeout(None)
+            try:
+                if not handle(conn, started, latencies):
+                    log("stop requested")
+                    break
+            except Exception:
+                log(f"request failed: {traceback.format_exc()}")
+    finally:
+        server.close()
+        SOCKET_PATH.unlink(missing_ok=True)
+
+
+def send(request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(SOCKET_PATH))
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as reader:
+            return json.loads(reader.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm daemon for the Google skill scripts")
+    parser.add_argument("command", choices=["serve", "status", "stop"])
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve()
+        return
+
+    try:
+        response = send({"cmd": args.command})
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("skills-daemon is not running")
+        sys.exit(1)
+
+    if args.command == "stop":
+        print("skills-daemon stopped")
+        return
+
+    print(f"skills-daemon pid {response['pid']}, up {response['uptime_s']}s, "
+          f"skills loaded: {', '.join(response['skills']) or 'none'}")
+    if response["scripts"]:
+        print(f"  {'script':40s} {'calls':>6s} {'p50':>9s} {'p95':>9s} {'max':>9s}")
+    for name, s in response["scripts"].items():
+        print(f"  {name:40s} {s['calls']:6d} {s['p50_ms']:7.1f}ms {s['p95_ms']:7.1f}ms {s['max_ms']:7.1f}ms")
+    api = response["api"]
+    if api:
+        print(f"Google API: {api['requests']:.0f} requests, {api['retries']:.0f} retries, "
+              f"{api['backoff_seconds']:.1f}s backoff, {api['throttled_seconds']:.1f}s throttled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Skills startup benchmark
+Times how long every Google skill script takes to start, measured on `--help`
+with daemon forwarding off, and fails when a script goes over its import
+budget or pulls in a heavy client library before it makes a call.
+
+Usage:
+  python3 skills-startup-bench.py                     # all skill scripts, default budget
+  python3 skills-startup-bench.py --budget-ms 40 --repeat 9
+  python3 skills-startup-bench.py --output startup.json --compare old.json
+  python3 skills-startup-bench.py --top 10            # heaviest imports of every script
+
+Import time comes from `python3 -X importtime`: the cumulative time of the
+script's top-level imports, minus what the interpreter imports for `-c pass`.
+Wall time is the whole `--help` process, minus the same baseline. Both are
+medians over --repeat runs.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+WORKSPACE_DIR = Path(__file__).resolve().parent.parent
+SKILLS_DIR = WORKSPACE_DIR / "skills"
+
+# Top-level packages a script may only import once it has work to do.
+HEAVY_MODULES = ("googleapiclient", "google", "httplib2", "requests", "httpx", "urllib3", "email.mime")
+DEFAULT_BUDGET_MS = 60.0
+
+
+def skill_scripts():
+    """The skill CLIs: scripts that define main() and run it as __main__.
+
+    Helper modules (google_auth.py, skills_client.py, gmail_store.py, ...)
+    are imported by the scripts and never run on their own, so they are left out.
+    """
+    scripts = []
+    for path in SKILLS_DIR.glob("*/scripts/*.py"):
+        source = path.read_text()
+        if re.search(r"^def main\(", source, re.M) and re.search(r"^if __name__ == ['\"]__main__['\"]", source, re.M):
+            scripts.append(path)
+    return sorted(scripts)
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip(" ")
+        depth = (len(name) - len(stripped) - 1) // 2
+        imports.append((stripped, int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def run_once(args, env):
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + args, env=env, cwd=WORKSPACE_DIR,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = (time.perf_counter() - t0) * 1000
+    return proc.returncode, wall, parse_importtime(proc.stderr)
+
+
+def measure(args, env, repeat):
+    """Median import and wall ms over `repeat` runs, plus the imports of the last run."""
+    import_ms, wall_ms = [], []
+    for _ in range(repeat):
+        code, wall, imports = run_once(args, env)
+        import_ms.append(sum(c for _, _, c, depth in imports if depth == 0) / 1000)
+        wall_ms.append(wall)
+    return code, statistics.median(import_ms), statistics.median(wall_ms), imports
+
+
+def heavy_imports(imports, baseline):
+    """The HEAVY_MODULES entries this run imported that the bare interpreter does not."""
+    names = {name for name, *_ in imports} - baseline
+    return [m for m in HEAVY_MODULES if any(n == m or n.startswith(m + ".") for n in names)]
+
+
+def heaviest(imports, baseline, top):
+    own = [(name, self_us) for name, self_us, _, _ in imports if name not in baseline]
+    return sorted(own, key=lambda x: -x[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark startup time of the Google skill scripts")
+    parser.add_argument("scripts", nargs="*", type=Path, help="Scripts to time (default: every skill script)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Import time allowed per script, over the interpreter baseline (default: {DEFAULT_BUDGET_MS:g})")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per script; the median is reported (default: 5)")
+    parser.add_argument("--top", type=int, default=0, help="List the N slowest imports of every script")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    env = dict(os.environ, SKILLS_DAEMON="off")
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    _, base_import, base_wall, base_imports = measure(["-c", "pass"], env, args.repeat)
+    baseline = {name for name, *_ in base_imports}
+    print(f"Interpreter baseline: {base_import:.1f} ms imports, {base_wall:.1f} ms wall "
+          f"(budget {args.budget_ms:g} ms per script, median of {args.repeat})")
+
+    previous = {}
+    if args.compare:
+        previous = json.loads(args.compare.read_text())["scripts"]
+
+    results, failures = {}, []
+    print(f"{'script':42s} {'imports':>9s} {'wall':>9s}")
+    for path in [p.resolve() for p in args.scripts] or skill_scripts():
+        name = f"{path.parent.parent.name}/{path.name}"
+        code, import_ms, wall_ms, imports = measure([str(path), "--help"], env, args.repeat)
+        import_ms, wall_ms = max(0.0, import_ms - base_import), max(0.0, wall_ms - base_wall)
+        heavy = heavy_imports(imports, baseline)
+        results[name] = {"import_ms": round(import_ms, 1), "wall_ms": round(wall_ms, 1), "heavy": heavy}
+
+        line = f"{name:42s} {import_ms:7.1f}ms {wall_ms:7.1f}ms"
+        if name in previous:
+            line += f"  ({import_ms - previous[name]['import_ms']:+.1f}ms)"
+        problems = []
+        if code != 0:
+            problems.append(f"--help exited {code}")
+        if import_ms > args.budget_ms:
+            problems.append("over budget")
+        if heavy:
+            problems.append(f"imports {', '.join(heavy)}")
+        if problems:
+            line += "  FAIL: " + "; ".join(problems)
+            failures.append(name)
+        print(line)
+        if problems or args.top:
+            for module, self_us in heaviest(imports, baseline, args.top or 5):
+                print(f"    {self_us / 1000:7.1f}ms  {module}")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "python": sys.version.split()[0],
+            "budget_ms": args.budget_ms,
+            "baseline": {"import_ms": round(base_import, 1), "wall_ms": round(base_wall, 1)},
+            "scripts": results,
+        }, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+    if failures:
+        print(f"{len(failures)} of {len(results)} scripts failed the startup budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
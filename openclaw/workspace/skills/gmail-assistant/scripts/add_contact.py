@@ -4,6 +4,10 @@
 Usage:
     python3 add_contact.py --name "Contact Name" --email "email@example.com"
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 from gmail_auth import get_people_service
 
@@ -22,6 +26,10 @@ def add_contact(name, email):
     
     result = service.people().createContact(body=contact).execute()
     
+    # Make the new address usable in send_email.py right away
+    import contact_index
+    contact_index.add_person(result)
+    
     return result
 
 def main():
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Send one templated email to a list of contacts (mail merge).
+
+Usage:
+    python3 bulk_send.py --recipients list.csv --subject "Hello {name}" --body-file template.txt
+    python3 bulk_send.py --recipients list.jsonl --subject "Agenda" --body "Hi {first_name}, ..." --attach agenda.pdf
+
+The recipients file is CSV with a header row, or JSON lines (.jsonl), with
+an `email` column; any column can be used in the subject and body as
+{column} (write {{ and }} for literal braces). Every recipient is checked
+against contacts once, before anything is sent, and a single unknown
+address stops the run.
+
+Messages are rendered as they are sent, by up to --workers threads under
+the Gmail quota that gmail_auth enforces. Each result is appended to a
+JSON-lines log (--log, default RECIPIENTS.log.jsonl), and recipients the
+log shows as sent are skipped, so an interrupted run is resumed by running
+the same command again.
+"""
+# Not forwarded to the skills daemon: it answers only when the script ends,
+# which would hide a long run's progress
+
+import argparse
+import csv
+import json
+import os
+import re
+import string
+import sys
+import threading
+from datetime import datetime, timezone
+from gmail_auth import authorized_http, error_status, get_gmail_service, rate_limited
+from send_email import build_message, send_message
+
+WORKERS = 4
+
+def read_recipients(path):
+    """Yield (line number, row) from a CSV file with a header row, or a JSON-lines file."""
+    with open(path, newline='') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    yield n, {k: '' if v is None else str(v) for k, v in json.loads(line).items()}
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                # Short rows leave trailing columns None; treat them as missing
+                yield reader.line_num, {k: v for k, v in row.items() if k is not None and v is not None}
+
+def template_fields(*templates):
+    """Names of the {fields} used in format-string templates."""
+    fields = set()
+    for template in templates:
+        for _, name, _, _ in string.Formatter().parse(template):
+            if name is not None:
+                fields.add(re.split(r'[.\[]', name)[0])
+    return fields
+
+def check_recipients(path, fields):
+    """Addresses in the recipients file, in order and without repeats, plus a list of row problems.
+
+    Each email must be one address, as contact_index.parse_recipient()
+    accepts; the message is then sent to that parsed address only.
+    """
+    from contact_index import parse_recipient
+    addresses, seen, problems = [], set(), []
+    for n, row in read_recipients(path):
+        value = row.get('email', '').strip()
+        parsed = parse_recipient(value) if value else None
+        missing = sorted(fields - set(row))
+        if not value:
+            problems.append(f"line {n}: no email address")
+        elif parsed is None:
+            problems.append(f"line {n}: not a single email address: {value}")
+        elif missing:
+            problems.append(f"line {n}: no value for {', '.join(missing)}")
+        elif parsed[1].lower() not in seen:
+            seen.add(parsed[1].lower())
+            addresses.append(parsed[1])
+    return addresses, problems
+
+def load_log(path):
+    """Normalized addresses the log records as sent."""
+    from contact_index import normalize
+    sent = set()
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short when a run was killed
+                if entry.get('status') == 'sent':
+                    sent.add(normalize(entry['email']))
+    except FileNotFoundError:
+        pass
+    return sent
+
+def bulk_send(recipients, subject, body, attachments=None, log_path=None, workers=WORKERS,
+              force=False, dry_run=False):
+    """Send the rendered subject and body to every row of the recipients file; returns True if none failed."""
+    from contact_index import find_contacts, normalize, parse_recipient
+    from email.utils import formataddr
+
+    log_path = log_path or f"{recipients}.log.jsonl"
+    attachments = attachments or []
+    for file_path in attachments:
+        if not os.path.exists(file_path):
+            print(f"ERROR: Attachment not found: {file_path}")
+            return False
+
+    fields = template_fields(subject, body)
+    if any(not field or field.isdigit() for field in fields):
+        print("ERROR: Templates can only use named fields, like {name}")
+        return False
+    addresses, problems = check_recipients(recipients, fields)
+    if problems:
+        print(f"ERROR: Rows of {recipients} that can't be used ({len(problems)}):")
+        for problem in problems[:20]:
+            print(f"  - {problem}")
+        return False
+
+    print(f"Checking {len(addresses)} recipients against contacts...")
+    if not force:
+        known = find_contacts(addresses)
+        unknown = [a for a in addresses if normalize(a) not in known]
+        if unknown:
+            print("\n❌ SECURITY GUARDRAIL TRIGGERED")
+            print(f"The following recipients are NOT in your contacts ({len(unknown)}):")
+            for address in unknown[:20]:
+                print(f"  - {address}")
+            if len(unknown) > 20:
+                print(f"  ... and {len(unknown) - 20} more")
+            print("\nNothing sent. Add these contacts first, or use --force to override (not recommended).")
+            return False
+    print("✓ All recipients validated against contacts")
+
+    done = load_log(log_path)
+    pending = [a for a in addresses if normalize(a) not in done]
+    if len(pending) < len(addresses):
+        print(f"Skipping {len(addresses) - len(pending)} recipients already sent to (see {log_path})")
+
+    def rendered():
+        """(address, To header, subject, body) for each pending recipient, rendered as it is needed."""
+        todo = {normalize(a) for a in pending}
+        for _, row in read_recipients(recipients):
+            # Rows were checked above; one edited since then is skipped rather than sent unchecked
+            parsed = parse_recipient(row.get('email', ''))
+            if parsed and parsed[1].lower() in todo and not fields - set(row):
+                todo.discard(parsed[1].lower())
+                yield parsed[1], formataddr(parsed), subject.format_map(row), body.format_map(row)
+
+    if dry_run:
+        print(f"\n🔍 DRY RUN - {len(pending)} emails would be sent. The first one:")
+        for _, to, first_subject, first_body in rendered():
+            print(f"To: {to}\nSubject: {first_subject}\n\nBody:\n{first_body}")
+            if attachments:
+                print(f"\nAttachments: {', '.join(os.path.basename(a) for a in attachments)}")
+            break
+        return True
+
+    service = get_gmail_service()
+    local = threading.local()
+
+    def send(to, message_subject, message_body):
+        # httplib2 connections are not thread-safe; each worker opens its own
+        if getattr(local, 'http', None) is None:
+            local.http = authorized_http()
+        message, files = build_message(to, message_subject, message_body, attachments=attachments)
+        return send_message(service, message, files, http=local.http)
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    sent = failed = 0
+    stopped = False
+    # At most 2 messages per worker are rendered and waiting at any time
+    running = {}
+    with open(log_path, 'a') as log, ThreadPoolExecutor(workers) as pool:
+
+        def record(future):
+            nonlocal sent, failed, stopped
+            to = running.pop(future)
+            entry = {'ts': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'email': to}
+            try:
+                entry.update(status='sent', id=future.result()['id'])
+                sent += 1
+                print(f"✓ {to}")
+            except Exception as e:
+                entry.update(status='failed', error=str(e))
+                failed += 1
+                print(f"✗ {to}: {e}")
+                # Still rate limited after all retries: the daily sending limit is likely used up
+                quota = error_status(e) == 429 or (error_status(e) == 403 and rate_limited(e))
+                if quota and not stopped:
+                    stopped = True
+                    print("Gmail's sending limit was reached; run the same command later to send the rest.")
+            log.write(json.dumps(entry) + '\n')
+            log.flush()
+
+        for address, to, message_subject, message_body in rendered():
+            if stopped:
+                break
+            running[pool.submit(send, to, message_subject, message_body)] = address
+            while len(running) >= 2 * workers:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record(future)
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record(future)
+
+    print(f"\nSent {sent}, failed {failed}, {len(pending) - sent - failed} not attempted. Log: {log_path}")
+    return failed == 0
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Send a templated email to a list of contacts',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+SECURITY NOTES:
+  Every recipient must be in your Google Contacts, as with send_email.py.
+  The whole list is checked before the first email goes out.
+
+  Use --force to bypass (not recommended).
+        """
+    )
+    parser.add_argument('--recipients', required=True, help='CSV (with header) or .jsonl file with an email column')
+    parser.add_argument('--subject', required=True, help='Subject template, e.g. "Hello {name}"')
+    parser.add_argument('--body', help='Body template')
+    parser.add_argument('--body-file', help='Read the body template from file')
+    parser.add_argument('--attach', action='append', help='Attach file to every email (can be used multiple times)')
+    parser.add_argument('--log', help='Result log to resume from (default: RECIPIENTS.log.jsonl)')
+    parser.add_argument('--workers', type=int, default=WORKERS, help=f'Emails sent at once (default: {WORKERS})')
+    parser.add_argument('--force', action='store_true',
+                       help='DANGEROUS: Skip contact validation')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Check the list and show the first email without sending')
+    args = parser.parse_args()
+
+    if args.body_file:
+        with open(args.body_file, 'r') as f:
+            body = f.read()
+    else:
+        body = args.body or ""
+
+    success = bulk_send(
+        args.recipients,
+        args.subject,
+        body,
+        attachments=args.attach,
+        log_path=args.log,
+        workers=max(1, args.workers),
+        force=args.force,
+        dry_run=args.dry_run
+    )
+
+    sys.exit(0 if success else 1)
+
+if __name__ == '__main__':
+    main()
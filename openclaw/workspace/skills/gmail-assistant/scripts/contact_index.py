@@ -0,0 +1,177 @@
+"""Local index of Google Contacts email addresses.
+
+Maps lowercase email addresses to contact names in SQLite, so validating
+recipients or searching contacts doesn't download every contact. The first
+use lists all connections with requestSyncToken; after that every use
+sends the stored syncToken and applies only the people that changed
+(deleted ones are flagged in their metadata). Sync tokens expire after
+about a week, in which case the index is rebuilt with a full listing.
+"""
+import os
+import re
+import sqlite3
+from email.utils import parseaddr
+from pathlib import Path
+from gmail_auth import API_BASE_URL, WORKSPACE_DIR, error_status, get_people_service
+
+# Contacts from a fake API server (GOOGLE_API_BASE_URL) are kept apart from the real ones
+INDEX_PATH = Path(os.environ.get('CONTACT_INDEX_PATH') or
+                  WORKSPACE_DIR / "cache" / f"contacts{'-fake' if API_BASE_URL else ''}.sqlite3")
+PERSON_FIELDS = 'names,emailAddresses,metadata'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    email TEXT NOT NULL,     -- normalized, see normalize()
+    resource_name TEXT NOT NULL,
+    address TEXT NOT NULL,   -- as entered in Contacts
+    name TEXT NOT NULL,
+    PRIMARY KEY (email, resource_name)
+);
+CREATE INDEX IF NOT EXISTS contacts_by_person ON contacts (resource_name);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# One address: nothing on either side of the @ that could start another address, a group or a comment
+ADDRESS = r'[^\s@<>()\[\],;:"\\]+@[^\s@<>()\[\],;:"\\]+'
+RECIPIENT = re.compile(rf'(?P<bare>{ADDRESS})|(?P<name>[^<>@,;:"\\\r\n]*?)\s*<(?P<address>{ADDRESS})>')
+
+def parse_recipient(text):
+    """(name, address) of a bare 'x@y.com' or a plain 'Name <x@y.com>', or None for anything else.
+
+    Stricter than parseaddr(), which picks one address out of lists and
+    malformed input: the address checked against contacts must be the one
+    that ends up in the header.
+    """
+    m = RECIPIENT.fullmatch(text.strip())
+    if m is None:
+        return None
+    if m['bare']:
+        return '', m['bare']
+    return m['name'].strip(), m['address']
+
+def normalize(address):
+    """Lowercase bare address of 'x@y.com' or 'Name <x@y.com>'."""
+    return parseaddr(address)[1].strip().lower()
+
+def connect(path=INDEX_PATH):
+    """Open the index, creating it if needed; transactions are explicit."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def stored_sync_token(conn):
+    row = conn.execute("SELECT value FROM meta WHERE key = 'sync_token'").fetchone()
+    return row[0] if row else None
+
+def person_rows(person):
+    """Index rows of a person; like Contacts' own listing, people need a name and an address."""
+    names = person.get('names', [])
+    if not names:
+        return []
+    name = names[0].get('displayName') or names[0].get('givenName', '')
+    return [(normalize(e['value']), person['resourceName'], e['value'], name)
+            for e in person.get('emailAddresses', []) if normalize(e.get('value', ''))]
+
+def replace_people(conn, people):
+    """Replace the rows of each person, dropping the ones flagged as deleted."""
+    for person in people:
+        conn.execute('DELETE FROM contacts WHERE resource_name = ?', (person['resourceName'],))
+        if not person.get('metadata', {}).get('deleted'):
+            conn.executemany('INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?)', person_rows(person))
+
+def expired_sync_token(error):
+    """True if a connections.list error means the sync token is too old to use."""
+    content = getattr(error, 'content', b'') or b''
+    return error_status(error) == 410 or (error_status(error) == 400 and b'EXPIRED_SYNC_TOKEN' in content)
+
+def sync(conn, service=None):
+    """Bring the index up to date: changes since the stored token, or everything if there is none."""
+    service = service or get_people_service()
+    token = stored_sync_token(conn)
+    full = token is None
+    people, page_token = [], None
+    while True:
+        try:
+            result = service.people().connections().list(
+                resourceName='people/me',
+                pageSize=1000,
+                personFields=PERSON_FIELDS,
+                requestSyncToken=True,
+                syncToken=None if full else token,
+                pageToken=page_token
+            ).execute()
+        except Exception as e:
+            if full or not expired_sync_token(e):
+                raise
+            full, people, page_token = True, [], None
+            continue
+        people += result.get('connections', [])
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            break
+
+    new_token = result.get('nextSyncToken', '')
+    if not full and not people and new_token == token:
+        return
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Another process synced meanwhile; its state is at least as new
+        if stored_sync_token(conn) != token:
+            conn.execute('ROLLBACK')
+            return
+        if full:
+            conn.execute('DELETE FROM contacts')
+        replace_people(conn, people)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('sync_token', ?)", (new_token,))
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+def find_contacts(addresses):
+    """Contact names of the given addresses that are in Contacts, keyed by normalized address."""
+    wanted = {normalize(a) for a in addresses} - {''}
+    conn = connect()
+    try:
+        sync(conn)
+        placeholders = ', '.join('?' * len(wanted))
+        return dict(conn.execute(f'SELECT email, name FROM contacts WHERE email IN ({placeholders})',
+                                 sorted(wanted))) if wanted else {}
+    finally:
+        conn.close()
+
+def search_contacts(text=None):
+    """Contacts whose name contains `text` (all contacts without it), as {'name', 'email'} sorted by name."""
+    conn = connect()
+    try:
+        sync(conn)
+        query = 'SELECT name, address FROM contacts'
+        params = []
+        if text:
+            query += " WHERE instr(lower(name), ?) > 0"
+            params.append(text.lower())
+        rows = conn.execute(query + ' ORDER BY name COLLATE NOCASE, address', params).fetchall()
+    finally:
+        conn.close()
+    return [{'name': name, 'email': address} for name, address in rows]
+
+def add_person(person):
+    """Index a person just created with createContact, before a sync would report it."""
+    conn = connect()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        replace_people(conn, [person])
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
+
+def reset():
+    """Forget the sync token, so the next use rebuilds the index from a full listing."""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM meta WHERE key = 'sync_token'")
+    finally:
+        conn.close()
@@ -2,58 +2,37 @@
 """Get contacts from Google People API.
 
 Usage:
-    python3 get_contacts.py [--format json|text] [--search NAME]
+    python3 get_contacts.py [--format json|text] [--search NAME] [--full-sync]
+
+Contacts come from a local index (contact_index.py) that each call brings
+up to date with only the changes since the previous one.
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
-from gmail_auth import get_people_service
+import contact_index
 
 def get_all_contacts():
-    """Fetch all contacts with email addresses."""
-    service = get_people_service()
-    contacts = []
-    
-    page_token = None
-    while True:
-        results = service.people().connections().list(
-            resourceName='people/me',
-            pageSize=1000,
-            personFields='names,emailAddresses',
-            pageToken=page_token
-        ).execute()
-        
-        connections = results.get('connections', [])
-        for person in connections:
-            names = person.get('names', [])
-            emails = person.get('emailAddresses', [])
-            
-            if names and emails:
-                name = names[0].get('displayName', '')
-                for email in emails:
-                    contacts.append({
-                        'name': name,
-                        'email': email.get('value', '')
-                    })
-        
-        page_token = results.get('nextPageToken')
-        if not page_token:
-            break
-    
-    return contacts
+    """All contacts with email addresses, from the local index (synced incrementally)."""
+    return contact_index.search_contacts()
 
 def main():
     parser = argparse.ArgumentParser(description='Get contacts from Google People API')
     parser.add_argument('--format', choices=['json', 'text'], default='text',
                        help='Output format')
     parser.add_argument('--search', help='Search for contact by name')
+    parser.add_argument('--full-sync', action='store_true',
+                       help='Rebuild the local contact index from a full listing')
     args = parser.parse_args()
     
-    contacts = get_all_contacts()
+    if args.full_sync:
+        contact_index.reset()
     
-    # Filter if search term provided
-    if args.search:
-        search_lower = args.search.lower()
-        contacts = [c for c in contacts if search_lower in c['name'].lower()]
+    # Filter by name if search term provided
+    contacts = contact_index.search_contacts(args.search)
     
     if args.format == 'json':
         print(json.dumps(contacts, indent=2))
@@ -0,0 +1,315 @@
+"""Local store of Gmail message metadata.
+
+Keeps the ID, thread, labels, From/Subject/Date and snippet of recent
+messages in SQLite, so repeated inbox checks don't re-list and re-fetch the
+same messages. The first use lists the newest INITIAL_SYNC messages, plus
+the newest LABEL_SYNC[label] messages of each label in LABEL_SYNC (all of
+them, in a mailbox with few unread messages); after that every use asks
+users.history.list what changed since the stored historyId and fetches
+only the messages it names. Gmail keeps about a week of history; when the
+stored historyId is older than that (404), the store starts over with a
+new initial sync.
+
+Below its "floor" (the oldest message listed) the store may miss messages;
+each label in LABEL_SYNC has a floor of its own, usually much older, and a
+floor of 0 means nothing is missing. search() answers a subset of Gmail
+search (see parse_query()) from the store. It returns None for any other
+query, or when matches below the floor could be missing, so the caller can
+ask Gmail instead; when the stored messages can't answer a query even
+before syncing, it returns None without syncing.
+"""
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from gmail_auth import API_BASE_URL, WORKSPACE_DIR, error_status, execute_batch
+
+# Mail from a fake API server (GOOGLE_API_BASE_URL) is kept apart from the real mailbox's
+STORE_PATH = Path(os.environ.get('GMAIL_STORE_PATH') or
+                  WORKSPACE_DIR / "cache" / f"gmail-store{'-fake' if API_BASE_URL else ''}.sqlite3")
+INITIAL_SYNC = 100
+# Labels whose newest messages are synced beyond INITIAL_SYNC, and how many
+LABEL_SYNC = {'UNREAD': 200}
+METADATA_HEADERS = ['From', 'Subject', 'Date']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT NOT NULL,
+    internal_date INTEGER NOT NULL,
+    labels TEXT NOT NULL,  -- ' INBOX UNREAD ', so a label matches with instr(labels, ' UNREAD ')
+    sender TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    date TEXT NOT NULL,
+    snippet TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_by_date ON messages (internal_date DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+def connect(path=STORE_PATH):
+    """Open the store, creating it if needed; transactions are explicit."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def get_meta(conn):
+    return dict(conn.execute('SELECT key, value FROM meta'))
+
+def set_meta(conn, **values):
+    conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                     [(key, str(value)) for key, value in values.items()])
+
+def commit(conn, history_id, apply):
+    """Run apply() in a write transaction, unless another process synced since `history_id` was read."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if get_meta(conn).get('history_id') != history_id:
+            conn.execute('ROLLBACK')
+            return False
+        apply()
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return True
+
+# --- Sync ------------------------------------------------------------------------------
+
+def to_row(msg):
+    headers = {h['name'].lower(): h['value'] for h in msg.get('payload', {}).get('headers', [])}
+    return (msg['id'], msg['threadId'], int(msg.get('internalDate', 0)), f" {' '.join(msg.get('labelIds', []))} ",
+            headers.get('from', ''), headers.get('subject', ''), headers.get('date', ''), msg.get('snippet', ''))
+
+def fetch(service, message_ids):
+    """Metadata rows for message IDs, plus the IDs Gmail no longer has; other failures raise."""
+    messages = service.users().messages()
+    requests = [messages.get(userId='me', id=message_id, format='metadata', metadataHeaders=METADATA_HEADERS)
+                for message_id in message_ids]
+    rows, gone = [], []
+    for message_id, (msg, error) in zip(message_ids, execute_batch(service, requests)):
+        if error is None:
+            rows.append(to_row(msg))
+        elif error_status(error) == 404:
+            gone.append(message_id)
+        else:
+            raise error
+    return rows, gone
+
+def list_ids(service, limit, label=None):
+    """IDs of the newest `limit` messages (with `label`), and whether that was all of them."""
+    message_ids, page_token = [], None
+    while len(message_ids) < limit:
+        result = service.users().messages().list(
+            userId='me',
+            maxResults=min(500, limit - len(message_ids)),
+            labelIds=[label] if label else None,
+            pageToken=page_token
+        ).execute()
+        message_ids += [m['id'] for m in result.get('messages', [])]
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            break
+    return message_ids, page_token is None
+
+def initial_sync(conn, service, stored_history_id):
+    """Replace the store's contents with the newest messages, and of each LABEL_SYNC label."""
+    # Taken before listing, so changes made while listing show up in the next delta sync
+    history_id = service.users().getProfile(userId='me').execute()['historyId']
+    listings = {None: list_ids(service, INITIAL_SYNC)}
+    listings.update((label, list_ids(service, limit, label)) for label, limit in LABEL_SYNC.items())
+    rows, _ = fetch(service, list(dict.fromkeys(i for ids, _ in listings.values() for i in ids)))
+    dates = {row[0]: row[2] for row in rows}
+
+    def floor(message_ids, complete):
+        """Messages older than this were not listed; a complete listing has them all."""
+        return 0 if complete else min((dates[i] for i in message_ids if i in dates), default=0)
+
+    def apply():
+        conn.execute('DELETE FROM messages')
+        conn.executemany('INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        conn.execute("DELETE FROM meta WHERE key LIKE 'floor%' OR key = 'complete'")
+        set_meta(conn, history_id=history_id,
+                 **{floor_key(label): floor(*listing) for label, listing in listings.items()})
+
+    commit(conn, stored_history_id, apply)
+
+def floor_key(label=None):
+    return f'floor:{label}' if label else 'floor'
+
+def keep(row, floors):
+    """Whether a fetched row falls in a synced window: above the floor, or above the floor of a label it has."""
+    return row[2] >= floors[None] or any(f' {label} ' in row[3] and row[2] >= floor
+                                         for label, floor in floors.items() if label)
+
+def stored_floors(meta):
+    """{None: floor, label: floor} from the meta values; a label never synced has the plain floor."""
+    floor = int(meta.get('floor', 0))
+    return {None: floor, **{label: int(meta.get(floor_key(label), floor)) for label in LABEL_SYNC}}
+
+def sync(conn, service):
+    """Bring the store up to date with Gmail; returns its meta values."""
+    meta = get_meta(conn)
+    stored_history_id = meta.get('history_id')
+    if stored_history_id is None:
+        initial_sync(conn, service, None)
+        return get_meta(conn)
+
+    changed, deleted, page_token = set(), set(), None
+    try:
+        while True:
+            result = service.users().history().list(
+                userId='me',
+                startHistoryId=stored_history_id,
+                maxResults=500,
+                pageToken=page_token
+            ).execute()
+            for record in result.get('history', []):
+                for item in record.get('messagesDeleted', []):
+                    deleted.add(item['message']['id'])
+                for kind in ('messagesAdded', 'labelsAdded', 'labelsRemoved'):
+                    changed.update(item['message']['id'] for item in record.get(kind, []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+    except Exception as e:
+        if error_status(e) != 404:
+            raise
+        initial_sync(conn, service, stored_history_id)
+        return get_meta(conn)
+
+    history_id = result['historyId']
+    if history_id == stored_history_id and not changed and not deleted:
+        return meta
+
+    # Fetch current metadata rather than replaying label changes, so the result
+    # doesn't depend on the order records were applied in
+    rows, gone = fetch(service, sorted(changed - deleted))
+    floors = stored_floors(meta)
+    # E.g. an old message marked read drops out of the unread window
+    dropped = [row[0] for row in rows if not keep(row, floors)]
+
+    def apply():
+        conn.executemany('DELETE FROM messages WHERE id = ?',
+                         [(message_id,) for message_id in deleted | set(gone) | set(dropped)])
+        conn.executemany('INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         [row for row in rows if keep(row, floors)])
+        set_meta(conn, history_id=history_id)
+
+    commit(conn, stored_history_id, apply)
+    return get_meta(conn)
+
+# --- Search ----------------------------------------------------------------------------
+
+# Search operator -> value -> (label, whether the message has it)
+LABEL_OPERATORS = {
+    'is': {'unread': ('UNREAD', True), 'read': ('UNREAD', False),
+           'starred': ('STARRED', True), 'important': ('IMPORTANT', True)},
+    'in': {'inbox': ('INBOX', True), 'sent': ('SENT', True), 'drafts': ('DRAFT', True)},
+    'label': {'inbox': ('INBOX', True), 'unread': ('UNREAD', True), 'starred': ('STARRED', True),
+              'important': ('IMPORTANT', True), 'sent': ('SENT', True), 'draft': ('DRAFT', True)},
+}
+TEXT_OPERATORS = {'from': 'sender', 'subject': 'subject'}
+TERM = re.compile(r'(-?)(\w+):("[^"]*"|\S+)|(\S+)')
+
+def label_condition(label, present):
+    return f"instr(labels, ' {label} ') {'>' if present else '='} 0"
+
+def parse_query(query):
+    """The store's version of a Gmail search, or None if the store can't answer it.
+
+    Understands is:/in:/label: with system labels, from:, subject:,
+    newer_than:/older_than: in days, and "-" negation of any of them. Free
+    text, OR, braces and other operators need Gmail's own search.
+
+    Returns (SQL condition, parameters, labels every match has, internal
+    date every match is newer than, in ms).
+    """
+    # Like Gmail, leave out spam and trash unless asked for (the store only
+    # sees them through history, so in:spam/in:trash are not supported)
+    conditions = [label_condition('SPAM', False), label_condition('TRASH', False)]
+    params, labels, since = [], set(), 0
+    for m in TERM.finditer(query or ''):
+        negate, operator, value, other = m.groups()
+        if other is not None:
+            return None
+        operator, value = operator.lower(), value.strip('"')
+        if operator in LABEL_OPERATORS:
+            label = LABEL_OPERATORS[operator].get(value.lower())
+            if label is None:
+                return None
+            condition = label_condition(*label)
+            if label[1] != bool(negate):
+                labels.add(label[0])
+        elif operator in TEXT_OPERATORS:
+            escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            condition = f"{TEXT_OPERATORS[operator]} LIKE ? ESCAPE '\\'"
+            params.append(f'%{escaped}%')
+        elif operator in ('newer_than', 'older_than'):
+            days = re.fullmatch(r'(\d+)d', value.lower())
+            if days is None:
+                return None
+            cutoff = int((time.time() - int(days.group(1)) * 86400) * 1000)
+            condition = f"internal_date {'>' if operator == 'newer_than' else '<='} ?"
+            params.append(cutoff)
+            if (operator == 'newer_than') != bool(negate):
+                since = max(since, cutoff)
+        else:
+            return None
+        conditions.append(f'NOT ({condition})' if negate else condition)
+    return ' AND '.join(conditions), params, labels, since
+
+def stored_matches(conn, meta, parsed, max_results):
+    """Rows matching a parsed query, newest first, and whether they are all Gmail would return.
+
+    Only messages above the floor count (the lowest floor of the labels
+    every match has), so a partial result never has gaps.
+    """
+    condition, params, labels, since = parsed
+    floors = stored_floors(meta)
+    floor = min([floors[None]] + [floors[label] for label in labels if label in floors])
+    rows = conn.execute(
+        'SELECT id, thread_id, snippet, sender, subject, date, labels FROM messages '
+        f'WHERE {condition} AND internal_date >= ? ORDER BY internal_date DESC LIMIT ?',
+        params + [floor, max_results]
+    ).fetchall()
+    # Short of max_results, the result is whole only if no match can be below the floor
+    return rows, len(rows) >= max_results or since >= floor
+
+def search(service, query, max_results):
+    """Messages matching a Gmail search from the store, newest first, or None to ask Gmail instead.
+
+    Returns the same dicts as list_emails.list_messages(). Syncs first, which
+    costs one history.list call plus a fetch of whatever changed, unless the
+    stored messages can't answer the query anyway (e.g. a search for a rare
+    sender), which then costs no calls.
+    """
+    parsed = parse_query(query)
+    if parsed is None:
+        return None
+    conn = connect()
+    try:
+        meta = get_meta(conn)
+        # A sync adds at most the few messages that arrived since the last
+        # one, so a store that falls short now would almost always still fall
+        # short after paying for it (a store never synced is synced once)
+        if 'history_id' in meta and not stored_matches(conn, meta, parsed, max_results)[1]:
+            return None
+        meta = sync(conn, service)
+        rows, whole = stored_matches(conn, meta, parsed, max_results)
+    finally:
+        conn.close()
+    if not whole:
+        return None  # more matches may be older than anything in the store
+    return [{
+        'id': message_id,
+        'threadId': thread_id,
+        'snippet': snippet,
+        'from': sender,
+        'subject': subject,
+        'date': date,
+        'unread': ' UNREAD ' in labels
+    } for message_id, thread_id, snippet, sender, subject, date, labels in rows]
@@ -2,7 +2,7 @@
 """List and search Gmail messages.
 
 Usage:
-    python3 list_emails.py [--query "SEARCH"] [--max-results N] [--unread-only]
+    python3 list_emails.py [--query "SEARCH"] [--limit N] [--unread-only] [--format text|json|jsonl]
     
 Examples:
     # List unread emails
@@ -12,57 +12,101 @@ Examples:
     python3 list_emails.py --query "from:alice@example.com"
     
     # List recent emails
-    python3 list_emails.py --max-results 10
+    python3 list_emails.py --limit 10
+
+    # Stream every match as JSON lines, one page at a time
+    python3 list_emails.py --query "older_than:30d is:unread" --format jsonl --limit 0
+
+Common queries (is:unread, from:, subject:, ...) are answered from the local
+message store (gmail_store.py), which only fetches what changed since the
+last call; --no-store always asks Gmail.
 """
+if __name__ == '__main__':
+    import sys
+    # The daemon answers with the whole output at once, which would defeat streaming
+    if 'jsonl' not in sys.argv[1:] and '--format=jsonl' not in sys.argv:
+        from skills_client import forward_to_daemon
+        forward_to_daemon(__file__)
+
 import argparse
 import json
+import sys
 from datetime import datetime
-from gmail_auth import get_gmail_service
+from gmail_auth import execute_batch, get_gmail_service
 
-def list_messages(query='', max_results=20, unread_only=False):
-    """List Gmail messages matching query."""
+PAGE_SIZE = 100
+
+def summarize(msg_detail):
+    """The listing fields of a message fetched with format='metadata'."""
+    headers = {h['name']: h['value'] for h in msg_detail['payload']['headers']}
+    return {
+        'id': msg_detail['id'],
+        'threadId': msg_detail['threadId'],
+        'snippet': msg_detail.get('snippet', ''),
+        'from': headers.get('From', ''),
+        'subject': headers.get('Subject', ''),
+        'date': headers.get('Date', ''),
+        'unread': 'UNREAD' in msg_detail.get('labelIds', [])
+    }
+
+def iter_messages(query='', max_results=20, unread_only=False, use_store=True):
+    """Yield Gmail messages matching query, newest first; max_results 0 means all of them.
+
+    Follows nextPageToken and fetches each page's metadata in batch requests
+    as the page arrives, so at most one page is held in memory.
+    """
     service = get_gmail_service()
     
     # Build query
     if unread_only:
         query = f"is:unread {query}".strip()
     
-    try:
+    if use_store and max_results:
+        import gmail_store
+        try:
+            stored = gmail_store.search(service, query, max_results)
+        except Exception as e:
+            print(f"Warning: message store unavailable, asking Gmail: {e}", file=sys.stderr)
+            stored = None
+        if stored is not None:
+            yield from stored
+            return
+    
+    listed, page_token = 0, None
+    while True:
         results = service.users().messages().list(
             userId='me',
             q=query,
-            maxResults=max_results
+            maxResults=min(PAGE_SIZE, max_results - listed) if max_results else PAGE_SIZE,
+            pageToken=page_token
         ).execute()
-        
         messages = results.get('messages', [])
         
-        if not messages:
-            return []
-        
-        # Fetch full message details
-        detailed_messages = []
-        for msg in messages:
-            msg_detail = service.users().messages().get(
+        # Fetch message details in batch requests
+        requests = [
+            service.users().messages().get(
                 userId='me',
                 id=msg['id'],
                 format='metadata',
                 metadataHeaders=['From', 'Subject', 'Date']
-            ).execute()
-            
-            headers = {h['name']: h['value'] for h in msg_detail['payload']['headers']}
-            
-            detailed_messages.append({
-                'id': msg_detail['id'],
-                'threadId': msg_detail['threadId'],
-                'snippet': msg_detail.get('snippet', ''),
-                'from': headers.get('From', ''),
-                'subject': headers.get('Subject', ''),
-                'date': headers.get('Date', ''),
-                'unread': 'UNREAD' in msg_detail.get('labelIds', [])
-            })
+            )
+            for msg in messages
+        ]
+        for msg, (msg_detail, error) in zip(messages, execute_batch(service, requests)):
+            if error is not None:
+                print(f"Warning: could not fetch message {msg['id']}: {error}", file=sys.stderr)
+                continue
+            yield summarize(msg_detail)
         
-        return detailed_messages
-    
+        listed += len(messages)
+        page_token = results.get('nextPageToken')
+        if not page_token or (max_results and listed >= max_results):
+            return
+
+def list_messages(query='', max_results=20, unread_only=False, use_store=True):
+    """List Gmail messages matching query."""
+    try:
+        return list(iter_messages(query, max_results, unread_only, use_store))
     except Exception as e:
         print(f"Error listing messages: {e}")
         return []
@@ -70,12 +114,24 @@ def list_messages(query='', max_results=20, unread_only=False):
 def main():
     parser = argparse.ArgumentParser(description='List Gmail messages')
     parser.add_argument('--query', default='', help='Gmail search query')
-    parser.add_argument('--max-results', type=int, default=20, help='Maximum results')
+    parser.add_argument('--limit', '--max-results', dest='max_results', type=int, default=20,
+                        help='Maximum results, 0 for no limit (default: 20)')
     parser.add_argument('--unread-only', action='store_true', help='Show only unread')
-    parser.add_argument('--format', choices=['json', 'text'], default='text')
+    parser.add_argument('--format', choices=['json', 'jsonl', 'text'], default='text',
+                        help='jsonl streams one message per line as pages arrive')
+    parser.add_argument('--no-store', action='store_true', help='Ask Gmail instead of the local message store')
     args = parser.parse_args()
     
-    messages = list_messages(args.query, args.max_results, args.unread_only)
+    if args.format == 'jsonl':
+        try:
+            for msg in iter_messages(args.query, args.max_results, args.unread_only, use_store=not args.no_store):
+                print(json.dumps(msg), flush=True)
+        except Exception as e:
+            print(f"Error listing messages: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    messages = list_messages(args.query, args.max_results, args.unread_only, use_store=not args.no_store)
     
     if args.format == 'json':
         print(json.dumps(messages, indent=2))
@@ -2,48 +2,222 @@
 """Read a specific Gmail message.
 
 Usage:
-    python3 read_email.py MESSAGE_ID [--mark-read]
+    python3 read_email.py MESSAGE_ID [--mark-read] [--max-bytes N]
+    python3 read_email.py MESSAGE_ID --save-attachments DIR [--attachment NAME ...]
+
+The body is the message's plain-text part, or its HTML part converted to
+text, cut at --max-bytes. Attachments are listed, not downloaded, unless
+--save-attachments is given. Text converted from HTML is cached per message
+(messages never change), so reading a newsletter again only fetches its
+headers.
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import base64
 import json
-from gmail_auth import get_gmail_service
-
-def get_message_body(payload):
-    """Extract message body from payload."""
-    body = ""
-    
-    if 'parts' in payload:
-        for part in payload['parts']:
-            if part['mimeType'] == 'text/plain':
-                if 'data' in part['body']:
-                    body += base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-            elif part['mimeType'] == 'text/html' and not body:
-                # Fallback to HTML if no plain text
-                if 'data' in part['body']:
-                    body += base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-            elif 'parts' in part:
-                # Recursive for nested parts
-                body += get_message_body(part)
-    elif 'body' in payload and 'data' in payload['body']:
-        body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
-    
-    return body
-
-def read_message(message_id, mark_read=False):
-    """Read a Gmail message by ID."""
+import os
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from gmail_auth import API_BASE_URL, WORKSPACE_DIR, get_gmail_service
+
+MAX_BODY_BYTES = 64 * 1024
+# Mail from a fake API server (GOOGLE_API_BASE_URL) is kept apart from the real mailbox's
+HTML_CACHE_DIR = WORKSPACE_DIR / "cache" / f"gmail-html-text{'-fake' if API_BASE_URL else ''}"
+HTML_CACHE_MAX_FILES = 1000
+# Base64 characters decoded per write when saving attachments (a multiple of 4)
+DECODE_CHUNK = 256 * 1024
+
+def walk_parts(payload):
+    """Yield the MIME parts of a payload depth-first, in document order."""
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        yield part
+        stack.extend(reversed(part.get('parts', [])))
+
+def is_attachment(part):
+    disposition = next((h['value'] for h in part.get('headers', []) if h['name'].lower() == 'content-disposition'), '')
+    return bool(part.get('filename')) or disposition.lower().startswith('attachment')
+
+def body_part(payload):
+    """The part to show as the body: the first inline text/plain part, else the first text/html one."""
+    html = None
+    for part in walk_parts(payload):
+        if is_attachment(part):
+            continue
+        if part['mimeType'] == 'text/plain':
+            return part
+        if part['mimeType'] == 'text/html' and html is None:
+            html = part
+    return html
+
+def list_attachments(payload):
+    """Metadata of the attachments in a payload; the data itself is fetched on demand."""
+    return [{
+        'partId': part.get('partId', ''),
+        'filename': part.get('filename', ''),
+        'mimeType': part['mimeType'],
+        'size': part.get('body', {}).get('size', 0),
+        'attachmentId': part.get('body', {}).get('attachmentId')
+    } for part in walk_parts(payload) if is_attachment(part)]
+
+def part_charset(part):
+    content_type = next((h['value'] for h in part.get('headers', []) if h['name'].lower() == 'content-type'), '')
+    match = re.search(r'charset="?([\w.:-]+)', content_type, re.IGNORECASE)
+    return match.group(1) if match else 'utf-8'
+
+def part_data(service, message_id, part):
+    """A part's base64url data, fetched with attachments.get when Gmail left it out of the message."""
+    body = part.get('body', {})
+    if 'data' in body:
+        return body['data']
+    if body.get('attachmentId'):
+        return service.users().messages().attachments().get(
+            userId='me',
+            messageId=message_id,
+            id=body['attachmentId']
+        ).execute()['data']
+    return ''
+
+def decode_text(service, message_id, part, max_bytes=0):
+    """Decode a text part, reading only the first max_bytes (+1, to detect the cut) when max_bytes is set."""
+    data = part_data(service, message_id, part)
+    if max_bytes:
+        data = data[:(max_bytes + 1 + 2) // 3 * 4]
+    raw = base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+    try:
+        return raw.decode(part_charset(part), errors='replace')
+    except LookupError:
+        return raw.decode('utf-8', errors='replace')
+
+def truncate(text, max_bytes):
+    """Cut text to at most max_bytes of UTF-8; returns (text, whether it was cut)."""
+    encoded = text.encode('utf-8')
+    if not max_bytes or len(encoded) <= max_bytes:
+        return text, False
+    return encoded[:max_bytes].decode('utf-8', errors='ignore'), True
+
+class HtmlText(HTMLParser):
+    """Plain text of an HTML body: block elements become line breaks, scripts and styles are dropped."""
+
+    BLOCKS = {'p', 'div', 'br', 'li', 'tr', 'table', 'ul', 'ol', 'blockquote', 'pre', 'hr',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article', 'header', 'footer'}
+    SKIPPED = {'script', 'style', 'head', 'title'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED:
+            self.skipping += 1
+        elif tag in self.BLOCKS:
+            self.chunks.append('\n- ' if tag == 'li' else '\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in self.BLOCKS and tag != 'li':
+            self.chunks.append('\n')
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.chunks.append(data)
+
+    def text(self):
+        lines = (' '.join(line.split()) for line in ''.join(self.chunks).splitlines())
+        return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def html_to_text(html):
+    parser = HtmlText()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+def html_cache_path(message_id):
+    # Message IDs are hex; anything else is not cached rather than used in a path
+    return HTML_CACHE_DIR / f"{message_id}.json" if re.fullmatch(r'[0-9A-Za-z_-]+', message_id) else None
+
+def load_html_text(message_id):
+    """The cached {'body', 'attachments'} of a message whose body came from HTML, or None."""
+    path = html_cache_path(message_id)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (TypeError, OSError, ValueError):
+        return None
+
+def save_html_text(message_id, body, attachments):
+    """Cache a message's converted body, dropping the oldest entries past HTML_CACHE_MAX_FILES."""
+    path = html_cache_path(message_id)
+    if path is None:
+        return
+    HTML_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        json.dump({'body': body, 'attachments': attachments}, f)
+    os.replace(tmp, path)
+    entries = sorted(HTML_CACHE_DIR.glob('*.json'), key=lambda p: p.stat().st_mtime)
+    for old in entries[:-HTML_CACHE_MAX_FILES]:
+        old.unlink(missing_ok=True)
+
+def save_attachment(service, message_id, part, directory):
+    """Fetch an attachment and write it into directory, decoding a chunk at a time; returns the path."""
+    name = Path(part.get('filename') or f"attachment-{part.get('partId', '')}").name
+    path = Path(directory) / name
+    n = 1
+    while path.exists():
+        path = Path(directory) / f"{Path(name).stem} ({n}){Path(name).suffix}"
+        n += 1
+    data = part_data(service, message_id, part)
+    with open(path, 'wb') as f:
+        for start in range(0, len(data), DECODE_CHUNK):
+            chunk = data[start:start + DECODE_CHUNK]
+            f.write(base64.urlsafe_b64decode(chunk + '=' * (-len(chunk) % 4)))
+    return path
+
+def read_message(message_id, mark_read=False, max_bytes=MAX_BODY_BYTES, save_to=None, only=None):
+    """Read a Gmail message by ID.
+
+    With save_to, also saves the attachments (or those whose filenames are
+    in `only`) there and lists the paths under 'saved'.
+    """
     service = get_gmail_service()
-    
+
     try:
-        msg = service.users().messages().get(
-            userId='me',
-            id=message_id,
-            format='full'
-        ).execute()
-        
+        cached = None if save_to else load_html_text(message_id)
+        if cached:
+            msg = service.users().messages().get(
+                userId='me',
+                id=message_id,
+                format='metadata',
+                metadataHeaders=['From', 'To', 'Subject', 'Date']
+            ).execute()
+            body, attachments = cached['body'], cached['attachments']
+        else:
+            msg = service.users().messages().get(
+                userId='me',
+                id=message_id,
+                format='full'
+            ).execute()
+            part = body_part(msg['payload'])
+            attachments = list_attachments(msg['payload'])
+            if part is None:
+                body = ''
+            elif part['mimeType'] == 'text/html':
+                body = html_to_text(decode_text(service, message_id, part))
+                save_html_text(message_id, body, attachments)
+            else:
+                body = decode_text(service, message_id, part, max_bytes)
+
         headers = {h['name']: h['value'] for h in msg['payload']['headers']}
-        body = get_message_body(msg['payload'])
-        
+        body, truncated = truncate(body, max_bytes)
+
         result = {
             'id': msg['id'],
             'threadId': msg['threadId'],
@@ -52,10 +226,20 @@ def read_message(message_id, mark_read=False):
             'subject': headers.get('Subject', ''),
             'date': headers.get('Date', ''),
             'body': body,
+            'truncated': truncated,
             'snippet': msg.get('snippet', ''),
-            'labels': msg.get('labelIds', [])
+            'labels': msg.get('labelIds', []),
+            'attachments': attachments
         }
-        
+
+        if save_to:
+            os.makedirs(save_to, exist_ok=True)
+            result['saved'] = [
+                str(save_attachment(service, message_id, part, save_to))
+                for part in walk_parts(msg['payload'])
+                if is_attachment(part) and (not only or part.get('filename') in only)
+            ]
+
         # Mark as read if requested
         if mark_read and 'UNREAD' in result['labels']:
             service.users().messages().modify(
@@ -64,25 +248,37 @@ def read_message(message_id, mark_read=False):
                 body={'removeLabelIds': ['UNREAD']}
             ).execute()
             result['labels'].remove('UNREAD')
-        
+
         return result
-    
+
     except Exception as e:
         print(f"Error reading message: {e}")
         return None
 
+def format_size(n):
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
 def main():
     parser = argparse.ArgumentParser(description='Read a Gmail message')
     parser.add_argument('message_id', help='Message ID to read')
     parser.add_argument('--mark-read', action='store_true', help='Mark message as read')
     parser.add_argument('--format', choices=['json', 'text'], default='text')
+    parser.add_argument('--max-bytes', type=int, default=MAX_BODY_BYTES,
+                        help=f'Cut the body at this many bytes, 0 for no limit (default: {MAX_BODY_BYTES})')
+    parser.add_argument('--save-attachments', metavar='DIR', help='Download the attachments into DIR')
+    parser.add_argument('--attachment', action='append', metavar='NAME',
+                        help='With --save-attachments, only this file (repeatable)')
     args = parser.parse_args()
-    
-    msg = read_message(args.message_id, args.mark_read)
-    
+
+    msg = read_message(args.message_id, args.mark_read, args.max_bytes, args.save_attachments, args.attachment)
+
     if not msg:
         exit(1)
-    
+
     if args.format == 'json':
         print(json.dumps(msg, indent=2))
     else:
@@ -92,6 +288,15 @@ def main():
         print(f"Date: {msg['date']}")
         print(f"\n{'-' * 80}\n")
         print(msg['body'])
+        if msg['truncated']:
+            print(f"\n[... cut at {args.max_bytes} bytes; use --max-bytes 0 for the full body]")
+        if msg['attachments']:
+            print(f"\nAttachments ({len(msg['attachments'])}):")
+            for attachment in msg['attachments']:
+                print(f"  - {attachment['filename'] or '(unnamed)'} ({attachment['mimeType']}, "
+                      f"{format_size(attachment['size'])})")
+        for path in msg.get('saved', []):
+            print(f"Saved: {path}")
 
 if __name__ == '__main__':
     main()
@@ -11,36 +11,48 @@ Usage:
     python3 send_email.py --to "email@example.com" --subject "Subject" --body-file message.txt
     python3 send_email.py --to "alice@example.com" --cc "bob@example.com" --subject "Subject" --body "Text"
     python3 send_email.py --to "kindle@example.com" --subject "Document" --attach "/path/to/file.pdf"
+
+The message is written to a temporary file with attachments base64-encoded a
+chunk at a time. Messages over RAW_SEND_MAX are uploaded from that file with
+a resumable upload, so memory use stays flat and a dropped connection
+resumes the upload where it stopped instead of starting over.
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import base64
 import json
-import mimetypes
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+import tempfile
+import uuid
 from gmail_auth import get_gmail_service
-from get_contacts import get_all_contacts
 
-def validate_recipients(recipients, contacts, force=False):
+# Bigger messages are uploaded in resumable chunks instead of sent as base64 'raw'
+RAW_SEND_MAX = 1024 * 1024
+UPLOAD_CHUNK = 4 * 1024 * 1024  # a multiple of 256 KB, as resumable uploads require
+# Attachment bytes encoded per write, a multiple of 57 so each makes whole 76-character lines
+ENCODE_CHUNK = 57 * 4096
+
+def validate_recipients(recipients, force=False):
     """
     Validate that all recipients are in contacts.
     
     Args:
-        recipients: List of email addresses
-        contacts: List of contact dicts with 'email' keys
+        recipients: List of 'x@y.com' or 'Name <x@y.com>' strings (see contact_index.parse_recipient)
         force: If True, skip validation
     
     Returns:
-        (valid, unknown_emails) tuple
+        (valid, unknown_emails) tuple; malformed recipients count as unknown
     """
     if force:
         return True, []
     
-    contact_emails = {c['email'].lower() for c in contacts}
-    unknown = [r for r in recipients if r.lower() not in contact_emails]
+    from contact_index import find_contacts, parse_recipient
+    parsed = {r: parse_recipient(r) for r in recipients}
+    known = find_contacts([p[1] for p in parsed.values() if p])
+    unknown = [r for r, p in parsed.items() if p is None or p[1].lower() not in known]
     
     return len(unknown) == 0, unknown
 
@@ -48,7 +60,92 @@ def parse_recipients(recipient_string):
     """Parse comma-separated email addresses."""
     if not recipient_string:
         return []
-    return [email.strip() for email in recipient_string.split(',')]
+    return [email.strip() for email in recipient_string.split(',') if email.strip()]
+
+def recipient_header(recipients):
+    """Header value listing validated recipients, rebuilt from their parsed name and address."""
+    from contact_index import parse_recipient
+    from email.utils import formataddr
+    return ', '.join(formataddr(parse_recipient(r)) for r in recipients) or None
+
+def attachment_part(file_path, placeholder):
+    """MIME part for an attachment, with `placeholder` standing in for its base64 content."""
+    import mimetypes
+    from email.mime.base import MIMEBase
+
+    filename = os.path.basename(file_path)
+    content_type, _ = mimetypes.guess_type(file_path)
+    if content_type is None:
+        content_type = 'application/octet-stream'
+    main_type, sub_type = content_type.split('/', 1)
+    
+    part = MIMEBase(main_type, sub_type)
+    part['Content-Transfer-Encoding'] = 'base64'
+    part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
+    part.set_payload(placeholder)
+    return part
+
+def write_message(f, message, files):
+    """Write message to the binary file f, streaming each (placeholder, path) file in as base64."""
+    data = message.as_bytes()
+    for placeholder, file_path in files:
+        before, data = data.split(placeholder.encode(), 1)
+        f.write(before)
+        with open(file_path, 'rb') as attachment:
+            chunk = attachment.read(ENCODE_CHUNK)
+            while chunk:
+                f.write(base64.encodebytes(chunk)[:-1])
+                chunk = attachment.read(ENCODE_CHUNK)
+                if chunk:
+                    f.write(b'\n')
+    f.write(data)
+
+def send_request(service, path):
+    """A messages.send request for the RFC 822 message in the file at path."""
+    messages = service.users().messages()
+    size = os.path.getsize(path)
+    if size <= RAW_SEND_MAX:
+        with open(path, 'rb') as f:
+            return messages.send(userId='me', body={'raw': base64.urlsafe_b64encode(f.read()).decode()})
+    
+    # Sent a chunk at a time, each retried on its own from where the server
+    # stopped (see ManagedRequest.execute_resumable() in gmail_auth)
+    from googleapiclient.http import MediaFileUpload
+    print(f"Uploading {size / 1024 / 1024:.1f} MB...")
+    media = MediaFileUpload(path, mimetype='message/rfc822', chunksize=UPLOAD_CHUNK, resumable=True)
+    return messages.send(userId='me', body={}, media_body=media)
+
+def build_message(to, subject, body, cc=None, bcc=None, attachments=()):
+    """MIME message for existing attachment paths, plus the (placeholder, path) pairs for write_message()."""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    message = MIMEMultipart()
+    if to:
+        message['to'] = to
+    if cc:
+        message['cc'] = cc
+    if bcc:
+        message['bcc'] = bcc
+    message['subject'] = subject
+    message.attach(MIMEText(body, 'plain'))
+    
+    files = []
+    for file_path in attachments:
+        placeholder = f"attachment-{uuid.uuid4().hex}"
+        message.attach(attachment_part(file_path, placeholder))
+        files.append((placeholder, file_path))
+    return message, files
+
+def send_message(service, message, files, http=None):
+    """Send a message from build_message() through a temporary file; returns Gmail's answer.
+
+    Threads pass their own connection as `http` (see gmail_auth.authorized_http()).
+    """
+    with tempfile.NamedTemporaryFile(suffix='.eml') as f:
+        write_message(f, message, files)
+        f.flush()
+        return send_request(service, f.name).execute(http=http)
 
 def send_email(to, subject, body, cc=None, bcc=None, attachments=None, force=False, dry_run=False):
     """Send email via Gmail API with optional attachments."""
@@ -62,13 +159,17 @@ def send_email(to, subject, body, cc=None, bcc=None, attachments=None, force=Fal
         print("ERROR: No recipients specified")
         return False
     
-    # Load contacts for validation
-    print("Loading contacts for validation...")
-    contacts = get_all_contacts()
-    print(f"Loaded {len(contacts)} contacts")
+    from contact_index import parse_recipient
+    malformed = [r for r in all_recipients if parse_recipient(r) is None]
+    if malformed:
+        print("ERROR: Each recipient must be a single address, like alice@example.com or Alice <alice@example.com>:")
+        for recipient in malformed:
+            print(f"  - {recipient}")
+        return False
     
-    # Validate recipients
-    valid, unknown = validate_recipients(all_recipients, contacts, force)
+    # Validate recipients against the local contact index
+    print("Checking recipients against contacts...")
+    valid, unknown = validate_recipients(all_recipients, force)
     
     if not valid:
         print("\n❌ SECURITY GUARDRAIL TRIGGERED")
@@ -80,44 +181,18 @@ def send_email(to, subject, body, cc=None, bcc=None, attachments=None, force=Fal
     
     print("✓ All recipients validated against contacts")
     
-    # Create message
-    message = MIMEMultipart()
-    message['to'] = to
-    if cc:
-        message['cc'] = cc
-    if bcc:
-        message['bcc'] = bcc
-    message['subject'] = subject
-    
-    # Add body
-    message.attach(MIMEText(body, 'plain'))
+    # Send exactly the addresses that were validated, not the text they were given as
+    to, cc, bcc = recipient_header(to_list), recipient_header(cc_list), recipient_header(bcc_list)
     
     # Add attachments
-    if attachments:
-        for file_path in attachments:
-            if not os.path.exists(file_path):
-                print(f"⚠️  Attachment not found: {file_path}")
-                continue
-            
-            filename = os.path.basename(file_path)
-            print(f"Attaching: {filename} ({os.path.getsize(file_path)} bytes)")
-            
-            # Guess MIME type
-            content_type, _ = mimetypes.guess_type(file_path)
-            if content_type is None:
-                content_type = 'application/octet-stream'
-            
-            main_type, sub_type = content_type.split('/', 1)
-            
-            with open(file_path, 'rb') as f:
-                part = MIMEBase(main_type, sub_type)
-                part.set_payload(f.read())
-            
-            encoders.encode_base64(part)
-            part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
-            message.attach(part)
-    
-    raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
+    found = []
+    for file_path in attachments or []:
+        if not os.path.exists(file_path):
+            print(f"⚠️  Attachment not found: {file_path}")
+            continue
+        print(f"Attaching: {os.path.basename(file_path)} ({os.path.getsize(file_path)} bytes)")
+        found.append(file_path)
+    message, files = build_message(to, subject, body, cc, bcc, found)
     
     if dry_run:
         print("\n🔍 DRY RUN - Email would be sent:")
@@ -133,12 +208,8 @@ def send_email(to, subject, body, cc=None, bcc=None, attachments=None, force=Fal
         return True
     
     # Send
-    service = get_gmail_service()
     try:
-        sent_message = service.users().messages().send(
-            userId='me',
-            body={'raw': raw}
-        ).execute()
+        sent_message = send_message(get_gmail_service(), message, files)
         
         print(f"\n✅ Email sent successfully!")
         print(f"Message ID: {sent_message['id']}")
@@ -23,6 +23,10 @@ Examples:
     # Quick event (1 hour from now)
     python3 create_event.py --summary "Quick sync" --duration 60
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 from datetime import datetime, timedelta
 from google_auth import get_calendar_service
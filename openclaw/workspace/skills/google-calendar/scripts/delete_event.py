@@ -4,6 +4,10 @@
 Usage:
     python3 delete_event.py EVENT_ID [--calendar primary]
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 from google_auth import get_calendar_service
 
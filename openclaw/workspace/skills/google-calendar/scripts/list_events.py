@@ -17,6 +17,10 @@ Examples:
     # Specific calendar
     python3 list_events.py --calendar "work@example.com"
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
 from datetime import datetime, timedelta
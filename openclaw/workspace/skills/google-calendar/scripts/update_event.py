@@ -14,6 +14,10 @@ Examples:
     # Update location
     python3 update_event.py abc123 --location "Conference Room B"
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 from google_auth import get_calendar_service
 
@@ -5,6 +5,10 @@ Usage:
     python3 append_text.py DOC_ID "Text to append"
     python3 append_text.py DOC_ID --file input.txt
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 from google_auth import get_docs_service
 
@@ -4,6 +4,10 @@
 Usage:
     python3 create_doc.py "Document Title" [--content "Initial content"]
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 from google_auth import get_docs_service, get_drive_service
 
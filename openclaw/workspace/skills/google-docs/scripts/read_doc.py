@@ -4,6 +4,10 @@
 Usage:
     python3 read_doc.py DOC_ID [--format text|json]
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
 from google_auth import get_docs_service
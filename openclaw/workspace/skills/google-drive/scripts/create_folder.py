@@ -4,6 +4,10 @@
 Usage:
     python3 create_folder.py FOLDER_NAME [--parent PARENT_FOLDER_ID]
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 from google_auth import get_drive_service
 
@@ -4,13 +4,17 @@
 Usage:
     python3 download_file.py FILE_ID [--output PATH]
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import io
-from googleapiclient.http import MediaIoBaseDownload
-from google_auth import get_drive_service
+from google_auth import MAX_RETRIES, get_drive_service
 
 def download_file(file_id, output_path=None):
     """Download file from Drive."""
+    from googleapiclient.http import MediaIoBaseDownload
     service = get_drive_service()
     
     try:
@@ -51,7 +55,8 @@ def download_file(file_id, output_path=None):
         
         done = False
         while not done:
-            status, done = downloader.next_chunk()
+            # Media chunks bypass the service's retrying requests; retry them here
+            status, done = downloader.next_chunk(num_retries=MAX_RETRIES)
             if status:
                 print(f"Download {int(status.progress() * 100)}%")
         
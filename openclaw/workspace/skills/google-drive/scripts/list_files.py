@@ -17,6 +17,10 @@ Examples:
     # Search by type
     python3 list_files.py --query "mimeType='application/vnd.google-apps.document'"
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
 from google_auth import get_drive_service
@@ -2,17 +2,18 @@
 """
 Move a Google Drive file to a folder
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import sys
 import argparse
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from google_auth import get_credentials
+from google_auth import get_drive_service
 
 
 def move_file(file_id, folder_id):
     """Move file to specified folder"""
-    creds = get_credentials()
-    service = build('drive', 'v3', credentials=creds)
+    service = get_drive_service()
     
     # Retrieve the existing parents to remove
     file = service.files().get(fileId=file_id, fields='parents').execute()
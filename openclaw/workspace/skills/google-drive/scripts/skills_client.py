@@ -0,0 +1,78 @@
+"""Thin client for the warm skills daemon (workspace/scripts/skills-daemon.py).
+
+Runs before anything else in every skill script, so socket and subprocess
+are imported only on the paths that use them.
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+WORKSPACE_DIR = Path(__file__).parent.parent.parent.parent
+SOCKET_PATH = WORKSPACE_DIR / "cache" / "skills-daemon.sock"
+DAEMON_SCRIPT = WORKSPACE_DIR / "scripts" / "skills-daemon.py"
+# Settings that pick which API, store and trace a call uses; the daemon runs
+# a call only if its own values match the caller's
+ROUTING_ENV = ('GOOGLE_API_BASE_URL', 'GOOGLE_API_TRACE', 'GMAIL_STORE_PATH', 'CONTACT_INDEX_PATH')
+
+def routing_env():
+    return {name: os.environ.get(name, '') for name in ROUTING_ENV}
+
+def start_daemon():
+    """Start the daemon in the background, detached from this process.
+
+    It gets this environment without ROUTING_ENV, so a call aimed at a fake
+    server or a scratch store never sets the daemon up for everyone else.
+    """
+    import subprocess
+    env = {name: value for name, value in os.environ.items() if name not in ROUTING_ENV}
+    subprocess.Popen([sys.executable, str(DAEMON_SCRIPT), 'serve'], env=env,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+
+def forward_to_daemon(script):
+    """Run `script` with this process's arguments in the daemon and exit with its status.
+
+    Returns, so the caller runs the script itself, when forwarding is off
+    (SKILLS_DAEMON=off) or the daemon is not running; in the default "auto"
+    mode the daemon is then started for the next call. It also returns
+    when the daemon declines the call, because it is busy with another one
+    or its ROUTING_ENV values differ from this process's. Once the daemon
+    has run a request it is never re-run locally, so a call is never made
+    twice.
+    """
+    mode = os.environ.get('SKILLS_DAEMON', 'auto')
+    if mode == 'off':
+        return
+
+    import socket
+    t0 = time.perf_counter()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(SOCKET_PATH))
+    except OSError:
+        sock.close()
+        if mode == 'auto' and DAEMON_SCRIPT.exists():
+            start_daemon()
+        return
+
+    request = {'script': os.path.abspath(script), 'argv': sys.argv[1:], 'cwd': os.getcwd(), 'env': routing_env()}
+    with sock, sock.makefile('rb') as reader:
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        line = reader.readline()
+    if not line:
+        print("Error: skills daemon closed the connection before answering", file=sys.stderr)
+        sys.exit(1)
+
+    response = json.loads(line)
+    if response.get('declined'):
+        return
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    if os.environ.get('SKILLS_DAEMON_TIMING'):
+        total = (time.perf_counter() - t0) * 1000
+        print(f"[skills-daemon] {response.get('elapsed_ms', 0):.1f} ms in daemon, {total:.1f} ms round trip",
+              file=sys.stderr)
+    sys.stdout.flush()
+    sys.exit(response['exit'])
@@ -4,9 +4,12 @@
 Usage:
     python3 upload_file.py FILE_PATH [--name "Custom Name"] [--folder FOLDER_ID] [--description "..."]
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import os
-from googleapiclient.http import MediaFileUpload
 from google_auth import get_drive_service
 
 def upload_file(file_path, name=None, folder_id=None, description=None):
@@ -29,6 +32,7 @@ def upload_file(file_path, name=None, folder_id=None, description=None):
         file_metadata['description'] = description
     
     # Upload
+    from googleapiclient.http import MediaFileUpload
     try:
         media = MediaFileUpload(file_path, resumable=True)
         file = service.files().create(
@@ -1,44 +1,502 @@
-"""Google API authentication utilities."""
+"""Google API authentication utilities.
+
+The Google client libraries are imported on first use, not at import time,
+so scripts start fast when they exit before making a call (--help, --dry-run,
+argument errors).
+"""
+import atexit
+import fcntl
 import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import cache
 from pathlib import Path
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 
 WORKSPACE_DIR = Path(__file__).parent.parent.parent.parent
 TOKEN_PATH = WORKSPACE_DIR / "google_token.json"
 CREDENTIALS_PATH = WORKSPACE_DIR / "google_credentials.json"
+LOCK_PATH = WORKSPACE_DIR / "google_token.json.lock"
+TRACE_PATH = WORKSPACE_DIR / "output" / "google-api-spans.jsonl"
+# Send every API call to this server instead of Google (workspace/scripts/fake-google-api.py)
+API_BASE_URL = os.environ.get('GOOGLE_API_BASE_URL', '').rstrip('/')
+PLACES_URL = f"{API_BASE_URL or 'https://places.googleapis.com'}/v1"
 
-def get_credentials():
-    """Load and refresh credentials if needed."""
-    if not TOKEN_PATH.exists():
-        raise FileNotFoundError(f"Token file not found: {TOKEN_PATH}")
-    
+# Access token shared by every service built in this process
+_credentials = None
+# Built services by (api, version)
+_services = {}
+# Keep-alive HTTP client for the Places API, reused by every call in this process
+_places_client = None
+
+@contextmanager
+def token_lock():
+    """Hold an exclusive lock on the token file across processes."""
+    with open(LOCK_PATH, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def load_token():
+    """Read the token file; safe without the lock since writes are atomic renames."""
     with open(TOKEN_PATH, 'r') as f:
-        token_data = json.load(f)
-    
-    creds = Credentials.from_authorized_user_info(token_data)
-    
-    # Refresh if expired
-    if creds.expired and creds.refresh_token:
-        creds.refresh(Request())
-        # Save refreshed token
-        with open(TOKEN_PATH, 'w') as f:
-            json.dump(json.loads(creds.to_json()), f, indent=2)
-    
-    return creds
+        return credentials_class().from_authorized_user_info(json.load(f))
+
+def save_token(creds):
+    """Write the token file via a temp file and rename so readers never see it half-written."""
+    tmp = TOKEN_PATH.with_name(f"{TOKEN_PATH.name}.{os.getpid()}.tmp")
+    with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+        json.dump(json.loads(creds.to_json()), f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, TOKEN_PATH)
+
+@cache
+def credentials_class():
+    """Return SharedCredentials, defined on first use so the module imports cheaply."""
+    from google.oauth2.credentials import Credentials
+
+    class SharedCredentials(Credentials):
+        """Credentials whose refresh is serialized through the token file.
+
+        Whoever takes the lock first refreshes and saves the token; processes
+        waiting on the lock pick up the new token from disk instead of
+        refreshing again. This also covers refreshes triggered by googleapiclient
+        on a 401 or expiry mid-request.
+        """
+
+        def refresh(self, request):
+            with token_lock():
+                current = load_token()
+                if current.valid and current.token != self.token:
+                    self.token = current.token
+                    self.expiry = current.expiry
+                    return
+                super().refresh(request)
+                save_token(self)
+
+    return SharedCredentials
+
+def get_credentials():
+    """Load credentials once per process, refreshing them if needed."""
+    global _credentials
+    if _credentials is None and API_BASE_URL:
+        # The real token never goes to a stand-in server
+        from google.oauth2.credentials import Credentials
+        _credentials = Credentials(token='fake-google-api')
+    if _credentials is None:
+        if not TOKEN_PATH.exists():
+            raise FileNotFoundError(f"Token file not found: {TOKEN_PATH}")
+        _credentials = load_token()
+
+    if not _credentials.valid and _credentials.refresh_token:
+        from google.auth.transport.requests import Request
+        _credentials.refresh(Request())
+
+    return _credentials
+
+# --- Request execution ---------------------------------------------------------------
+#
+# Every API call goes through call_with_retries(): a per-API token bucket
+# sized to Google's documented per-user quotas makes bulk operations wait
+# instead of failing, and 429/5xx (and 403 rate-limit) responses are retried
+# with exponential backoff and jitter, honouring Retry-After. Services from
+# get_service() build ManagedRequest objects (see request_class()), so a
+# plain .execute() in a script already gets this.
+#
+# A 5xx or a dropped connection can come after Google has done the work, so
+# calls that are not idempotent (POST/PATCH: sending an email, appending a
+# row, creating an event or file) are retried only when the request was
+# rate limited, which means it was rejected; other errors are raised.
+# Resumable upload chunks are always retried: they first ask the server
+# how much of the upload it already has.
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 32.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE'}
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+# (api, 'read'/'write' or None) -> (quota, per seconds), per user
+API_QUOTAS = {
+    ('gmail', None): (250, 1),  # quota units, see GMAIL_UNITS
+    ('drive', None): (12000, 60),
+    ('calendar', None): (600, 60),
+    ('sheets', 'read'): (60, 60),
+    ('sheets', 'write'): (60, 60),
+    ('docs', 'read'): (300, 60),
+    ('docs', 'write'): (60, 60),
+    ('people', 'read'): (90, 60),
+    ('people', 'write'): (60, 60),
+    ('places', None): (600, 60),
+}
+GMAIL_UNITS = {
+    'gmail.users.messages.send': 100,
+    'gmail.users.drafts.send': 100,
+    'gmail.users.messages.batchModify': 50,
+    'gmail.users.messages.batchDelete': 50,
+    'gmail.users.history.list': 2,
+    'gmail.users.getProfile': 1,
+    'gmail.users.labels.list': 1,
+    'gmail.users.labels.get': 1,
+}
+
+_stats = {'requests': 0, 'retries': 0, 'backoff_seconds': 0.0, 'throttled_seconds': 0.0}
+_buckets = {}
+
+class TokenBucket:
+    """Token bucket refilled at `rate` per second, holding at most `capacity` tokens."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        """Take `cost` tokens, sleeping until they are available; returns the seconds waited."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= cost
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+def throttle(api, method_id, http_method, count=1):
+    """Wait for the quota of `count` calls and return the seconds waited; unknown APIs are not throttled."""
+    kind = 'read' if http_method == 'GET' else 'write'
+    key = (api, kind) if (api, kind) in API_QUOTAS else (api, None)
+    if key not in API_QUOTAS:
+        return 0.0
+    bucket = _buckets.get(key)
+    if bucket is None:
+        quota, seconds = API_QUOTAS[key]
+        rate = quota / seconds
+        bucket = _buckets[key] = TokenBucket(rate, min(quota, rate * 10))
+    cost = (GMAIL_UNITS.get(method_id, 5) if api == 'gmail' else 1) * count
+    waited = bucket.acquire(cost)
+    _stats['throttled_seconds'] += waited
+    return waited
+
+def rate_limited(error):
+    """True if a 403 HttpError is a rate-limit error rather than a permission error."""
+    try:
+        details = json.loads(error.content)['error']
+    except (ValueError, KeyError, TypeError):
+        return False
+    reasons = {e.get('reason') for e in details.get('errors', [])}
+    return bool(reasons & RATE_LIMIT_REASONS) or details.get('status') == 'RESOURCE_EXHAUSTED'
+
+def retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from datetime import datetime, timezone
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def error_status(error):
+    """HTTP status carried by a failed call's exception, or None (e.g. connection errors)."""
+    resp = getattr(error, 'resp', None)  # googleapiclient HttpError
+    if resp is not None:
+        return resp.status
+    response = getattr(error, 'response', None)  # requests/httpx HTTP errors
+    return response.status_code if response is not None else None
+
+def transport_errors():
+    """Connection and timeout exception types of requests and httpx, whichever are installed."""
+    errors = ()
+    try:
+        import requests
+        errors += (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    except ImportError:
+        pass
+    try:
+        import httpx
+        errors += (httpx.TransportError,)
+    except ImportError:
+        pass
+    return errors
+
+def retry_delay(error, attempt, idempotent=True):
+    """Seconds to wait before retrying after `error`, or None if it should not be retried.
+
+    A call that is not idempotent is retried only when it was rate limited.
+    """
+    from googleapiclient.errors import HttpError
+    if isinstance(error, HttpError):
+        status, headers = error.resp.status, error.resp
+        if status == 403 and rate_limited(error):
+            status = 429
+    elif getattr(error, 'response', None) is not None:
+        status, headers = error.response.status_code, error.response.headers
+    elif isinstance(error, (ConnectionError, TimeoutError) + transport_errors()):
+        # Raised before any response arrived (requests' and httpx's own types
+        # don't derive from the builtin ones)
+        status, headers = None, {}
+    else:
+        return None
+    if status is not None and status not in RETRY_STATUSES:
+        return None
+    if not idempotent and status != 429:
+        return None
+
+    backoff = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+    delay = backoff / 2 + random.uniform(0, backoff / 2)
+    server_delay = retry_after(headers.get('retry-after'))
+    if server_delay is not None:
+        delay = max(delay, min(server_delay, 300.0))
+    return delay
+
+def call_with_retries(api, method_id, http_method, call, count=1, idempotent=None):
+    """Run call(span) under the API's rate limit, retrying transient failures.
+
+    call() records the response's status and byte counts in `span`, which
+    is written to the trace file when tracing is on (see write_span()).
+    A batch request passes the number of calls it carries as `count`; the
+    later chunks of a resumable upload pass 0. `idempotent` defaults to
+    whether http_method is in IDEMPOTENT_METHODS (see retry_delay()).
+    """
+    if idempotent is None:
+        idempotent = http_method in IDEMPOTENT_METHODS
+    span = {'ts': utc_timestamp(), 'api': api, 'method': method_id, 'http': http_method,
+            'status': None, 'bytes_out': 0, 'bytes_in': 0, 'retries': 0}
+    if count > 1:
+        span['batch'] = count
+    t0 = time.perf_counter()
+    throttled = 0.0
+    try:
+        for attempt in range(MAX_RETRIES + 1):
+            throttled += throttle(api, method_id, http_method, count)
+            _stats['requests'] += 1
+            try:
+                return call(span)
+            except Exception as e:
+                span['status'] = error_status(e)
+                delay = retry_delay(e, attempt, idempotent)
+                if delay is None or attempt == MAX_RETRIES:
+                    span['error'] = type(e).__name__
+                    raise
+                span['retries'] += 1
+                _stats['retries'] += 1
+                _stats['backoff_seconds'] += delay
+                time.sleep(delay)
+    finally:
+        if TRACE_ENABLED:
+            span['latency_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+            span['throttled_ms'] = round(throttled * 1000, 1)
+            span['script'] = calling_script()
+            span['pid'] = os.getpid()
+            write_span(span)
+
+def executor_stats():
+    """Counters for this process: requests sent, retries, and seconds spent backing off/throttled."""
+    return dict(_stats)
+
+def print_executor_stats():
+    s = _stats
+    if s['requests']:
+        print(f"[google api] {s['requests']} requests, {s['retries']} retries, "
+              f"{s['backoff_seconds']:.1f}s backoff, {s['throttled_seconds']:.1f}s throttled", file=sys.stderr)
+
+if os.environ.get('GOOGLE_API_STATS'):
+    atexit.register(print_executor_stats)
+
+# --- Tracing -------------------------------------------------------------------------
+#
+# With GOOGLE_API_TRACE=1, every call made through call_with_retries()
+# appends one JSON line (a span) to TRACE_PATH: API, method, HTTP status,
+# bytes sent and received, latency including retries and throttling, retry
+# count and calling script. The file is rotated past GOOGLE_API_TRACE_MAX_MB
+# (default 10), keeping TRACE_BACKUPS old files. Summarize with
+# workspace/scripts/google-api-trace.py.
+
+TRACE_ENABLED = bool(os.environ.get('GOOGLE_API_TRACE'))
+TRACE_MAX_BYTES = int(float(os.environ.get('GOOGLE_API_TRACE_MAX_MB', 10)) * 1024 * 1024)
+TRACE_BACKUPS = 3
+
+def utc_timestamp():
+    now = time.time()
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)) + f'.{int(now * 1000) % 1000:03d}Z'
+
+def calling_script():
+    """The running skill script as 'skill/script.py' (the daemon sets argv per call)."""
+    path = Path(sys.argv[0]).resolve() if sys.argv and sys.argv[0] else None
+    return f"{path.parent.parent.name}/{path.name}" if path else None
+
+def write_span(span):
+    """Append a span to TRACE_PATH in one write, so concurrent processes never interleave lines."""
+    TRACE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(TRACE_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, (json.dumps(span, separators=(',', ':')) + '\n').encode())
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    if size > TRACE_MAX_BYTES:
+        rotate_trace()
+
+def rotate_trace():
+    """Shift TRACE_PATH to .1, .1 to .2, ...; the lock makes concurrent writers rotate only once."""
+    with open(TRACE_PATH.with_name(f"{TRACE_PATH.name}.lock"), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if TRACE_PATH.stat().st_size <= TRACE_MAX_BYTES:
+                return  # another process rotated it first
+        except FileNotFoundError:
+            return
+        for n in range(TRACE_BACKUPS - 1, 0, -1):
+            older = TRACE_PATH.with_name(f"{TRACE_PATH.name}.{n}")
+            if older.exists():
+                os.replace(older, TRACE_PATH.with_name(f"{TRACE_PATH.name}.{n + 1}"))
+        os.replace(TRACE_PATH, TRACE_PATH.with_name(f"{TRACE_PATH.name}.1"))
+
+@cache
+def request_class():
+    """Return ManagedRequest, defined on first use so the module imports cheaply."""
+    from googleapiclient.http import HttpRequest
+
+    class ManagedRequest(HttpRequest):
+        """HttpRequest whose execute() is rate limited and retried by call_with_retries()."""
+
+        def execute(self, http=None, num_retries=0):
+            api = (self.methodId or '').split('.')[0]
+
+            def attempt(span):
+                postproc = self.postproc
+
+                def record(resp, content):
+                    span['status'] = resp.status
+                    span['bytes_in'] = len(content or b'')
+                    return postproc(resp, content)
+
+                span['bytes_out'] = len(self.body or b'') + (self.resumable.size() if self.resumable else 0)
+                self.postproc = record
+                try:
+                    return HttpRequest.execute(self, http=http, num_retries=num_retries)
+                finally:
+                    self.postproc = postproc
+
+            if self.resumable:
+                return self.execute_resumable(api, http)
+            return call_with_retries(api, self.methodId, self.method, attempt)
+
+        def execute_resumable(self, api, http):
+            """Upload a chunk per call_with_retries(), so each chunk gets its own retries.
+
+            The upload is charged to the quota once, with its first chunk. A
+            chunk retried after an error starts by asking the server how much
+            it already has (next_chunk() does this in its error state), so a
+            dropped connection resumes the upload instead of restarting it.
+            """
+            def upload_chunk(span):
+                start = self.resumable_progress
+                _, body = HttpRequest.next_chunk(self, http=http)
+                span['status'] = 308 if body is None else 200
+                span['bytes_out'] = (self.resumable.size() if body is not None else self.resumable_progress) - start
+                return body
+
+            body, chunks = None, 0
+            while body is None:
+                body = call_with_retries(api, self.methodId, self.method, upload_chunk,
+                                         count=0 if chunks else 1, idempotent=True)
+                chunks += 1
+            return body
+
+    return ManagedRequest
+
+def discovery_document(api, version):
+    """Return the discovery document bundled with googleapiclient for api/version, or None."""
+    from googleapiclient import discovery_cache
+    content = discovery_cache.get_static_doc(api, version)
+    return json.loads(content) if content is not None else None
+
+def get_service(api, version):
+    """Build an API service from the bundled discovery document, once per process."""
+    service = _services.get((api, version))
+    if service is None:
+        from googleapiclient.discovery import build, build_from_document
+        document = discovery_document(api, version)
+        if document is not None and API_BASE_URL:
+            document = dict(document, rootUrl=f'{API_BASE_URL}/')
+        if document is None:
+            service = build(api, version, credentials=get_credentials(), requestBuilder=request_class())
+        else:
+            service = build_from_document(document, credentials=get_credentials(), requestBuilder=request_class())
+        _services[(api, version)] = service
+    return service
+
+def get_places_client():
+    """Return the pooled Places API client: HTTP/2 via httpx when installed, else a requests session."""
+    global _places_client
+    if _places_client is None:
+        try:
+            import httpx
+            import h2  # noqa: F401 -- httpx needs it for HTTP/2
+            _places_client = httpx.Client(http2=True, timeout=30)
+        except ImportError:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _places_client = requests.Session()
+            _places_client.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=8))
+    return _places_client
+
+def places_request(method, path, **kwargs):
+    """Call a Places API (New) endpoint over the shared connection and return the response.
+
+    The OAuth token comes from get_credentials(); on a 401 it is refreshed
+    and the request retried once. Rate limited and retried like every other
+    API call (see call_with_retries()); raises on HTTP errors.
+    """
+    client = get_places_client()
+    creds = get_credentials()
+    headers = dict(kwargs.pop('headers', {}))
+
+    def attempt(span):
+        for retry in range(2):
+            headers['Authorization'] = f'Bearer {creds.token}'
+            response = client.request(method, f'{PLACES_URL}/{path}', headers=headers, **kwargs)
+            if response.status_code != 401 or retry:
+                break
+            span['retries'] += 1
+            from google.auth.transport.requests import Request
+            creds.refresh(Request())
+        request = response.request
+        span['status'] = response.status_code
+        span['bytes_out'] = len(getattr(request, 'body', None) or getattr(request, 'content', None) or b'')
+        span['bytes_in'] = len(response.content)
+        response.raise_for_status()
+        return response
+
+    # Text and nearby searches are POSTs that only read
+    idempotent = method in IDEMPOTENT_METHODS or path.startswith('places:search')
+    return call_with_retries('places', f"places.{path.split('/')[0]}", method, attempt, idempotent=idempotent)
 
 def get_drive_service():
     """Get authenticated Drive API service."""
-    creds = get_credentials()
-    return build('drive', 'v3', credentials=creds)
+    return get_service('drive', 'v3')
 
 def get_docs_service():
     """Get authenticated Docs API service."""
-    creds = get_credentials()
-    return build('docs', 'v1', credentials=creds)
+    return get_service('docs', 'v1')
 
 def get_sheets_service():
     """Get authenticated Sheets API service."""
-    creds = get_credentials()
-    return build('sheets', 'v4', credentials=creds)
+    return get_service('sheets', 'v4')
@@ -17,20 +17,18 @@ Examples:
 Common types: restaurant, cafe, bar, gym, pharmacy, hospital, park, museum, 
               shopping_mall, grocery_or_supermarket, gas_station, atm, bank
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
-from google_auth import get_credentials
-import requests
-
-BASE_URL = 'https://places.googleapis.com/v1/places:searchNearby'
+from google_auth import places_request
 
 def nearby_search(place_type, lat, lng, radius=1000, open_now=False, max_results=10):
     """Search for nearby places by type using OAuth."""
-    creds = get_credentials()
-    
     headers = {
         'Content-Type': 'application/json',
-        'Authorization': f'Bearer {creds.token}',
         'X-Goog-FieldMask': 'places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount,places.priceLevel,places.types,places.currentOpeningHours,places.id'
     }
     
@@ -49,14 +47,13 @@ def nearby_search(place_type, lat, lng, radius=1000, open_now=False, max_results
         body['openNow'] = True
     
     try:
-        response = requests.post(BASE_URL, headers=headers, json=body)
-        response.raise_for_status()
+        response = places_request('POST', 'places:searchNearby', headers=headers, json=body)
         data = response.json()
         return data.get('places', [])
     
     except Exception as e:
         print(f"Error searching nearby places: {e}")
-        if hasattr(e, 'response'):
+        if getattr(e, 'response', None) is not None:
             print(f"Response: {e.response.text}")
         return None
 
@@ -4,80 +4,90 @@
 Usage:
     python3 place_details.py PLACE_ID
     python3 place_details.py PLACE_ID --format json
+    python3 place_details.py PLACE_ID [PLACE_ID ...]   # several places over one connection
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
-from google_auth import get_credentials
-import requests
+import sys
+from google_auth import places_request
 
 def get_place_details(place_id):
     """Get detailed information about a place using OAuth."""
-    creds = get_credentials()
-    
-    url = f'https://places.googleapis.com/v1/places/{place_id}'
-    
     headers = {
         'Content-Type': 'application/json',
-        'Authorization': f'Bearer {creds.token}',
         'X-Goog-FieldMask': 'displayName,formattedAddress,location,rating,userRatingCount,priceLevel,types,currentOpeningHours,websiteUri,internationalPhoneNumber,businessStatus,googleMapsUri'
     }
     
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response = places_request('GET', f'places/{place_id}', headers=headers)
         return response.json()
     
     except Exception as e:
-        print(f"Error getting place details: {e}")
-        if hasattr(e, 'response'):
-            print(f"Response: {e.response.text}")
+        print(f"Error getting place details for {place_id}: {e}", file=sys.stderr)
+        if getattr(e, 'response', None) is not None:
+            print(f"Response: {e.response.text}", file=sys.stderr)
         return None
 
+def print_place(place):
+    """Print one place's details as text."""
+    name = place.get('displayName', {}).get('text', 'Unnamed')
+    address = place.get('formattedAddress', 'N/A')
+    rating = place.get('rating', 'N/A')
+    rating_count = place.get('userRatingCount', 0)
+    price_level = place.get('priceLevel', 'N/A')
+    phone = place.get('internationalPhoneNumber', 'N/A')
+    website = place.get('websiteUri', 'N/A')
+    maps_uri = place.get('googleMapsUri', 'N/A')
+    status = place.get('businessStatus', 'N/A')
+    types = ', '.join(place.get('types', []))
+    
+    # Opening hours
+    opening = place.get('currentOpeningHours', {})
+    open_now = opening.get('openNow', 'Unknown')
+    weekday_text = opening.get('weekdayDescriptions', [])
+    
+    print(f"Name: {name}")
+    print(f"Address: {address}")
+    print(f"Rating: {rating} ({rating_count} reviews)")
+    print(f"Price Level: {price_level}")
+    print(f"Phone: {phone}")
+    print(f"Website: {website}")
+    print(f"Google Maps: {maps_uri}")
+    print(f"Status: {status}")
+    print(f"Open Now: {open_now}")
+    print(f"Types: {types}")
+    
+    if weekday_text:
+        print("\nOpening Hours:")
+        for day in weekday_text:
+            print(f"  {day}")
+
 def main():
     parser = argparse.ArgumentParser(description='Get place details from Google Places API')
-    parser.add_argument('place_id', help='Place ID')
+    parser.add_argument('place_ids', nargs='+', metavar='place_id', help='Place ID (several share one connection)')
     parser.add_argument('--format', choices=['text', 'json'], default='text')
     args = parser.parse_args()
     
-    place = get_place_details(args.place_id)
+    results = [(place_id, get_place_details(place_id)) for place_id in args.place_ids]
+    places = [place for _, place in results if place]
+    failed = [place_id for place_id, place in results if not place]
     
-    if not place:
-        exit(1)
+    if places and args.format == 'json':
+        print(json.dumps(places[0] if len(args.place_ids) == 1 else places, indent=2))
+    elif places:
+        for i, place in enumerate(places):
+            if i:
+                print("\n" + "-" * 40 + "\n")
+            print_place(place)
     
-    if args.format == 'json':
-        print(json.dumps(place, indent=2))
-    else:
-        name = place.get('displayName', {}).get('text', 'Unnamed')
-        address = place.get('formattedAddress', 'N/A')
-        rating = place.get('rating', 'N/A')
-        rating_count = place.get('userRatingCount', 0)
-        price_level = place.get('priceLevel', 'N/A')
-        phone = place.get('internationalPhoneNumber', 'N/A')
-        website = place.get('websiteUri', 'N/A')
-        maps_uri = place.get('googleMapsUri', 'N/A')
-        status = place.get('businessStatus', 'N/A')
-        types = ', '.join(place.get('types', []))
-        
-        # Opening hours
-        opening = place.get('currentOpeningHours', {})
-        open_now = opening.get('openNow', 'Unknown')
-        weekday_text = opening.get('weekdayDescriptions', [])
-        
-        print(f"Name: {name}")
-        print(f"Address: {address}")
-        print(f"Rating: {rating} ({rating_count} reviews)")
-        print(f"Price Level: {price_level}")
-        print(f"Phone: {phone}")
-        print(f"Website: {website}")
-        print(f"Google Maps: {maps_uri}")
-        print(f"Status: {status}")
-        print(f"Open Now: {open_now}")
-        print(f"Types: {types}")
-        
-        if weekday_text:
-            print("\nOpening Hours:")
-            for day in weekday_text:
-                print(f"  {day}")
+    if failed:
+        print(f"Could not get details for {len(failed)} of {len(args.place_ids)} places: {', '.join(failed)}",
+              file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
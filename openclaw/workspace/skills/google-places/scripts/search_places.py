@@ -18,20 +18,18 @@ Examples:
     # JSON output
     python3 search_places.py "museums" --lat 46.5197 --lng 6.6323 --format json
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
-from google_auth import get_credentials
-import requests
-
-BASE_URL = 'https://places.googleapis.com/v1/places:searchText'
+from google_auth import places_request
 
 def search_places(query, lat=None, lng=None, radius=None, open_now=False, max_results=10):
     """Search for places using Places API (New) with OAuth."""
-    creds = get_credentials()
-    
     headers = {
         'Content-Type': 'application/json',
-        'Authorization': f'Bearer {creds.token}',
         'X-Goog-FieldMask': 'places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount,places.priceLevel,places.types,places.currentOpeningHours,places.id'
     }
     
@@ -54,14 +52,13 @@ def search_places(query, lat=None, lng=None, radius=None, open_now=False, max_re
         body['openNow'] = True
     
     try:
-        response = requests.post(BASE_URL, headers=headers, json=body)
-        response.raise_for_status()
+        response = places_request('POST', 'places:searchText', headers=headers, json=body)
         data = response.json()
         return data.get('places', [])
     
     except Exception as e:
         print(f"Error searching places: {e}")
-        if hasattr(e, 'response'):
+        if getattr(e, 'response', None) is not None:
             print(f"Response: {e.response.text}")
         return None
 
@@ -5,6 +5,10 @@ Usage:
     python3 append_row.py SHEET_ID --row '["Col1", "Col2", "Col3"]'
     python3 append_row.py SHEET_ID --csv-file data.csv
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
 import csv
@@ -4,6 +4,10 @@
 Usage:
     python3 create_sheet.py "Sheet Title"
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 from google_auth import get_sheets_service, get_drive_service
 
@@ -4,6 +4,10 @@
 Usage:
     python3 read_sheet.py SHEET_ID [--range "Sheet1!A1:C10"] [--format csv|json]
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
 import csv
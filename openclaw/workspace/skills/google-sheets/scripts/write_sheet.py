@@ -5,6 +5,10 @@ Usage:
     python3 write_sheet.py SHEET_ID --range "Sheet1!A1" --data '[["A1", "B1"], ["A2", "B2"]]'
     python3 write_sheet.py SHEET_ID --range "Sheet1!A1" --csv-file data.csv
 """
+if __name__ == '__main__':
+    from skills_client import forward_to_daemon
+    forward_to_daemon(__file__)
+
 import argparse
 import json
 import csv